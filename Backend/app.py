@@ -4,6 +4,9 @@ from flask_jwt_extended import JWTManager
 from datetime import timedelta, datetime
 import os
 
+from config.db import close_db_connection
+from cli import register_commands
+
 # Import routes
 from routes.database import database_bp
 from routes.auth import auth_bp
@@ -15,6 +18,8 @@ from routes.budgets import budgets_bp
 from routes.goals import goals_bp
 from routes.categories import categories_bp
 from routes.transactions import transactions_bp
+from routes.recurring import recurring_bp
+from routes.stream import stream_bp
 
 def create_app():
     app = Flask(__name__)
@@ -54,6 +59,14 @@ def create_app():
     app.register_blueprint(goals_bp)
     app.register_blueprint(categories_bp)
     app.register_blueprint(transactions_bp)
+    app.register_blueprint(recurring_bp)
+    app.register_blueprint(stream_bp)
+    
+    # Return the request's pooled connection when the app context ends
+    app.teardown_appcontext(close_db_connection)
+    
+    # CLI commands (flask --app app <command>)
+    register_commands(app)
     
     # Global OPTIONS handler for CORS preflight
     @app.before_request
@@ -0,0 +1,132 @@
+import click
+import csv
+import time
+from datetime import date, timedelta
+from flask import g
+from config.db import db_config_from_env
+from models.transaction_import import TransactionImport
+from models.recurring_schedule import RecurringSchedule
+from models.account import Account
+from models.balance_reconciler import BalanceReconciler
+from models.monthly_rollup import MonthlyCategoryRollup
+from utils.importers import detect_format, parse_statement
+from utils.report_cache import report_cache, MemoryCacheBackend
+
+def use_env_database():
+    """Point get_db_connection() at the DB_* environment credentials for this CLI run"""
+    g.db_config = db_config_from_env()
+    warn_unshared_cache()
+
+def warn_unshared_cache():
+    """Warn that this job's writes cannot invalidate a web server's in-process report cache"""
+    if isinstance(report_cache.backend, MemoryCacheBackend):
+        click.echo("Warning: REPORT_CACHE_BACKEND=memory; a running web server keeps serving cached "
+                   "reports and ETags that miss this job's writes (use REPORT_CACHE_BACKEND=redis)", err=True)
+
+def register_commands(app):
+    """Register the Flask CLI commands (run with `flask --app app <command>`)"""
+    
+    @app.cli.command('import-transactions')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--user-id', type=int, required=True, help='Owner of the imported transactions')
+    @click.option('--account-id', type=int, help='Account for rows that do not name one')
+    @click.option('--format', 'fmt', type=click.Choice(['csv', 'ofx', 'qif']), help='Defaults to the file extension')
+    @click.option('--allow-duplicates', is_flag=True, help='Insert rows even if they are already stored')
+    def import_transactions_command(path, user_id, account_id, fmt, allow_duplicates):
+        """Bulk import a CSV, OFX or QIF statement"""
+        use_env_database()
+        fmt = detect_format(path, fmt)
+        started = time.monotonic()
+        
+        with open(path, encoding='utf-8-sig', errors='replace', newline='') as stream:
+            importer = TransactionImport(user_id, default_account_id=account_id,
+                                         skip_duplicates=not allow_duplicates)
+            result = importer.run(parse_statement(stream, fmt))
+        
+        elapsed = time.monotonic() - started
+        click.echo(f"Imported {result['imported']} of {result['rows']} rows "
+                   f"({result['duplicates']} duplicates skipped) in {elapsed:.2f}s "
+                   f"({result['rows'] / elapsed if elapsed else 0:.0f} rows/s)")
+        for error in result['errors']:
+            click.echo(f"  line {error['line']}: {error['error']}", err=True)
+        if result['failed'] > len(result['errors']):
+            click.echo(f"  ... and {result['failed'] - len(result['errors'])} more errors", err=True)
+    
+    @app.cli.command('materialize-recurring')
+    @click.option('--date', 'as_of', type=click.DateTime(formats=['%Y-%m-%d']), help='Materialize through this day (default: today)')
+    @click.option('--batch-size', type=int, default=500, show_default=True, help='Schedules locked and processed per database transaction')
+    @click.option('--interval', type=int, default=0, help='Keep running, ticking every N seconds')
+    def materialize_recurring_command(as_of, batch_size, interval):
+        """Write due occurrences of recurring schedules as transactions (run from cron or with --interval)"""
+        use_env_database()
+        
+        while True:
+            started = time.monotonic()
+            result = RecurringSchedule.materialize_due(as_of.date() if as_of else date.today(), batch_size)
+            elapsed = time.monotonic() - started
+            click.echo(f"Materialized {result['created']} transactions from {result['schedules']} "
+                       f"due schedules in {elapsed:.2f}s")
+            if not interval:
+                break
+            time.sleep(interval)
+    
+    @app.cli.command('snapshot-balances')
+    @click.option('--date', 'as_of', type=click.DateTime(formats=['%Y-%m-%d']), help='Day to snapshot (default: yesterday)')
+    @click.option('--days', type=int, default=1, show_default=True, help='Snapshot this many days ending at --date')
+    def snapshot_balances_command(as_of, days):
+        """Record end-of-day balances of every account (run daily from cron)"""
+        use_env_database()
+        last_day = as_of.date() if as_of else date.today() - timedelta(days=1)
+        
+        for offset in range(days - 1, -1, -1):
+            day = last_day - timedelta(days=offset)
+            started = time.monotonic()
+            Account.snapshot_balances(day)
+            click.echo(f"Snapshot for {day.isoformat()} written in {time.monotonic() - started:.2f}s")
+    
+    @app.cli.command('reconcile-balances')
+    @click.option('--workers', type=int, default=4, show_default=True, help='Shards reconciled concurrently (capped by DB_POOL_SIZE - 1)')
+    @click.option('--shard-size', type=int, default=1000, show_default=True, help='Users per shard (one grouped ledger query each)')
+    @click.option('--report', type=click.Path(dir_okay=False, writable=True), help='Write drifted accounts to this CSV file')
+    @click.option('--fix', is_flag=True, help='Reset drifted balances to opening balance + ledger sum')
+    def reconcile_balances_command(workers, shard_size, report, fix):
+        """Compare stored account balances with the transaction ledger"""
+        if fix:
+            warn_unshared_cache()
+        reconciler = BalanceReconciler(db_config_from_env(), workers=workers, shard_size=shard_size, fix=fix)
+        started = time.monotonic()
+        
+        def progress(done, total):
+            if done % 10 == 0 or done == total:
+                click.echo(f"  {done}/{total} shards", err=True)
+        
+        result = reconciler.run(progress)
+        elapsed = time.monotonic() - started
+        
+        if report:
+            with open(report, 'w', newline='') as handle:
+                writer = csv.DictWriter(handle, fieldnames=BalanceReconciler.REPORT_COLUMNS)
+                writer.writeheader()
+                writer.writerows(reconciler.drifts)
+        
+        click.echo(f"Checked {result['accounts_checked']} accounts in {result['shards']} shards "
+                   f"with {reconciler.workers} workers in {elapsed:.2f}s: {result['drifted']} drifted "
+                   f"(total {result['total_drift']}), {result['fixed']} fixed")
+        for drift in reconciler.drifts[:10]:
+            click.echo(f"  account {drift['account_id']}: stored {drift['stored_balance']}, "
+                       f"ledger {drift['ledger_balance']}")
+    
+    @app.cli.command('rebuild-rollups')
+    @click.option('--workers', type=int, default=4, show_default=True, help='Users rebuilt concurrently (capped by DB_POOL_SIZE - 1)')
+    @click.option('--users-per-task', type=int, default=100, show_default=True, help='Users handed to a worker at a time')
+    def rebuild_rollups_command(workers, users_per_task):
+        """Recompute the monthly category and daily rollups for every user from Transactions"""
+        warn_unshared_cache()
+        started = time.monotonic()
+        
+        def progress(done, total):
+            click.echo(f"  {done}/{total} users", err=True)
+        
+        rebuilt = MonthlyCategoryRollup.rebuild_all(db_config_from_env(), workers=workers,
+                                                    users_per_task=users_per_task, progress=progress)
+        click.echo(f"Rebuilt rollups for {rebuilt} users in {time.monotonic() - started:.2f}s")
@@ -1,13 +1,20 @@
 import mysql.connector
-from flask import session, g
+from collections import OrderedDict
+from flask import session, g, has_app_context, has_request_context
+from config.migrations import database_key
+import hashlib
 import json
+import os
+import threading
+import time
+import weakref
 
 class SimpleDBConnection:
     """Simple MySQL connection manager based on DAL.py approach"""
     
-    def __init__(self):
-        self.connection = None
-        self.cursor = None
+    def __init__(self, connection=None):
+        self.connection = connection
+        self.cursor = connection.cursor(dictionary=True) if connection else None
     
     def connect(self, host='localhost', user=None, password=None, database=None, port=3306):
         """Connect to MySQL database"""
@@ -27,16 +34,61 @@ class SimpleDBConnection:
             return False
     
     def execute(self, query, params=None):
-        """Execute a query"""
+        """Execute a query, reconnecting once if the connection was lost outside a transaction"""
+        try:
+            self._execute(query, params)
+        except (mysql.connector.errors.OperationalError, mysql.connector.errors.InterfaceError) as err:
+            if self.connection is None or self.connection.in_transaction:
+                print(f"Query execution error: {err}")
+                raise err
+            print(f"Connection lost ({err}), reconnecting")
+            self.connection.reconnect(attempts=2, delay=0)
+            self.cursor = self.connection.cursor(dictionary=True)
+            connection_validator.record_reconnect()
+            self._execute(query, params)
+        except mysql.connector.Error as err:
+            print(f"Query execution error: {err}")
+            raise err
+        connection_validator.touch(self.connection)
+        return self.cursor
+    
+    def executemany(self, query, seq_params):
+        """Execute a statement for many parameter sets (INSERTs are sent as one multi-row statement)"""
         try:
-            if params:
-                self.cursor.execute(query, params)
-            else:
-                self.cursor.execute(query)
-            return self.cursor
+            self.cursor.executemany(query, seq_params)
         except mysql.connector.Error as err:
             print(f"Query execution error: {err}")
             raise err
+        connection_validator.touch(self.connection)
+        return self.cursor
+    
+    def _execute(self, query, params):
+        if params:
+            self.cursor.execute(query, params)
+        else:
+            self.cursor.execute(query)
+    
+    def stream(self, query, params=None, batch_size=1000):
+        """Yield batches of row tuples from an unbuffered cursor, holding one batch in memory at a time"""
+        cursor = self.connection.cursor(buffered=False)
+        exhausted = False
+        try:
+            cursor.execute(query, params or ())
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    exhausted = True
+                    break
+                yield rows
+        finally:
+            try:
+                if not exhausted:
+                    # The client went away mid-stream; drain so the connection can be reused
+                    self.connection.consume_results()
+                cursor.close()
+            except mysql.connector.Error as err:
+                print(f"Error closing streaming cursor: {err}")
+            connection_validator.touch(self.connection)
     
     def fetchone(self):
         """Fetch one result"""
@@ -57,12 +109,14 @@ class SimpleDBConnection:
             self.connection.rollback()
     
     def close(self):
-        """Close connection"""
+        """Close connection (pooled connections go back to their pool)"""
         if self.cursor:
             self.cursor.close()
         if self.connection:
             self.connection.close()
             print("Database connection closed")
+        self.cursor = None
+        self.connection = None
     
     def test_connection(self):
         """Test if connection is active"""
@@ -72,156 +126,341 @@ class SimpleDBConnection:
         except:
             return False
 
-# Global database instance
-db = SimpleDBConnection()
+class PooledConnection:
+    """A checked-out connection; close() hands it back to its pool instead of closing it"""
+    
+    def __init__(self, pool, cnx):
+        self._pool = pool
+        self._cnx = cnx
+    
+    def __getattr__(self, name):
+        return getattr(self._cnx, name)
+    
+    def close(self):
+        cnx, self._cnx = self._cnx, None
+        if cnx is not None:
+            self._pool.release(cnx)
+    
+    def discard(self):
+        """Close the underlying connection and free its pool slot"""
+        cnx, self._cnx = self._cnx, None
+        if cnx is not None:
+            self._pool.discard(cnx)
 
-def get_db_connection():
-    """Get or create database connection"""
-    global db
-    
-    # Check if we have connection info in session
-    if 'db_config' in session:
-        config = session['db_config']
-        if not db.connection or not db.test_connection():
-            db.connect(
-                host=config.get('host', 'localhost'),
-                user=config.get('user'),
-                password=config.get('password'),
-                database=config.get('database'),
-                port=config.get('port', 3306)
-            )
-    return db
+# mysql.connector's own pool pings on every checkout (is_connected()) and resets the
+# session on every return, two round trips per request. This pool makes none at
+# checkout, leaves liveness to ConnectionValidator and only rolls back on return.
+class ConnectionPool:
+    """Fixed-size pool of raw connections with no round trip at checkout"""
+    
+    def __init__(self, config, size):
+        self.config = {
+            'host': config.get('host', 'localhost'),
+            'user': config.get('user'),
+            'password': config.get('password'),
+            'database': config.get('database'),
+            'port': int(config.get('port', 3306))
+        }
+        self.size = size
+        self._idle = []  # LIFO: the most recently returned connection is the least likely to have timed out
+        self._open = 0
+        self._closed = False
+        self._cond = threading.Condition()
+    
+    def acquire(self, timeout):
+        """(connection, waited): an idle connection, or a new one while under size; PoolError after timeout"""
+        deadline = time.monotonic() + timeout
+        waited = False
+        with self._cond:
+            while not self._idle and self._open >= self.size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise mysql.connector.errors.PoolError("Failed getting connection; pool exhausted")
+                waited = True
+                self._cond.wait(remaining)
+            if self._idle:
+                return PooledConnection(self, self._idle.pop()), waited
+            self._open += 1
+        
+        # Connect outside the lock so other checkouts are not held up by the handshake
+        try:
+            cnx = mysql.connector.connect(**self.config)
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+        # The handshake just proved the connection alive
+        connection_validator.touch(cnx)
+        return PooledConnection(self, cnx), waited
+    
+    def release(self, cnx):
+        """Take a connection back, ending its transaction so the next checkout starts from a fresh view"""
+        try:
+            if cnx.in_transaction:
+                cnx.rollback()
+        except mysql.connector.Error as err:
+            print(f"Error resetting pooled connection: {err}")
+            self.discard(cnx)
+            return
+        with self._cond:
+            if not self._closed:
+                self._idle.append(cnx)
+                self._cond.notify()
+                return
+            self._open -= 1
+        self._close_quietly(cnx)
+    
+    def discard(self, cnx):
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+        self._close_quietly(cnx)
+    
+    def close(self):
+        """Close idle connections; checked-out ones are closed when they come back"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for cnx in idle:
+            self._close_quietly(cnx)
+    
+    @staticmethod
+    def _close_quietly(cnx):
+        try:
+            cnx.close()
+        except Exception as e:
+            print(f"Error closing pooled connection: {e}")
 
-def init_db_tables():
-    """Initialize database tables if they don't exist"""
-    db_conn = get_db_connection()
-    if not db_conn.connection:
-        return False
+class ConnectionPoolRegistry:
+    """Registry of connection pools keyed by a hash of the db_config"""
     
-    try:
-        # Users table
-        db_conn.execute("""
-            CREATE TABLE IF NOT EXISTS Users (
-                user_id INT AUTO_INCREMENT PRIMARY KEY,
-                username VARCHAR(50) UNIQUE NOT NULL,
-                email VARCHAR(100) UNIQUE NOT NULL,
-                password_hash VARCHAR(255) NOT NULL,
-                first_name VARCHAR(50) NOT NULL,
-                last_name VARCHAR(50) NOT NULL,
-                date_created DATETIME DEFAULT CURRENT_TIMESTAMP,
-                last_login DATETIME,
-                is_active BOOLEAN DEFAULT TRUE
-            )
-        """)
+    def __init__(self, pool_size=5, max_pools=8, wait_timeout=5.0, idle_timeout=1800):
+        self.pool_size = pool_size
+        self.max_pools = max_pools
+        self.wait_timeout = wait_timeout
+        self.idle_timeout = idle_timeout
+        self._pools = OrderedDict()  # key -> {'pool': ..., 'last_used': ...}, LRU order
+        self._lock = threading.Lock()
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'exhaustions': 0,
+            'pools_created': 0,
+            'pools_evicted': 0
+        }
+    
+    @staticmethod
+    def config_key(config):
+        """Stable hash of connection credentials"""
+        normalized = {
+            'host': config.get('host', 'localhost'),
+            'user': config.get('user'),
+            'password': config.get('password'),
+            'database': config.get('database'),
+            'port': int(config.get('port', 3306))
+        }
+        return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode('utf-8')).hexdigest()
+    
+    def _evict_locked(self, key):
+        """Drop a pool and close its idle connections (caller holds the lock)"""
+        entry = self._pools.pop(key, None)
+        if entry is None:
+            return
+        self._stats['pools_evicted'] += 1
+        # Checked-out connections still reference the pool and are closed on return
+        entry['pool'].close()
+    
+    def get_pool(self, config):
+        """Get or create the pool for these credentials"""
+        key = self.config_key(config)
         
-        # Categories table
-        db_conn.execute("""
-            CREATE TABLE IF NOT EXISTS Categories (
-                category_id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL,
-                name VARCHAR(100) NOT NULL,
-                type ENUM('income', 'expense') NOT NULL,
-                parent_id INT DEFAULT NULL,
-                is_active BOOLEAN DEFAULT TRUE,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE,
-                FOREIGN KEY (parent_id) REFERENCES Categories(category_id) ON DELETE SET NULL
-            )
-        """)
+        with self._lock:
+            pool = self._touch_locked(key)
+            if pool is not None:
+                return pool
         
-        # Accounts table
-        db_conn.execute("""
-            CREATE TABLE IF NOT EXISTS Accounts (
-                account_id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL,
-                account_name VARCHAR(100) NOT NULL,
-                account_type ENUM('checking', 'savings', 'credit_card', 'investment', 'loan', 'other') NOT NULL,
-                balance DECIMAL(12, 2) DEFAULT 0.00,
-                currency VARCHAR(3) DEFAULT 'USD',
-                institution VARCHAR(100),
-                account_number VARCHAR(50),
-                is_active BOOLEAN DEFAULT TRUE,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE
-            )
-        """)
+        # Built outside the lock and published after a re-check; connections are opened
+        # lazily on checkout, so a slow host never blocks other databases' checkouts
+        pool = ConnectionPool(config, self.pool_size)
         
-        # Transactions table
-        db_conn.execute("""
-            CREATE TABLE IF NOT EXISTS Transactions (
-                transaction_id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL,
-                account_id INT NOT NULL,
-                category_id INT,
-                transaction_date DATE NOT NULL,
-                amount DECIMAL(12, 2) NOT NULL,
-                transaction_type ENUM('income', 'expense', 'transfer') NOT NULL,
-                description TEXT,
-                reference_number VARCHAR(100),
-                is_recurring BOOLEAN DEFAULT FALSE,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE,
-                FOREIGN KEY (account_id) REFERENCES Accounts(account_id) ON DELETE CASCADE,
-                FOREIGN KEY (category_id) REFERENCES Categories(category_id) ON DELETE SET NULL
-            )
-        """)
+        with self._lock:
+            existing = self._touch_locked(key)
+            if existing is None:
+                self._pools[key] = {'pool': pool, 'last_used': time.monotonic()}
+                self._stats['pools_created'] += 1
+                while len(self._pools) > self.max_pools:
+                    self._evict_locked(next(iter(self._pools)))
+                return pool
         
-        # Transaction Splits table
-        db_conn.execute("""
-            CREATE TABLE IF NOT EXISTS TransactionSplits (
-                split_id INT AUTO_INCREMENT PRIMARY KEY,
-                transaction_id INT NOT NULL,
-                category_id INT NOT NULL,
-                amount DECIMAL(12, 2) NOT NULL,
-                description TEXT,
-                FOREIGN KEY (transaction_id) REFERENCES Transactions(transaction_id) ON DELETE CASCADE,
-                FOREIGN KEY (category_id) REFERENCES Categories(category_id) ON DELETE CASCADE
-            )
-        """)
+        # Another request published a pool for these credentials first
+        pool.close()
+        return existing
+    
+    def _touch_locked(self, key):
+        """Evict idle pools and return the pool for key, marked as used, or None (caller holds the lock)"""
+        now = time.monotonic()
+        # Evict pools nobody has used for a while
+        for stale_key in [k for k, e in self._pools.items()
+                          if k != key and now - e['last_used'] > self.idle_timeout]:
+            self._evict_locked(stale_key)
         
-        # Budgets table
-        db_conn.execute("""
-            CREATE TABLE IF NOT EXISTS Budgets (
-                budget_id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL,
-                category_id INT NOT NULL,
-                budget_amount DECIMAL(12, 2) NOT NULL,
-                period_type ENUM('monthly', 'quarterly', 'yearly') NOT NULL,
-                start_date DATE NOT NULL,
-                end_date DATE,
-                is_active BOOLEAN DEFAULT TRUE,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE,
-                FOREIGN KEY (category_id) REFERENCES Categories(category_id) ON DELETE CASCADE
-            )
-        """)
+        entry = self._pools.get(key)
+        if entry is None:
+            return None
+        entry['last_used'] = now
+        self._pools.move_to_end(key)
+        return entry['pool']
+    
+    def checkout(self, config):
+        """Check out a validated pooled connection, waiting up to wait_timeout if the pool is exhausted"""
+        pool = self.get_pool(config)
+        try:
+            connection, waited = pool.acquire(self.wait_timeout)
+        except mysql.connector.errors.PoolError:
+            with self._lock:
+                self._stats['waits'] += 1
+                self._stats['exhaustions'] += 1
+            raise
         
-        # Financial Goals table
-        db_conn.execute("""
-            CREATE TABLE IF NOT EXISTS FinancialGoals (
-                goal_id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL,
-                goal_name VARCHAR(200) NOT NULL,
-                goal_type ENUM('savings', 'debt_payment', 'investment', 'other') NOT NULL,
-                target_amount DECIMAL(12, 2) NOT NULL,
-                current_amount DECIMAL(12, 2) DEFAULT 0.00,
-                target_date DATE,
-                description TEXT,
-                is_achieved BOOLEAN DEFAULT FALSE,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE
-            )
-        """)
+        with self._lock:
+            self._stats['checkouts'] += 1
+            if waited:
+                self._stats['waits'] += 1
         
-        db_conn.commit()
-        print("All tables created successfully")
-        return True
+        if not connection_validator.validate(connection):
+            connection.discard()
+            raise mysql.connector.errors.InterfaceError("Pooled connection failed validation")
+        return connection
+    
+    def stats(self):
+        """Snapshot of pool statistics"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pools'] = len(self._pools)
+            stats['pool_size'] = self.pool_size
+            stats['max_pools'] = self.max_pools
+        return stats
+
+class ConnectionValidator:
+    """Ping connections at checkout only when they have been idle longer than idle_threshold"""
+    
+    def __init__(self, idle_threshold=30.0):
+        self.idle_threshold = idle_threshold
+        self._last_used = weakref.WeakKeyDictionary()  # raw connection -> monotonic time
+        self._lock = threading.Lock()
+        self._stats = {
+            'pings_performed': 0,
+            'pings_avoided': 0,
+            'reconnects': 0
+        }
+    
+    @staticmethod
+    def _raw(connection):
+        # Pooled connections wrap the real connection, which outlives each checkout
+        return getattr(connection, '_cnx', connection)
+    
+    def touch(self, connection):
+        """Record that the connection just did a round trip"""
+        if connection is None:
+            return
+        with self._lock:
+            self._last_used[self._raw(connection)] = time.monotonic()
+    
+    def validate(self, connection):
+        """Ping the connection if it has been idle too long; return False if it is unusable"""
+        with self._lock:
+            last_used = self._last_used.get(self._raw(connection))
+            if last_used is not None and time.monotonic() - last_used < self.idle_threshold:
+                self._stats['pings_avoided'] += 1
+                return True
+            self._stats['pings_performed'] += 1
         
+        try:
+            connection.ping(reconnect=True)
+        except mysql.connector.Error as err:
+            print(f"Connection validation failed: {err}")
+            return False
+        self.touch(connection)
+        return True
+    
+    def record_reconnect(self):
+        with self._lock:
+            self._stats['reconnects'] += 1
+    
+    def stats(self):
+        """Snapshot of validation statistics"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['ping_idle_threshold'] = self.idle_threshold
+        return stats
+
+connection_validator = ConnectionValidator(
+    idle_threshold=float(os.environ.get('DB_PING_IDLE_THRESHOLD', 30.0))
+)
+
+# Global pool registry
+pool_registry = ConnectionPoolRegistry(
+    pool_size=int(os.environ.get('DB_POOL_SIZE', 5)),
+    max_pools=int(os.environ.get('DB_MAX_POOLS', 8)),
+    wait_timeout=float(os.environ.get('DB_POOL_WAIT_TIMEOUT', 5.0)),
+    idle_timeout=float(os.environ.get('DB_POOL_IDLE_TIMEOUT', 1800))
+)
+
+def _current_db_config():
+    # CLI jobs set g.db_config; requests use the credentials stored at /connect
+    if not has_app_context():
+        return None
+    config = g.get('db_config')
+    if config is None and has_request_context():
+        config = session.get('db_config')
+    return config
+
+def current_database_key():
+    """Identity of the database this request or job works against, for keying shared caches"""
+    config = _current_db_config()
+    return database_key(config) if config is not None else None
+
+def get_db_connection():
+    """Get the request's pooled database connection, checking one out on first use"""
+    db = g.get('db')
+    if db is not None and db.connection:
+        return db
+    
+    config = _current_db_config()
+    if config is None:
+        return SimpleDBConnection()
+    
+    try:
+        db = SimpleDBConnection(pool_registry.checkout(config))
+    except mysql.connector.Error as err:
+        print(f"Database connection error: {err}")
+        return SimpleDBConnection()
+    
+    g.db = db
+    return db
+
+def db_config_from_env():
+    """Database credentials for CLI jobs, from DB_HOST/DB_USER/DB_PASSWORD/DB_NAME/DB_PORT"""
+    return {
+        'host': os.environ.get('DB_HOST', 'localhost'),
+        'user': os.environ.get('DB_USER'),
+        'password': os.environ.get('DB_PASSWORD'),
+        'database': os.environ.get('DB_NAME', 'personal_finance_db'),
+        'port': int(os.environ.get('DB_PORT', 3306))
+    }
+
+def close_db_connection(error=None):
+    """Return the request's connection to its pool (registered as a teardown handler)"""
+    db = g.pop('db', None)
+    if db is None or not db.connection:
+        return
+    
+    try:
+        if error is not None:
+            db.rollback()
     except mysql.connector.Error as err:
-        print(f"Error creating tables: {err}")
-        db_conn.rollback()
-        return False
\ No newline at end of file
+        print(f"Error rolling back on teardown: {err}")
+    finally:
+        db.close()
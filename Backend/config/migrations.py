@@ -0,0 +1,143 @@
+import mysql.connector
+import hashlib
+import os
+import re
+import threading
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+MIGRATION_FILE_PATTERN = re.compile(r'^(\d+)_([\w-]+)\.sql$')
+
+_migrations = None
+_verified = {}  # database key -> fingerprint already known to be applied
+_lock = threading.Lock()
+
+# Server-side lock shared by every process migrating this server (workers, CLI jobs)
+MIGRATION_LOCK_NAME = 'schema_migrations'
+MIGRATION_LOCK_TIMEOUT = int(os.environ.get('MIGRATION_LOCK_TIMEOUT', 300))
+
+# Earlier texts of files edited without changing the schema they produce (0002-0009 gained
+# information_schema guards, 0012 a comment). Any other checksum mismatch stops the run.
+SUPERSEDED_CHECKSUMS = {
+    2: {'994707690ceb0a7254208e2aa7c99f60788c39d3f1f7e1d27c1420ca733c37c8'},
+    3: {'9b20ceebaec1338358d987c17cee35cce78fb9eee3f06cd2a84b4751cb2c6a69'},
+    4: {'2cecccfd9cb40485547e7c9cf5d665046ff40163bc2140ea125abf56d45d91b9'},
+    5: {'5a83a5fd19cc052d7dc01d4b03349462c126622a583c71e3dc187ef06b09ba2e'},
+    6: {'2c6adafe03b5fbf1aaaa020a151df0aee7597b98d377ba62bcb1658fafc5a378'},
+    7: {'adfc43e57afa51f31d0d0ea4edf3338cd2ab80f04e8ec52d8a4543f5f74770df'},
+    8: {'a631d48678f056188ab35698cda3714fb40ec654bc384816f6f85af99428656d'},
+    9: {'51187ebca96974f6a89e210aff7d86e41f71897252d2272eb6a0b19da974b360'},
+    12: {'9fc013c69cd19dc07743cb326d0ec7444503cd02eb653a5f87f737bffdde95ad'},
+}
+
+def load_migrations():
+    """Load ordered migration files from the migrations directory (cached)"""
+    global _migrations
+    if _migrations is not None:
+        return _migrations
+    
+    migrations = []
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = MIGRATION_FILE_PATTERN.match(filename)
+        if not match:
+            continue
+        with open(os.path.join(MIGRATIONS_DIR, filename), encoding='utf-8') as f:
+            sql = f.read()
+        migrations.append({
+            'version': int(match.group(1)),
+            'name': match.group(2),
+            'sql': sql,
+            'checksum': hashlib.sha256(sql.encode('utf-8')).hexdigest()
+        })
+    
+    migrations.sort(key=lambda m: m['version'])
+    _migrations = migrations
+    return _migrations
+
+def schema_fingerprint(migrations=None):
+    """Fingerprint of the full set of migrations shipped with the code"""
+    migrations = migrations if migrations is not None else load_migrations()
+    digest = hashlib.sha256()
+    for migration in migrations:
+        digest.update(f"{migration['version']}:{migration['checksum']};".encode('utf-8'))
+    return digest.hexdigest()
+
+def database_key(config):
+    """Identify a database independently of the credentials used to reach it"""
+    return f"{config.get('host', 'localhost')}:{int(config.get('port', 3306))}/{config.get('database')}"
+
+def split_statements(sql):
+    """Split a migration file into statements (migrations don't define procedures)"""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith('--')]
+    return [stmt.strip() for stmt in '\n'.join(lines).split(';') if stmt.strip()]
+
+def run_migrations(db_conn, config):
+    """Bring the database schema up to date, skipping all SQL once it is known to be current"""
+    migrations = load_migrations()
+    fingerprint = schema_fingerprint(migrations)
+    key = database_key(config)
+    
+    if _verified.get(key) == fingerprint:
+        return {'applied': [], 'version': migrations[-1]['version'] if migrations else 0, 'cached': True}
+    
+    with _lock:
+        if _verified.get(key) == fingerprint:
+            return {'applied': [], 'version': migrations[-1]['version'] if migrations else 0, 'cached': True}
+        
+        # The threading lock only covers this process; GET_LOCK serializes other workers too
+        db_conn.execute("SELECT GET_LOCK(%s, %s) AS acquired", (MIGRATION_LOCK_NAME, MIGRATION_LOCK_TIMEOUT))
+        if db_conn.fetchone()['acquired'] != 1:
+            raise RuntimeError(f"Timed out waiting for the '{MIGRATION_LOCK_NAME}' lock held by another migration run")
+        try:
+            newly_applied = _apply_pending(db_conn, migrations)
+        finally:
+            db_conn.execute("SELECT RELEASE_LOCK(%s) AS released", (MIGRATION_LOCK_NAME,))
+            db_conn.fetchall()
+        
+        _verified[key] = fingerprint
+        return {'applied': newly_applied, 'version': migrations[-1]['version'] if migrations else 0, 'cached': False}
+
+def _apply_pending(db_conn, migrations):
+    """Apply every migration not yet recorded in schema_version; caller holds the migration lock"""
+    db_conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INT PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            checksum CHAR(64) NOT NULL,
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    db_conn.execute("SELECT version, checksum FROM schema_version")
+    applied = {row['version']: row['checksum'] for row in db_conn.fetchall()}
+    
+    newly_applied = []
+    for migration in migrations:
+        version = migration['version']
+        if version in applied:
+            stored = applied[version]
+            if stored != migration['checksum'] and stored not in SUPERSEDED_CHECKSUMS.get(version, ()):
+                raise RuntimeError(
+                    f"Migration {version}_{migration['name']} changed after it was applied "
+                    f"(recorded {stored[:12]}, file {migration['checksum'][:12]}); restore the file "
+                    "and put the change in a new numbered migration"
+                )
+            continue
+        
+        print(f"Applying migration {version}_{migration['name']}")
+        try:
+            for statement in split_statements(migration['sql']):
+                db_conn.execute(statement)
+            db_conn.execute(
+                "INSERT INTO schema_version (version, name, checksum) VALUES (%s, %s, %s)",
+                (version, migration['name'], migration['checksum'])
+            )
+            db_conn.commit()
+        except mysql.connector.Error as err:
+            # DDL commits implicitly, so this only undoes the migration's pending data
+            # statements. Every DDL statement checks information_schema first, so the
+            # next run re-applies the whole file and skips what already exists.
+            print(f"Error applying migration {version}_{migration['name']}: {err}")
+            db_conn.rollback()
+            raise err
+        newly_applied.append(version)
+    
+    return newly_applied
@@ -0,0 +1,33 @@
+-- Composite indexes for the per-user lookups run on every page load
+
+-- Account.get_by_user_id / Account.get_total_balance
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.STATISTICS
+                 WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Accounts' AND INDEX_NAME = 'idx_accounts_user_active') = 0,
+               'CREATE INDEX idx_accounts_user_active ON Accounts (user_id, is_active)', 'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- Category.get_by_user_id
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.STATISTICS
+                 WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Categories' AND INDEX_NAME = 'idx_categories_user_type') = 0,
+               'CREATE INDEX idx_categories_user_type ON Categories (user_id, type, is_active)', 'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- Budget.get_budget_performance / GET /api/budgets
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.STATISTICS
+                 WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Budgets' AND INDEX_NAME = 'idx_budgets_user_active') = 0,
+               'CREATE INDEX idx_budgets_user_active ON Budgets (user_id, is_active, period_type)', 'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- FinancialGoal.get_by_user_id
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.STATISTICS
+                 WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'FinancialGoals' AND INDEX_NAME = 'idx_goals_user_achieved') = 0,
+               'CREATE INDEX idx_goals_user_achieved ON FinancialGoals (user_id, is_achieved, target_date)', 'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
@@ -0,0 +1,65 @@
+-- Denormalize user_id onto every transaction and add composite indexes for the
+-- per-user date-range queries (summaries, recent transactions, reports).
+-- Databases created from Database/DatabaseScript.sql have no Transactions.user_id,
+-- so the column is added conditionally and backfilled from Accounts.
+
+SET @has_user_id = (SELECT COUNT(*) FROM information_schema.COLUMNS
+                    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Transactions' AND COLUMN_NAME = 'user_id');
+SET @ddl = IF(@has_user_id = 0, 'ALTER TABLE Transactions ADD COLUMN user_id INT NULL AFTER transaction_id', 'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- Columns the Transaction model reads and writes but the initial schema lacked
+SET @has_time = (SELECT COUNT(*) FROM information_schema.COLUMNS
+                 WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Transactions' AND COLUMN_NAME = 'transaction_time');
+SET @ddl = IF(@has_time = 0, 'ALTER TABLE Transactions ADD COLUMN transaction_time TIME DEFAULT ''12:00:00'' AFTER transaction_date', 'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @has_status = (SELECT COUNT(*) FROM information_schema.COLUMNS
+                   WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Transactions' AND COLUMN_NAME = 'status');
+SET @ddl = IF(@has_status = 0, 'ALTER TABLE Transactions ADD COLUMN status ENUM(''pending'', ''completed'', ''cancelled'') DEFAULT ''completed''', 'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @has_notes = (SELECT COUNT(*) FROM information_schema.COLUMNS
+                  WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Transactions' AND COLUMN_NAME = 'notes');
+SET @ddl = IF(@has_notes = 0, 'ALTER TABLE Transactions ADD COLUMN notes TEXT', 'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- Backfill / repair user_id from the owning account
+UPDATE Transactions t
+JOIN Accounts a ON t.account_id = a.account_id
+SET t.user_id = a.user_id
+WHERE t.user_id IS NULL OR t.user_id <> a.user_id;
+
+ALTER TABLE Transactions MODIFY user_id INT NOT NULL;
+
+-- Summaries, category spending, monthly/yearly reports: covering range scan per user
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.STATISTICS
+                 WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Transactions' AND INDEX_NAME = 'idx_txn_user_date_cover') = 0,
+               'CREATE INDEX idx_txn_user_date_cover ON Transactions (user_id, transaction_date, transaction_type, category_id, amount)', 'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- Recent transactions / listing order
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.STATISTICS
+                 WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Transactions' AND INDEX_NAME = 'idx_txn_user_date_created') = 0,
+               'CREATE INDEX idx_txn_user_date_created ON Transactions (user_id, transaction_date, created_at, transaction_id)', 'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- Account-filtered listings
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.STATISTICS
+                 WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Transactions' AND INDEX_NAME = 'idx_txn_user_account_date') = 0,
+               'CREATE INDEX idx_txn_user_account_date ON Transactions (user_id, account_id, transaction_date)', 'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
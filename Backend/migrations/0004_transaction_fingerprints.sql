@@ -0,0 +1,23 @@
+-- Duplicate detection for statement imports: a hash over account, date, amount,
+-- type and description (lower-cased, whitespace removed). Kept in sync with
+-- Transaction.compute_fingerprint / Transaction.FINGERPRINT_SQL.
+
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.COLUMNS
+                 WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Transactions' AND COLUMN_NAME = 'fingerprint') = 0,
+               'ALTER TABLE Transactions ADD COLUMN fingerprint CHAR(40) NULL', 'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+UPDATE Transactions
+SET fingerprint = SHA1(CONCAT_WS('|', account_id, transaction_date, amount, transaction_type,
+    LOWER(REPLACE(REPLACE(REPLACE(REPLACE(COALESCE(description, ''), ' ', ''), CHAR(9), ''), CHAR(13), ''), CHAR(10), ''))))
+WHERE fingerprint IS NULL;
+
+-- Not unique: two identical coffees on the same day are legitimate
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.STATISTICS
+                 WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Transactions' AND INDEX_NAME = 'idx_txn_user_fingerprint') = 0,
+               'CREATE INDEX idx_txn_user_fingerprint ON Transactions (user_id, fingerprint)', 'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
@@ -0,0 +1,10 @@
+-- Merchant/text search for GET /api/transactions/search (Transaction.search).
+-- The first FULLTEXT index on an InnoDB table adds the hidden FTS_DOC_ID column,
+-- which rebuilds the table once.
+
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.STATISTICS
+                 WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Transactions' AND INDEX_NAME = 'ft_txn_description_notes') = 0,
+               'CREATE FULLTEXT INDEX ft_txn_description_notes ON Transactions (description, notes)', 'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
@@ -0,0 +1,9 @@
+-- Split-aware category aggregation joins TransactionSplits on transaction_id and
+-- reads category_id/amount; this covers the join without touching the rows.
+
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.STATISTICS
+                 WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'TransactionSplits' AND INDEX_NAME = 'idx_splits_txn_category') = 0,
+               'CREATE INDEX idx_splits_txn_category ON TransactionSplits (transaction_id, category_id, amount)', 'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
@@ -0,0 +1,49 @@
+-- Recurring transaction rules (models/recurring_schedule.py). next_due_date is the
+-- first occurrence not yet written to Transactions; the materialize-recurring job
+-- only reads schedules with next_due_date <= today through idx_schedules_due.
+
+CREATE TABLE IF NOT EXISTS RecurringSchedules (
+    schedule_id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    account_id INT NOT NULL,
+    category_id INT,
+    amount DECIMAL(12, 2) NOT NULL,
+    transaction_type ENUM('income', 'expense', 'transfer') NOT NULL,
+    description TEXT,
+    frequency ENUM('daily', 'weekly', 'biweekly', 'monthly', 'yearly') NOT NULL,
+    start_date DATE NOT NULL,
+    end_date DATE,
+    next_due_date DATE,
+    is_active BOOLEAN DEFAULT TRUE,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE,
+    FOREIGN KEY (account_id) REFERENCES Accounts(account_id) ON DELETE CASCADE,
+    FOREIGN KEY (category_id) REFERENCES Categories(category_id) ON DELETE SET NULL,
+    INDEX idx_schedules_due (is_active, next_due_date),
+    INDEX idx_schedules_user_due (user_id, is_active, next_due_date)
+);
+
+-- Occurrences written by the job point back at their schedule
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.COLUMNS
+                 WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Transactions' AND COLUMN_NAME = 'recurring_schedule_id') = 0,
+               'ALTER TABLE Transactions ADD COLUMN recurring_schedule_id INT NULL', 'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.TABLE_CONSTRAINTS
+                 WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Transactions'
+                   AND CONSTRAINT_NAME = 'fk_txn_recurring_schedule') = 0,
+               'ALTER TABLE Transactions ADD CONSTRAINT fk_txn_recurring_schedule FOREIGN KEY (recurring_schedule_id) REFERENCES RecurringSchedules(schedule_id) ON DELETE SET NULL',
+               'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.STATISTICS
+                 WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Transactions' AND INDEX_NAME = 'idx_txn_schedule_date') = 0,
+               'CREATE INDEX idx_txn_schedule_date ON Transactions (recurring_schedule_id, transaction_date)', 'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
@@ -0,0 +1,20 @@
+-- End-of-day account balances written by the snapshot-balances job. Balance at a
+-- date is the nearest snapshot plus the transactions in between
+-- (Account.get_balance_at); backdated writes adjust later snapshots in place.
+
+CREATE TABLE IF NOT EXISTS AccountBalanceSnapshots (
+    account_id INT NOT NULL,
+    snapshot_date DATE NOT NULL,
+    balance DECIMAL(12, 2) NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (account_id, snapshot_date),
+    FOREIGN KEY (account_id) REFERENCES Accounts(account_id) ON DELETE CASCADE
+);
+
+-- Roll-forward/back sums read one account's transactions between two dates
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.STATISTICS
+                 WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Transactions' AND INDEX_NAME = 'idx_txn_account_date') = 0,
+               'CREATE INDEX idx_txn_account_date ON Transactions (account_id, transaction_date)', 'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
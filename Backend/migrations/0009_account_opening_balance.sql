@@ -0,0 +1,20 @@
+-- Opening balance: the part of Accounts.balance not explained by transactions, so
+-- balance = opening_balance + sum of signed transaction amounts and drift can be
+-- detected (reconcile-balances). Backfilled from the current balances.
+
+SET @ddl = IF((SELECT COUNT(*) FROM information_schema.COLUMNS
+                 WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Accounts' AND COLUMN_NAME = 'opening_balance') = 0,
+               'ALTER TABLE Accounts ADD COLUMN opening_balance DECIMAL(12, 2) NOT NULL DEFAULT 0.00', 'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+UPDATE Accounts a
+LEFT JOIN (
+    SELECT account_id,
+           SUM(CASE WHEN transaction_type = 'income' THEN ABS(amount)
+                    WHEN transaction_type = 'expense' THEN -ABS(amount) ELSE 0 END) as total
+    FROM Transactions
+    GROUP BY account_id
+) l ON l.account_id = a.account_id
+SET a.opening_balance = a.balance - COALESCE(l.total, 0);
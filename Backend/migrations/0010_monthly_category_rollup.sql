@@ -0,0 +1,29 @@
+-- Report rollup: one row per user, month, transaction type and category (split-aware;
+-- uncategorized = 0). Maintained by models/monthly_rollup.py in the same database
+-- transaction as every transaction write; rebuild with `flask --app app rebuild-rollups`.
+
+CREATE TABLE IF NOT EXISTS MonthlyCategoryRollup (
+    user_id INT NOT NULL,
+    period_month DATE NOT NULL,
+    transaction_type ENUM('income', 'expense', 'transfer') NOT NULL,
+    category_id INT NOT NULL DEFAULT 0,
+    total_amount DECIMAL(14, 2) NOT NULL DEFAULT 0.00,
+    transaction_count INT NOT NULL DEFAULT 0,
+    min_amount DECIMAL(12, 2),
+    max_amount DECIMAL(12, 2),
+    PRIMARY KEY (user_id, period_month, transaction_type, category_id),
+    FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE
+);
+
+INSERT INTO MonthlyCategoryRollup (user_id, period_month, transaction_type, category_id,
+                                   total_amount, transaction_count, min_amount, max_amount)
+SELECT t.user_id,
+       DATE_SUB(t.transaction_date, INTERVAL DAYOFMONTH(t.transaction_date) - 1 DAY),
+       t.transaction_type,
+       COALESCE(s.category_id, t.category_id, 0),
+       SUM(COALESCE(s.amount, t.amount)), COUNT(*),
+       MIN(COALESCE(s.amount, t.amount)), MAX(COALESCE(s.amount, t.amount))
+FROM Transactions t
+LEFT JOIN TransactionSplits s ON s.transaction_id = t.transaction_id
+GROUP BY t.user_id, DATE_SUB(t.transaction_date, INTERVAL DAYOFMONTH(t.transaction_date) - 1 DAY),
+         t.transaction_type, COALESCE(s.category_id, t.category_id, 0);
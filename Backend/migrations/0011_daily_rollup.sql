@@ -0,0 +1,22 @@
+-- Daily rollup: one row per user and day with income/expense totals, for the daily
+-- report and cashflow. Maintained by models/daily_rollup.py with signed deltas in the
+-- same database transaction as every transaction write; rebuild with
+-- `flask --app app rebuild-rollups`.
+
+CREATE TABLE IF NOT EXISTS DailyRollup (
+    user_id INT NOT NULL,
+    day DATE NOT NULL,
+    income_total DECIMAL(14, 2) NOT NULL DEFAULT 0.00,
+    expense_total DECIMAL(14, 2) NOT NULL DEFAULT 0.00,
+    transaction_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, day),
+    FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE
+);
+
+INSERT INTO DailyRollup (user_id, day, income_total, expense_total, transaction_count)
+SELECT user_id, transaction_date,
+       SUM(CASE WHEN transaction_type = 'income' THEN amount ELSE 0 END),
+       SUM(CASE WHEN transaction_type = 'expense' THEN amount ELSE 0 END),
+       COUNT(*)
+FROM Transactions
+GROUP BY user_id, transaction_date;
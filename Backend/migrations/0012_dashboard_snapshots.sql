@@ -0,0 +1,19 @@
+-- Per-user dashboard snapshot: month-to-date totals, recent transactions, top expense
+-- categories and budget utilisation (JSON text), read by /api/dashboard/summary with
+-- one primary-key lookup. Rebuilt by models/dashboard_snapshot.py right after every
+-- transaction write commits; missing or stale rows (from an earlier day) are rebuilt
+-- on read, so no initial fill is needed.
+
+CREATE TABLE IF NOT EXISTS DashboardSnapshots (
+    user_id INT PRIMARY KEY,
+    snapshot_date DATE NOT NULL,
+    period_month DATE NOT NULL,
+    total_income DECIMAL(14, 2) NOT NULL DEFAULT 0.00,
+    total_expenses DECIMAL(14, 2) NOT NULL DEFAULT 0.00,
+    transaction_count INT NOT NULL DEFAULT 0,
+    recent_transactions MEDIUMTEXT NOT NULL,
+    top_categories TEXT NOT NULL,
+    budget_utilization TEXT NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE
+);
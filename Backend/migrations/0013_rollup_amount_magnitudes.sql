@@ -0,0 +1,32 @@
+-- Rollups now hold amount magnitudes (ABS), like the ledger's signed balance deltas:
+-- transaction_type alone says whether a row is income or expense, so an expense
+-- stored as a negative amount no longer counts as negative spend. Rebuilds both
+-- rollups from Transactions and drops the dashboard snapshots, which are recomputed
+-- from the rollups on their next read.
+
+DELETE FROM MonthlyCategoryRollup;
+
+INSERT INTO MonthlyCategoryRollup (user_id, period_month, transaction_type, category_id,
+                                   total_amount, transaction_count, min_amount, max_amount)
+SELECT t.user_id,
+       DATE_SUB(t.transaction_date, INTERVAL DAYOFMONTH(t.transaction_date) - 1 DAY),
+       t.transaction_type,
+       COALESCE(s.category_id, t.category_id, 0),
+       SUM(ABS(COALESCE(s.amount, t.amount))), COUNT(*),
+       MIN(ABS(COALESCE(s.amount, t.amount))), MAX(ABS(COALESCE(s.amount, t.amount)))
+FROM Transactions t
+LEFT JOIN TransactionSplits s ON s.transaction_id = t.transaction_id
+GROUP BY t.user_id, DATE_SUB(t.transaction_date, INTERVAL DAYOFMONTH(t.transaction_date) - 1 DAY),
+         t.transaction_type, COALESCE(s.category_id, t.category_id, 0);
+
+DELETE FROM DailyRollup;
+
+INSERT INTO DailyRollup (user_id, day, income_total, expense_total, transaction_count)
+SELECT user_id, transaction_date,
+       SUM(CASE WHEN transaction_type = 'income' THEN ABS(amount) ELSE 0 END),
+       SUM(CASE WHEN transaction_type = 'expense' THEN ABS(amount) ELSE 0 END),
+       COUNT(*)
+FROM Transactions
+GROUP BY user_id, transaction_date;
+
+DELETE FROM DashboardSnapshots;
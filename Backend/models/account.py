@@ -1,9 +1,17 @@
-from datetime import datetime
+from datetime import datetime, date, timedelta
+from decimal import Decimal
 from config.db import get_db_connection
+from models.dashboard_snapshot import DashboardSnapshot
 
 class Account:
     """Account model using mysql.connector"""
     
+    # Effect of a transaction row on its account's balance (income adds, expense subtracts)
+    SIGNED_AMOUNT_SQL = (
+        "CASE WHEN {p}transaction_type = 'income' THEN ABS({p}amount) "
+        "WHEN {p}transaction_type = 'expense' THEN -ABS({p}amount) ELSE 0 END"
+    )
+    
     def __init__(self, account_id=None, user_id=None, account_name=None, 
                  account_type=None, balance=0.00, currency='USD', 
                  institution=None, account_number=None, is_active=True,
@@ -19,6 +27,8 @@ class Account:
         self.is_active = is_active
         self.created_at = created_at
         self.updated_at = updated_at
+        # Balance as loaded; save() writes the difference so concurrent ledger updates survive
+        self.loaded_balance = self.balance
     
     def to_dict(self):
         """Convert to dictionary"""
@@ -44,33 +54,44 @@ class Account:
         
         try:
             if self.account_id:
-                # Update existing account
+                # Update existing account; a balance edit is an opening-balance adjustment,
+                # applied as a delta so it does not overwrite concurrent transaction writes
+                adjustment = round(float(self.balance) - float(self.loaded_balance), 2)
                 query = """
                     UPDATE Accounts 
-                    SET account_name=%s, account_type=%s, balance=%s, 
+                    SET account_name=%s, account_type=%s, balance=balance + %s,
+                        opening_balance=opening_balance + %s,
                         currency=%s, institution=%s, account_number=%s, is_active=%s
                     WHERE account_id=%s AND user_id=%s
                 """
                 db.execute(query, (
-                    self.account_name, self.account_type, self.balance,
+                    self.account_name, self.account_type, adjustment, adjustment,
                     self.currency, self.institution, self.account_number, 
                     self.is_active, self.account_id, self.user_id
                 ))
+                if adjustment and db.cursor.rowcount:
+                    db.execute(
+                        "UPDATE AccountBalanceSnapshots SET balance = balance + %s WHERE account_id = %s",
+                        (adjustment, self.account_id)
+                    )
             else:
                 # Insert new account
                 query = """
-                    INSERT INTO Accounts (user_id, account_name, account_type, 
-                                        balance, currency, institution, account_number, is_active)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                    INSERT INTO Accounts (user_id, account_name, account_type, balance,
+                                        opening_balance, currency, institution, account_number, is_active)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
                 """
                 db.execute(query, (
                     self.user_id, self.account_name, self.account_type,
-                    self.balance, self.currency, self.institution, 
+                    self.balance, self.balance, self.currency, self.institution, 
                     self.account_number, self.is_active
                 ))
                 self.account_id = db.cursor.lastrowid
             
             db.commit()
+            self.loaded_balance = self.balance
+            # Recent transactions in the snapshot carry the account name
+            DashboardSnapshot.after_write(self.user_id)
             return True
             
         except Exception as e:
@@ -137,4 +158,155 @@ class Account:
             
         except Exception as e:
             print(f"Error getting total balance: {e}")
-            return 0.00
\ No newline at end of file
+            return 0.00
+    
+    @staticmethod
+    def signed_amount(transaction_type, amount):
+        """Python twin of SIGNED_AMOUNT_SQL"""
+        amount = abs(Decimal(str(amount or 0)))
+        if transaction_type == 'income':
+            return amount
+        if transaction_type == 'expense':
+            return -amount
+        return Decimal('0')
+    
+    @staticmethod
+    def apply_balance_deltas(db, deltas):
+        """Apply {(account_id, transaction_date): delta} to balances and later snapshots; the caller commits"""
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if not deltas:
+            return 0
+        
+        totals = {}
+        for (account_id, _), delta in deltas.items():
+            totals[account_id] = totals.get(account_id, 0) + delta
+        totals = {account_id: delta for account_id, delta in totals.items() if delta}
+        
+        adjusted = 0
+        if totals:
+            cases = ' '.join(['WHEN %s THEN %s'] * len(totals))
+            query = f"""
+                UPDATE Accounts
+                SET balance = balance + CASE account_id {cases} ELSE 0 END
+                WHERE account_id IN ({', '.join(['%s'] * len(totals))})
+            """
+            params = []
+            for account_id, delta in totals.items():
+                params.extend([account_id, delta])
+            params.extend(totals.keys())
+            db.execute(query, params)
+            adjusted = db.cursor.rowcount
+        
+        # A backdated write also changes every snapshot taken on or after its date
+        terms = ' + '.join(['CASE WHEN account_id = %s AND snapshot_date >= %s THEN %s ELSE 0 END'] * len(deltas))
+        conditions = ' OR '.join(['(account_id = %s AND snapshot_date >= %s)'] * len(deltas))
+        term_params = []
+        condition_params = []
+        for (account_id, transaction_date), delta in deltas.items():
+            term_params.extend([account_id, transaction_date, delta])
+            condition_params.extend([account_id, transaction_date])
+        db.execute(
+            f"UPDATE AccountBalanceSnapshots SET balance = balance + {terms} WHERE {conditions}",
+            term_params + condition_params
+        )
+        return adjusted
+    
+    @staticmethod
+    def get_balance_at(account_id, user_id, day):
+        """Balance at the end of `day`: the nearest snapshot plus the transactions in between"""
+        db = get_db_connection()
+        if not db.connection:
+            raise Exception("No database connection")
+        
+        db.execute("SELECT balance FROM Accounts WHERE account_id = %s AND user_id = %s", (account_id, user_id))
+        account = db.fetchone()
+        if not account:
+            return None
+        
+        signed = Account.SIGNED_AMOUNT_SQL.format(p='')
+        db.execute(
+            """SELECT snapshot_date, balance FROM AccountBalanceSnapshots
+               WHERE account_id = %s AND snapshot_date <= %s
+               ORDER BY snapshot_date DESC LIMIT 1""",
+            (account_id, day)
+        )
+        snapshot = db.fetchone()
+        if snapshot:
+            # Roll forward from the snapshot
+            db.execute(
+                f"""SELECT COALESCE(SUM({signed}), 0) as delta FROM Transactions
+                    WHERE account_id = %s AND transaction_date > %s AND transaction_date <= %s""",
+                (account_id, snapshot['snapshot_date'], day)
+            )
+            return float(snapshot['balance'] + db.fetchone()['delta'])
+        
+        # No earlier snapshot: roll back from the first later snapshot, or from the live balance
+        db.execute(
+            """SELECT snapshot_date, balance FROM AccountBalanceSnapshots
+               WHERE account_id = %s AND snapshot_date > %s
+               ORDER BY snapshot_date LIMIT 1""",
+            (account_id, day)
+        )
+        snapshot = db.fetchone()
+        if snapshot:
+            anchor, upper = snapshot['balance'], " AND transaction_date <= %s"
+            params = (account_id, day, snapshot['snapshot_date'])
+        else:
+            anchor, upper = account['balance'], ""
+            params = (account_id, day)
+        db.execute(
+            f"""SELECT COALESCE(SUM({signed}), 0) as delta FROM Transactions
+                WHERE account_id = %s AND transaction_date > %s{upper}""",
+            params
+        )
+        return float(anchor - db.fetchone()['delta'])
+    
+    @staticmethod
+    def get_balance_history(account_id, user_id, start_date, end_date):
+        """Daily end-of-day balances for [start_date, end_date] (inclusive)"""
+        opening = Account.get_balance_at(account_id, user_id, start_date - timedelta(days=1))
+        if opening is None:
+            return None
+        
+        db = get_db_connection()
+        db.execute(
+            f"""SELECT transaction_date, SUM({Account.SIGNED_AMOUNT_SQL.format(p='')}) as delta
+                FROM Transactions
+                WHERE account_id = %s AND transaction_date >= %s AND transaction_date <= %s
+                GROUP BY transaction_date""",
+            (account_id, start_date, end_date)
+        )
+        daily = {row['transaction_date']: float(row['delta']) for row in db.fetchall()}
+        
+        history = []
+        balance = opening
+        day = start_date
+        while day <= end_date:
+            balance = round(balance + daily.get(day, 0), 2)
+            history.append({'date': day.isoformat(), 'balance': balance})
+            day += timedelta(days=1)
+        return history
+    
+    @staticmethod
+    def snapshot_balances(day):
+        """Record every account's end-of-day balance for `day` in one statement"""
+        db = get_db_connection()
+        if not db.connection:
+            raise Exception("No database connection")
+        
+        try:
+            query = f"""
+                INSERT INTO AccountBalanceSnapshots (account_id, snapshot_date, balance)
+                SELECT a.account_id, %s, a.balance - COALESCE(SUM({Account.SIGNED_AMOUNT_SQL.format(p='t.')}), 0)
+                FROM Accounts a
+                LEFT JOIN Transactions t ON t.account_id = a.account_id AND t.transaction_date > %s
+                GROUP BY a.account_id, a.balance
+                ON DUPLICATE KEY UPDATE balance = VALUES(balance)
+            """
+            db.execute(query, (day, day))
+            db.commit()
+            return True
+            
+        except Exception as e:
+            db.rollback()
+            raise e
\ No newline at end of file
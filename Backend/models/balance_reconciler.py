@@ -0,0 +1,140 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from decimal import Decimal
+import threading
+from config.db import SimpleDBConnection, pool_registry
+from config.migrations import database_key
+from models.account import Account
+from utils.report_cache import report_cache
+
+class BalanceReconciler:
+    """Compare stored Accounts.balance with opening_balance + ledger sum, shard by shard in parallel"""
+    
+    REPORT_COLUMNS = ('account_id', 'user_id', 'stored_balance', 'ledger_balance', 'drift', 'fixed')
+    
+    def __init__(self, config, workers=4, shard_size=1000, fix=False, tolerance=Decimal('0.005')):
+        self.config = config
+        # Each worker holds one pooled connection, so never run more than the pool can serve
+        self.workers = max(1, min(workers, pool_registry.pool_size - 1 or 1))
+        self.shard_size = shard_size
+        self.fix = fix
+        self.tolerance = tolerance
+        self.drifts = []
+        self.accounts_checked = 0
+        self.shards_done = 0
+        self._lock = threading.Lock()
+    
+    def shards(self):
+        """Inclusive user_id ranges covering every account"""
+        db = SimpleDBConnection(pool_registry.checkout(self.config))
+        try:
+            db.execute("SELECT MIN(user_id) as low, MAX(user_id) as high FROM Accounts")
+            bounds = db.fetchone()
+        finally:
+            db.close()
+        
+        if bounds['low'] is None:
+            return []
+        return [(low, low + self.shard_size - 1)
+                for low in range(bounds['low'], bounds['high'] + 1, self.shard_size)]
+    
+    def _ledger_query(self, column, condition):
+        """Stored and ledger balance of the accounts whose `column` (user_id/account_id) matches `condition`"""
+        return f"""
+            SELECT a.account_id, a.user_id, a.balance as stored_balance,
+                   a.opening_balance + COALESCE(l.total, 0) as ledger_balance
+            FROM Accounts a
+            LEFT JOIN (
+                SELECT account_id, SUM({Account.SIGNED_AMOUNT_SQL.format(p='')}) as total
+                FROM Transactions
+                WHERE {column} {condition}
+                GROUP BY account_id
+            ) l ON l.account_id = a.account_id
+            WHERE a.{column} {condition}
+        """
+    
+    def reconcile_shard(self, low, high):
+        """One grouped ledger query for the shard's users; optionally fix drifted accounts"""
+        db = SimpleDBConnection(pool_registry.checkout(self.config))
+        try:
+            db.execute(self._ledger_query('user_id', 'BETWEEN %s AND %s'), (low, high, low, high))
+            rows = db.fetchall()
+            drifted = [row for row in rows
+                       if abs(row['stored_balance'] - row['ledger_balance']) > self.tolerance]
+            
+            fixed = set()
+            if self.fix and drifted:
+                fixed = self._fix(db, [row['account_id'] for row in drifted])
+            db.commit()
+            for user_id in {row['user_id'] for row in drifted if row['account_id'] in fixed}:
+                report_cache.bump(user_id, database_key(self.config))
+        except Exception as e:
+            db.rollback()
+            raise e
+        finally:
+            db.close()
+        
+        with self._lock:
+            self.accounts_checked += len(rows)
+            self.shards_done += 1
+            for row in drifted:
+                self.drifts.append({
+                    'account_id': row['account_id'],
+                    'user_id': row['user_id'],
+                    'stored_balance': row['stored_balance'],
+                    'ledger_balance': row['ledger_balance'],
+                    'drift': row['stored_balance'] - row['ledger_balance'],
+                    'fixed': row['account_id'] in fixed
+                })
+        return len(drifted)
+    
+    def _fix(self, db, account_ids):
+        """Reset drifted balances to the ledger value; concurrent writers queue behind the row locks"""
+        placeholders = ', '.join(['%s'] * len(account_ids))
+        # Lock first, then read the ledger: writes still in flight add their delta after we commit
+        db.execute(f"SELECT account_id FROM Accounts WHERE account_id IN ({placeholders}) FOR UPDATE", account_ids)
+        db.fetchall()
+        db.execute(self._ledger_query('account_id', f"IN ({placeholders})"), account_ids + account_ids)
+        rows = [row for row in db.fetchall()
+                if abs(row['stored_balance'] - row['ledger_balance']) > self.tolerance]
+        if not rows:
+            return set()
+        
+        ids = [row['account_id'] for row in rows]
+        cases = ' '.join(['WHEN %s THEN %s'] * len(rows))
+        params = []
+        for row in rows:
+            params.extend([row['account_id'], row['ledger_balance']])
+        db.execute(
+            f"""UPDATE Accounts SET balance = CASE account_id {cases} END
+                WHERE account_id IN ({', '.join(['%s'] * len(ids))})""",
+            params + ids
+        )
+        # Snapshots were derived from the drifted balance; the next snapshot run rebuilds them
+        db.execute(
+            f"DELETE FROM AccountBalanceSnapshots WHERE account_id IN ({', '.join(['%s'] * len(ids))})",
+            ids
+        )
+        return set(ids)
+    
+    def run(self, progress=None):
+        """Reconcile every shard over the worker pool; returns the summary"""
+        shards = self.shards()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(self.reconcile_shard, low, high) for low, high in shards]
+            for done, future in enumerate(as_completed(futures), 1):
+                future.result()
+                if progress:
+                    progress(done, len(shards))
+        
+        self.drifts.sort(key=lambda drift: abs(drift['drift']), reverse=True)
+        return self.summary()
+    
+    def summary(self):
+        """Counts and total absolute drift"""
+        return {
+            'accounts_checked': self.accounts_checked,
+            'shards': self.shards_done,
+            'drifted': len(self.drifts),
+            'fixed': sum(1 for drift in self.drifts if drift['fixed']),
+            'total_drift': sum((abs(drift['drift']) for drift in self.drifts), Decimal('0'))
+        }
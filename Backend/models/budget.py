@@ -1,5 +1,7 @@
 from datetime import datetime, date
 from config.db import get_db_connection
+from models.transaction import Transaction
+from utils.periods import period_range
 
 class Budget:
     """Budget model using mysql.connector"""
@@ -47,34 +49,35 @@ class Budget:
         
         try:
             # Get current month budgets with spending
-            query = """
+            month_start, month_end = period_range('month')
+            # Month spend per category (split-aware) is aggregated once and joined to the budgets
+            query = f"""
                 SELECT 
                     b.budget_id,
                     b.category_id,
                     c.name as category_name,
                     b.budget_amount,
-                    COALESCE(SUM(
-                        CASE 
-                            WHEN t.transaction_type = 'expense' 
-                            AND MONTH(t.transaction_date) = MONTH(CURRENT_DATE())
-                            AND YEAR(t.transaction_date) = YEAR(CURRENT_DATE())
-                            THEN t.amount 
-                            ELSE 0 
-                        END
-                    ), 0) as spent
+                    COALESCE(spend.spent, 0) as spent
                 FROM Budgets b
                 INNER JOIN Categories c ON b.category_id = c.category_id
-                LEFT JOIN Transactions t ON t.category_id = b.category_id 
-                    AND t.user_id = b.user_id
+                LEFT JOIN (
+                    SELECT {Transaction.SPLIT_CATEGORY_SQL} as category_id,
+                           SUM({Transaction.SPLIT_AMOUNT_SQL}) as spent
+                    FROM Transactions t
+                    {Transaction.SPLIT_JOIN_SQL}
+                    WHERE t.user_id = %s
+                        AND t.transaction_date >= %s AND t.transaction_date < %s
+                        AND t.transaction_type = 'expense'
+                    GROUP BY {Transaction.SPLIT_CATEGORY_SQL}
+                ) spend ON spend.category_id = b.category_id
                 WHERE b.user_id = %s 
                     AND b.is_active = TRUE 
                     AND b.period_type = 'monthly'
                     AND (b.end_date IS NULL OR b.end_date >= CURRENT_DATE())
-                GROUP BY b.budget_id, b.category_id, c.name, b.budget_amount
                 ORDER BY c.name
             """
             
-            db.execute(query, (user_id,))
+            db.execute(query, (user_id, month_start, month_end, user_id))
             rows = db.fetchall()
             
             budgets = []
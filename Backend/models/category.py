@@ -1,5 +1,6 @@
 from datetime import datetime
 from config.db import get_db_connection
+from models.dashboard_snapshot import DashboardSnapshot
 
 class Category:
     """Category model using mysql.connector"""
@@ -56,6 +57,8 @@ class Category:
                 self.category_id = db.cursor.lastrowid
             
             db.commit()
+            # The snapshot carries category names
+            DashboardSnapshot.after_write(self.user_id)
             return True
             
         except Exception as e:
@@ -130,17 +133,15 @@ class Category:
                 ('Other Expenses', 'expense')
             ]
             
-            for name, cat_type in default_categories:
-                category = Category(
-                    user_id=user_id,
-                    name=name,
-                    type=cat_type,
-                    is_active=True
-                )
-                category.save()
-            
+            db.executemany(
+                "INSERT INTO Categories (user_id, name, type, is_active) VALUES (%s, %s, %s, TRUE)",
+                [(user_id, name, cat_type) for name, cat_type in default_categories]
+            )
+            db.commit()
+            DashboardSnapshot.after_write(user_id)
             return True
             
         except Exception as e:
+            db.rollback()
             print(f"Error creating default categories: {e}")
             return False
\ No newline at end of file
@@ -0,0 +1,84 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+def _day(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    return value
+
+class DailyRollup:
+    """Per user and day income/expense totals (magnitudes), kept in step with every transaction write by signed deltas"""
+    
+    # Longest window the daily endpoint serves in one response
+    MAX_DAYS = 366 * 5
+    
+    @staticmethod
+    def apply(db, entries, sign=1):
+        """Add (sign=1) or remove (sign=-1) transactions given as (user_id, date, type, category_id, amount[, count]); the caller commits"""
+        buckets = {}
+        for entry in entries:
+            user_id, transaction_date, transaction_type, _, amount = entry[:5]
+            count = entry[5] if len(entry) > 5 else 1
+            amount = abs(Decimal(str(amount or 0))) * sign
+            key = (user_id, _day(transaction_date))
+            income, expense, total = buckets.get(key, (0, 0, 0))
+            if transaction_type == 'income':
+                income += amount
+            elif transaction_type == 'expense':
+                expense += amount
+            buckets[key] = (income, expense, total + count * sign)
+        if not buckets:
+            return 0
+        
+        query = f"""
+            INSERT INTO DailyRollup (user_id, day, income_total, expense_total, transaction_count)
+            VALUES {', '.join(['(%s, %s, %s, %s, %s)'] * len(buckets))}
+            ON DUPLICATE KEY UPDATE
+                income_total = income_total + VALUES(income_total),
+                expense_total = expense_total + VALUES(expense_total),
+                transaction_count = transaction_count + VALUES(transaction_count)
+        """
+        params = []
+        for key, values in buckets.items():
+            params.extend(key + values)
+        db.execute(query, params)
+        
+        if sign < 0:
+            # Days whose last transaction went away drop out of the heatmap
+            emptied = list(buckets)
+            db.execute(
+                f"""DELETE FROM DailyRollup
+                    WHERE transaction_count <= 0 AND (user_id, day) IN ({', '.join(['(%s, %s)'] * len(emptied))})""",
+                [value for key in emptied for value in key]
+            )
+        return len(buckets)
+    
+    @staticmethod
+    def rebuild_user(db, user_id):
+        """Recompute all of a user's days from Transactions; the caller commits"""
+        db.execute("DELETE FROM DailyRollup WHERE user_id = %s", (user_id,))
+        db.execute(
+            """INSERT INTO DailyRollup (user_id, day, income_total, expense_total, transaction_count)
+               SELECT user_id, transaction_date,
+                      SUM(CASE WHEN transaction_type = 'income' THEN ABS(amount) ELSE 0 END),
+                      SUM(CASE WHEN transaction_type = 'expense' THEN ABS(amount) ELSE 0 END),
+                      COUNT(*)
+               FROM Transactions
+               WHERE user_id = %s
+               GROUP BY user_id, transaction_date""",
+            (user_id,)
+        )
+    
+    @staticmethod
+    def get_range(db, user_id, start_date, end_date):
+        """Days with transactions in [start_date, end_date), oldest first, from one primary-key range scan"""
+        db.execute(
+            """SELECT day, income_total, expense_total, transaction_count
+               FROM DailyRollup
+               WHERE user_id = %s AND day >= %s AND day < %s
+               ORDER BY day""",
+            (user_id, start_date, end_date)
+        )
+        return db.fetchall()
@@ -0,0 +1,125 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+import threading
+import time
+from flask import g
+from config.db import get_db_connection, pool_registry
+from models.budget import Budget
+from models.dashboard_snapshot import DashboardSnapshot
+from models.goal import FinancialGoal
+from models.transaction import Transaction
+
+class DashboardBundle:
+    """Every dashboard section computed concurrently, each worker on its own pooled connection"""
+    
+    SECTIONS = ('summary', 'recent_transactions', 'spending_by_category', 'transaction_summary',
+                'budget_performance', 'goals')
+    DEFAULT_TIMEOUT = 5.0
+    MAX_TIMEOUT = 30.0
+    
+    _executor = None
+    _executor_lock = threading.Lock()
+    
+    @staticmethod
+    def executor():
+        """Shared worker pool, one short of the connection pool so plain requests still get a connection"""
+        with DashboardBundle._executor_lock:
+            if DashboardBundle._executor is None:
+                DashboardBundle._executor = ThreadPoolExecutor(
+                    max_workers=max(1, pool_registry.pool_size - 1),
+                    thread_name_prefix='dashboard'
+                )
+            return DashboardBundle._executor
+    
+    @staticmethod
+    def section_calls(user_id, limit=5, period='month', compare='previous', days=None):
+        """Section name -> callable returning the same payload as the section's own endpoint"""
+        def recent_transactions():
+            if 0 < limit <= DashboardSnapshot.RECENT_LIMIT:
+                return {'transactions': DashboardSnapshot.get(user_id)['recent_transactions'][:limit]}
+            return {'transactions': Transaction.get_recent_transactions(user_id, limit=limit)}
+        
+        def goals():
+            items = FinancialGoal.get_by_user_id(user_id, False)
+            return {'goals': items, 'total': len(items)}
+        
+        return {
+            'summary': lambda: DashboardSnapshot.to_summary(DashboardSnapshot.get(user_id)),
+            'recent_transactions': recent_transactions,
+            'spending_by_category': lambda: {'categories': Transaction.get_spending_by_category(user_id, period)},
+            'transaction_summary': lambda: Transaction.get_transaction_summary(user_id, period, compare, days),
+            'budget_performance': lambda: Budget.get_budget_performance(user_id),
+            'goals': goals
+        }
+    
+    @staticmethod
+    def _limit_session(db, remaining_ms):
+        """Have the server abort this worker's SELECTs once the bundle deadline has passed"""
+        # A section left behind at the timeout then releases its pooled connection instead of
+        # running on for as long as its query takes
+        if db.connection:
+            db.execute("SET SESSION MAX_EXECUTION_TIME = %s", (remaining_ms,))
+        return db
+    
+    @staticmethod
+    def _reset_session(db):
+        """Restore the server default before the connection goes back to the pool"""
+        if not db.connection:
+            return
+        try:
+            db.execute("SET SESSION MAX_EXECUTION_TIME = DEFAULT")
+        except Exception as e:
+            # Never hand a time-limited session to the next request
+            print(f"Dropping dashboard connection after failed reset: {e}")
+            db.connection.discard()
+    
+    @staticmethod
+    def run(app, db_config, calls, timeout=DEFAULT_TIMEOUT):
+        """Run the section calls concurrently; sections still running after `timeout` seconds are left out"""
+        submitted = time.monotonic()
+        deadline = submitted + timeout
+        
+        def call(fn):
+            started = time.monotonic()
+            remaining_ms = int((deadline - started) * 1000)
+            if remaining_ms <= 0:
+                raise TimeoutError("Section started after the bundle timeout")
+            # A fresh app context gives the worker its own g, so get_db_connection()
+            # checks out a separate pooled connection and teardown returns it
+            with app.app_context():
+                g.db_config = db_config
+                db = DashboardBundle._limit_session(get_db_connection(), remaining_ms)
+                try:
+                    result = fn()
+                finally:
+                    DashboardBundle._reset_session(db)
+            return result, started - submitted, time.monotonic() - started
+        
+        executor = DashboardBundle.executor()
+        futures = {name: executor.submit(call, fn) for name, fn in calls.items()}
+        done, _ = wait(futures.values(), timeout=timeout)
+        
+        sections = {}
+        timings = {}
+        for name, future in futures.items():
+            if future not in done:
+                # Queued sections are dropped; running ones are stopped by MAX_EXECUTION_TIME
+                future.cancel()
+                sections[name] = None
+                timings[name] = {'status': 'timeout'}
+                continue
+            try:
+                result, queued, elapsed = future.result()
+            except Exception as e:
+                print(f"Dashboard section {name} failed: {e}")
+                sections[name] = None
+                timings[name] = {'status': 'error', 'error': str(e)}
+                continue
+            sections[name] = result
+            timings[name] = {'status': 'ok', 'queued_ms': round(queued * 1000, 1), 'ms': round(elapsed * 1000, 1)}
+        
+        return {
+            'sections': sections,
+            'timings': timings,
+            'complete': all(timing['status'] == 'ok' for timing in timings.values()),
+            'elapsed_ms': round((time.monotonic() - submitted) * 1000, 1)
+        }
@@ -0,0 +1,340 @@
+from datetime import date, datetime
+from decimal import Decimal
+import json
+from config.db import get_db_connection
+from utils.event_bus import event_bus
+from utils.periods import period_range
+from utils.report_cache import report_cache
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+class DashboardSnapshot:
+    """Per-user dashboard state (month-to-date totals, recent transactions, top categories, budgets) in one row"""
+    
+    RECENT_LIMIT = 10
+    TOP_CATEGORIES = 5
+    JSON_COLUMNS = ('recent_transactions', 'top_categories', 'budget_utilization')
+    # Budget percentages that raise a budget_threshold event when a write crosses them
+    BUDGET_THRESHOLDS = (80, 100)
+    # snapshot_date of a row created only to be locked; never current, so the next read rebuilds it
+    UNBUILT_DATE = date(1970, 1, 1)
+    
+    @staticmethod
+    def refresh(db, user_id, today=None):
+        """Recompute and upsert the whole snapshot from the rollups (first read of the day, or a missing row); the caller commits"""
+        today = today or date.today()
+        month_start, _ = period_range('month', today)
+        
+        # Lock the user's row before reading anything, creating it if needed. Writers lock
+        # it too when they add their delta, so this rebuild's reads start after any write
+        # that already touched the row has committed, and later writes add on top of it
+        db.execute(
+            """INSERT INTO DashboardSnapshots (user_id, snapshot_date, period_month, recent_transactions,
+                                               top_categories, budget_utilization)
+               VALUES (%s, %s, %s, '[]', '[]', '{}')
+               ON DUPLICATE KEY UPDATE user_id = user_id""",
+            (user_id, DashboardSnapshot.UNBUILT_DATE, DashboardSnapshot.UNBUILT_DATE)
+        )
+        db.execute("SELECT period_month, budget_utilization FROM DashboardSnapshots WHERE user_id = %s", (user_id,))
+        previous = db.fetchone()
+        
+        # Month to date, like the summary always was: future-dated rows are left out
+        db.execute(
+            """SELECT COALESCE(SUM(income_total), 0) as total_income,
+                      COALESCE(SUM(expense_total), 0) as total_expenses,
+                      COALESCE(SUM(transaction_count), 0) as transaction_count
+               FROM DailyRollup
+               WHERE user_id = %s AND day >= %s AND day <= %s""",
+            (user_id, month_start, today)
+        )
+        totals = db.fetchone()
+        
+        snapshot = {
+            'user_id': user_id,
+            'snapshot_date': today,
+            'period_month': month_start,
+            'total_income': float(totals['total_income']),
+            'total_expenses': float(totals['total_expenses']),
+            'transaction_count': int(totals['transaction_count'])
+        }
+        snapshot.update(DashboardSnapshot._lists(db, user_id, today, previous))
+        db.execute(
+            """INSERT INTO DashboardSnapshots (user_id, snapshot_date, period_month, total_income, total_expenses,
+                                               transaction_count, recent_transactions, top_categories, budget_utilization)
+               VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+               ON DUPLICATE KEY UPDATE
+                   snapshot_date = VALUES(snapshot_date),
+                   period_month = VALUES(period_month),
+                   total_income = VALUES(total_income),
+                   total_expenses = VALUES(total_expenses),
+                   transaction_count = VALUES(transaction_count),
+                   recent_transactions = VALUES(recent_transactions),
+                   top_categories = VALUES(top_categories),
+                   budget_utilization = VALUES(budget_utilization)""",
+            (user_id, today, month_start, snapshot['total_income'], snapshot['total_expenses'],
+             snapshot['transaction_count'],
+             *(json.dumps(snapshot[column], default=_json_default) for column in DashboardSnapshot.JSON_COLUMNS))
+        )
+        return snapshot
+    
+    @staticmethod
+    def _lists(db, user_id, today, previous):
+        """Recent transactions, top categories, budgets and the budget thresholds crossed since the `previous` row"""
+        # Transaction imports this module for its write path
+        from models.transaction import Transaction
+        
+        month_start, _ = period_range('month', today)
+        previous_budgets = json.loads(previous['budget_utilization']).get('budgets')
+        if previous['period_month'] != month_start:
+            previous_budgets = None  # last month's spend says nothing about this month's crossings
+        
+        # Category spend comes from the incrementally maintained rollup, so these
+        # reads touch a few dozen index rows however many transactions exist
+        db.execute(
+            """SELECT r.category_id, c.name as category_name, r.total_amount as amount
+               FROM MonthlyCategoryRollup r
+               INNER JOIN Categories c ON c.category_id = r.category_id
+               WHERE r.user_id = %s AND r.period_month = %s AND r.transaction_type = 'expense'
+               ORDER BY r.total_amount DESC
+               LIMIT %s""",
+            (user_id, month_start, DashboardSnapshot.TOP_CATEGORIES)
+        )
+        top_categories = [{'category_id': row['category_id'], 'category': row['category_name'],
+                           'amount': float(row['amount'])} for row in db.fetchall()]
+        
+        db.execute(
+            """SELECT b.budget_id, b.category_id, c.name as category_name, b.budget_amount,
+                      COALESCE(r.total_amount, 0) as spent
+               FROM Budgets b
+               INNER JOIN Categories c ON b.category_id = c.category_id
+               LEFT JOIN MonthlyCategoryRollup r
+                   ON r.user_id = b.user_id AND r.period_month = %s
+                   AND r.transaction_type = 'expense' AND r.category_id = b.category_id
+               WHERE b.user_id = %s
+                   AND b.is_active = TRUE
+                   AND b.period_type = 'monthly'
+                   AND (b.end_date IS NULL OR b.end_date >= %s)
+               ORDER BY c.name""",
+            (month_start, user_id, today)
+        )
+        budgets = []
+        for row in db.fetchall():
+            budget_amount = float(row['budget_amount'])
+            spent = float(row['spent'])
+            budgets.append({
+                'budget_id': row['budget_id'],
+                'category_id': row['category_id'],
+                'category': row['category_name'],
+                'budgeted': budget_amount,
+                'spent': spent,
+                'percentage': int((spent / budget_amount * 100)) if budget_amount > 0 else 0
+            })
+        budget_alerts = []
+        if previous_budgets is not None:
+            # Only compared against a built snapshot of the same month, never the placeholder
+            previous_percentages = {budget['budget_id']: budget['percentage'] for budget in previous_budgets}
+            for budget in budgets:
+                before = previous_percentages.get(budget['budget_id'], 0)
+                crossed = [threshold for threshold in DashboardSnapshot.BUDGET_THRESHOLDS
+                           if before < threshold <= budget['percentage']]
+                if crossed:
+                    budget_alerts.append({
+                        'budget_id': budget['budget_id'],
+                        'category_id': budget['category_id'],
+                        'category': budget['category'],
+                        'percentage': budget['percentage'],
+                        'threshold': max(crossed)
+                    })
+        total_budgeted = sum(budget['budgeted'] for budget in budgets)
+        total_spent = sum(budget['spent'] for budget in budgets)
+        budget_utilization = {
+            'budgets': budgets,
+            'total_budgeted': total_budgeted,
+            'total_spent': total_spent,
+            'overall_percentage': int((total_spent / total_budgeted * 100)) if total_budgeted > 0 else 0
+        }
+        
+        where, params = Transaction.build_filters(user_id)
+        recent = [Transaction.row_to_dict(row)
+                  for row in Transaction._fetch_page(db, where, params, DashboardSnapshot.RECENT_LIMIT)]
+        
+        return {
+            'recent_transactions': recent,
+            'top_categories': top_categories,
+            'budget_utilization': budget_utilization,
+            'budget_alerts': budget_alerts
+        }
+    
+    @staticmethod
+    def add_totals(db, entries):
+        """Add a write's (user_id, date, type, category_id, amount[, count]) entries to today's totals, removals with a negative count; call just before the write commits"""
+        today = date.today()
+        month_start, _ = period_range('month', today)
+        deltas = {}
+        for entry in entries:
+            user_id, transaction_date, transaction_type, _, amount = entry[:5]
+            count = entry[5] if len(entry) > 5 else 1
+            day = transaction_date.date() if isinstance(transaction_date, datetime) else transaction_date
+            if isinstance(day, str):
+                day = date.fromisoformat(day)
+            if not month_start <= day <= today:
+                continue
+            amount = abs(Decimal(str(amount or 0))) * (-1 if count < 0 else 1)
+            income, expense, total = deltas.get(user_id, (0, 0, 0))
+            if transaction_type == 'income':
+                income += amount
+            elif transaction_type == 'expense':
+                expense += amount
+            deltas[user_id] = (income, expense, total + count)
+        deltas = {user_id: delta for user_id, delta in deltas.items() if any(delta)}
+        if not deltas:
+            return 0
+        
+        # Upserting always locks the row, even one that does not exist yet, so a rebuild
+        # running concurrently waits for this commit and never misses or repeats the delta.
+        # Rows from an earlier day (or created here) are left as they are: the next read
+        # rebuilds them from the rollups.
+        params = []
+        for user_id in sorted(deltas):
+            params.extend((user_id, DashboardSnapshot.UNBUILT_DATE, DashboardSnapshot.UNBUILT_DATE) + deltas[user_id])
+        db.execute(
+            f"""INSERT INTO DashboardSnapshots (user_id, snapshot_date, period_month, total_income, total_expenses,
+                                                transaction_count, recent_transactions, top_categories, budget_utilization)
+                VALUES {', '.join(["(%s, %s, %s, %s, %s, %s, '[]', '[]', '{}')"] * len(deltas))}
+                ON DUPLICATE KEY UPDATE
+                    total_income = IF(snapshot_date = %s, total_income + VALUES(total_income), total_income),
+                    total_expenses = IF(snapshot_date = %s, total_expenses + VALUES(total_expenses), total_expenses),
+                    transaction_count = IF(snapshot_date = %s, transaction_count + VALUES(transaction_count), transaction_count)""",
+            params + [today, today, today]
+        )
+        return len(deltas)
+    
+    @staticmethod
+    def update(user_id, today=None):
+        """Re-read the snapshot's lists after a write commits (its totals moved with the write). Returns None on failure."""
+        db = get_db_connection()
+        if not db.connection:
+            return None
+        
+        today = today or date.today()
+        try:
+            db.execute("SELECT * FROM DashboardSnapshots WHERE user_id = %s FOR UPDATE", (user_id,))
+            row = db.fetchone()
+            if not row or row['snapshot_date'] != today:
+                # Nothing current to update: build the whole row, as the next read would
+                snapshot = DashboardSnapshot.refresh(db, user_id, today)
+            else:
+                snapshot = DashboardSnapshot._from_row(row)
+                lists = DashboardSnapshot._lists(db, user_id, today, row)
+                db.execute(
+                    """UPDATE DashboardSnapshots
+                       SET recent_transactions = %s, top_categories = %s, budget_utilization = %s
+                       WHERE user_id = %s""",
+                    (*(json.dumps(lists[column], default=_json_default) for column in DashboardSnapshot.JSON_COLUMNS),
+                     user_id)
+                )
+                snapshot.update(lists)
+            db.commit()
+            return snapshot
+        except Exception as e:
+            db.rollback()
+            print(f"Dashboard snapshot update failed: {e}")
+        
+        # Never leave a snapshot that predates the write; the next read rebuilds it
+        try:
+            DashboardSnapshot.invalidate(db, [user_id])
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Dashboard snapshot invalidation failed: {e}")
+        return None
+    
+    @staticmethod
+    def publish(user_id, snapshot):
+        """Push an updated snapshot's summary and budget crossings to the user's streams; call after the report cache bump"""
+        if snapshot is None:
+            # The rebuild failed, so there is no delta to send; clients refetch instead
+            event_bus.publish(user_id, 'resync', {'reason': 'snapshot'})
+            return
+        event_bus.publish(user_id, 'summary', DashboardSnapshot.to_summary(snapshot))
+        for alert in snapshot['budget_alerts']:
+            event_bus.publish(user_id, 'budget_threshold', alert)
+    
+    @staticmethod
+    def after_write(user_id):
+        """Run after a write that moves dashboard state commits: update the snapshot, bump the report cache, publish"""
+        snapshot = DashboardSnapshot.update(user_id)
+        report_cache.bump(user_id)
+        # Published after the bump, so a client that refetches never gets a cached copy
+        DashboardSnapshot.publish(user_id, snapshot)
+        return snapshot
+    
+    @staticmethod
+    def invalidate(db, user_ids):
+        """Drop snapshots so the next read rebuilds them (for writes that do not refresh); the caller commits"""
+        user_ids = sorted(set(user_ids))
+        if user_ids:
+            db.execute(
+                f"DELETE FROM DashboardSnapshots WHERE user_id IN ({', '.join(['%s'] * len(user_ids))})",
+                user_ids
+            )
+    
+    @staticmethod
+    def get(user_id):
+        """The user's snapshot from one primary-key read, rebuilt first if it is missing or from another day"""
+        db = get_db_connection()
+        if not db.connection:
+            raise Exception("No database connection")
+        
+        today = date.today()
+        db.execute("SELECT * FROM DashboardSnapshots WHERE user_id = %s", (user_id,))
+        row = db.fetchone()
+        if row and row['snapshot_date'] == today:
+            return DashboardSnapshot._from_row(row)
+        
+        # Missing (never built, or invalidated) or stale after midnight. Ending the
+        # read's transaction first lets the rebuild read from a fresh view
+        try:
+            db.commit()
+            snapshot = DashboardSnapshot.refresh(db, user_id, today)
+            db.commit()
+            return snapshot
+        except Exception as e:
+            db.rollback()
+            raise e
+    
+    @staticmethod
+    def _from_row(row):
+        snapshot = dict(row)
+        for column in DashboardSnapshot.JSON_COLUMNS:
+            snapshot[column] = json.loads(snapshot[column])
+        for column in ('total_income', 'total_expenses'):
+            snapshot[column] = float(snapshot[column])
+        return snapshot
+    
+    @staticmethod
+    def to_dict(snapshot):
+        """The full snapshot as a JSON-ready dict"""
+        result = {column: snapshot[column] for column in
+                  ('total_income', 'total_expenses', 'transaction_count') + DashboardSnapshot.JSON_COLUMNS}
+        result['net_income'] = snapshot['total_income'] - snapshot['total_expenses']
+        result['snapshot_date'] = snapshot['snapshot_date'].isoformat()
+        result['period_month'] = snapshot['period_month'].isoformat()
+        updated_at = snapshot.get('updated_at')
+        result['updated_at'] = updated_at.isoformat() if updated_at else None
+        return result
+    
+    @staticmethod
+    def to_summary(snapshot):
+        """The /api/dashboard/summary payload"""
+        return {
+            'total_income': snapshot['total_income'],
+            'total_expenses': snapshot['total_expenses'],
+            'net_income': snapshot['total_income'] - snapshot['total_expenses'],
+            'transaction_count': snapshot['transaction_count']
+        }
@@ -0,0 +1,216 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime
+from decimal import Decimal
+from config.db import SimpleDBConnection, pool_registry
+from config.migrations import database_key
+from models.daily_rollup import DailyRollup
+from models.dashboard_snapshot import DashboardSnapshot
+from utils.report_cache import report_cache
+
+def _month_start(value):
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, str):
+        value = date.fromisoformat(value)
+    return value.replace(day=1)
+
+def _next_month(day):
+    return date(day.year + 1, 1, 1) if day.month == 12 else date(day.year, day.month + 1, 1)
+
+class MonthlyCategoryRollup:
+    """Per user, month, type and category totals, kept in step with every transaction write"""
+    
+    # Split-aware contribution of a transaction (same attribution and magnitudes as
+    # Transaction.SPLIT_*_SQL); uncategorized rows roll up under category 0 because
+    # category_id is part of the key
+    SOURCE_SQL = """
+        FROM Transactions t
+        LEFT JOIN TransactionSplits s ON s.transaction_id = t.transaction_id
+    """
+    MONTH_SQL = "DATE_SUB(t.transaction_date, INTERVAL DAYOFMONTH(t.transaction_date) - 1 DAY)"
+    CATEGORY_SQL = "COALESCE(s.category_id, t.category_id, 0)"
+    AMOUNT_SQL = "ABS(COALESCE(s.amount, t.amount))"
+    
+    # Report grouping keys -> (rollup column, raw Transactions expression)
+    GROUPS = {
+        'month': ('period_month', MONTH_SQL),
+        'type': ('transaction_type', 't.transaction_type'),
+        'category': ('category_id', CATEGORY_SQL)
+    }
+    
+    @staticmethod
+    def record_inserts(db, entries):
+        """Add new transactions, given as (user_id, date, type, category_id, amount), with one upsert; the caller commits"""
+        buckets = {}
+        for user_id, transaction_date, transaction_type, category_id, amount in entries:
+            amount = abs(Decimal(str(amount or 0)))
+            key = (user_id, _month_start(transaction_date), transaction_type, category_id or 0)
+            total, count, low, high = buckets.get(key, (0, 0, amount, amount))
+            buckets[key] = (total + amount, count + 1, min(low, amount), max(high, amount))
+        if not buckets:
+            return 0
+        
+        query = f"""
+            INSERT INTO MonthlyCategoryRollup (user_id, period_month, transaction_type, category_id,
+                                               total_amount, transaction_count, min_amount, max_amount)
+            VALUES {', '.join(['(%s, %s, %s, %s, %s, %s, %s, %s)'] * len(buckets))}
+            ON DUPLICATE KEY UPDATE
+                total_amount = total_amount + VALUES(total_amount),
+                transaction_count = transaction_count + VALUES(transaction_count),
+                min_amount = LEAST(min_amount, VALUES(min_amount)),
+                max_amount = GREATEST(max_amount, VALUES(max_amount))
+        """
+        params = []
+        for key, values in buckets.items():
+            params.extend(key + values)
+        db.execute(query, params)
+        return len(buckets)
+    
+    @staticmethod
+    def refresh_months(db, user_id, months):
+        """Recompute whole user-months after updates or deletes (min/max cannot be decremented); the caller commits"""
+        months = sorted({_month_start(month) for month in months})
+        if not months:
+            return 0
+        
+        db.execute(
+            f"""DELETE FROM MonthlyCategoryRollup
+                WHERE user_id = %s AND period_month IN ({', '.join(['%s'] * len(months))})""",
+            [user_id] + months
+        )
+        ranges = ' OR '.join(['(t.transaction_date >= %s AND t.transaction_date < %s)'] * len(months))
+        params = [user_id]
+        for month in months:
+            params.extend([month, _next_month(month)])
+        MonthlyCategoryRollup._insert_aggregate(db, f"t.user_id = %s AND ({ranges})", params)
+        return len(months)
+    
+    @staticmethod
+    def rebuild_user(db, user_id):
+        """Recompute all of a user's rows; the caller commits"""
+        db.execute("DELETE FROM MonthlyCategoryRollup WHERE user_id = %s", (user_id,))
+        MonthlyCategoryRollup._insert_aggregate(db, "t.user_id = %s", [user_id])
+    
+    @staticmethod
+    def _insert_aggregate(db, where, params):
+        amount = MonthlyCategoryRollup.AMOUNT_SQL
+        db.execute(
+            f"""INSERT INTO MonthlyCategoryRollup (user_id, period_month, transaction_type, category_id,
+                                                   total_amount, transaction_count, min_amount, max_amount)
+                SELECT t.user_id, {MonthlyCategoryRollup.MONTH_SQL}, t.transaction_type,
+                       {MonthlyCategoryRollup.CATEGORY_SQL},
+                       SUM({amount}), COUNT(*), MIN({amount}), MAX({amount})
+                {MonthlyCategoryRollup.SOURCE_SQL}
+                WHERE {where}
+                GROUP BY t.user_id, {MonthlyCategoryRollup.MONTH_SQL}, t.transaction_type,
+                         {MonthlyCategoryRollup.CATEGORY_SQL}""",
+            params
+        )
+    
+    @staticmethod
+    def totals(db, user_id, start_date, end_date, group_by, transaction_type=None):
+        """Totals for [start_date, end_date) grouped by `group_by` (month/type/category)"""
+        # Whole months come from the rollup; a partial month at either edge of the
+        # window is aggregated from Transactions, so results match a raw query
+        first_full = _month_start(start_date)
+        if first_full < start_date:
+            first_full = _next_month(first_full)
+        last_full_end = _month_start(end_date)
+        
+        pieces = []
+        if first_full < last_full_end:
+            pieces.append(MonthlyCategoryRollup._rollup_totals(
+                db, user_id, first_full, last_full_end, group_by, transaction_type))
+            edges = [(start_date, first_full), (last_full_end, end_date)]
+        else:
+            edges = [(start_date, end_date)]
+        for edge_start, edge_end in edges:
+            if edge_start < edge_end:
+                pieces.append(MonthlyCategoryRollup._raw_totals(
+                    db, user_id, edge_start, edge_end, group_by, transaction_type))
+        
+        merged = {}
+        for rows in pieces:
+            for row in rows:
+                key = tuple(row[name] for name in group_by)
+                if key in merged:
+                    merged[key]['total'] += row['total']
+                    merged[key]['count'] += row['count']
+                else:
+                    merged[key] = dict(row)
+        return list(merged.values())
+    
+    @staticmethod
+    def _rollup_totals(db, user_id, start_date, end_date, group_by, transaction_type):
+        columns = [f"{MonthlyCategoryRollup.GROUPS[name][0]} as {name}" for name in group_by]
+        where = "user_id = %s AND period_month >= %s AND period_month < %s"
+        params = [user_id, start_date, end_date]
+        if transaction_type:
+            where += " AND transaction_type = %s"
+            params.append(transaction_type)
+        
+        db.execute(
+            f"""SELECT {', '.join(columns)}, SUM(total_amount) as total, SUM(transaction_count) as count
+                FROM MonthlyCategoryRollup
+                WHERE {where}
+                GROUP BY {', '.join(MonthlyCategoryRollup.GROUPS[name][0] for name in group_by)}""",
+            params
+        )
+        return db.fetchall()
+    
+    @staticmethod
+    def _raw_totals(db, user_id, start_date, end_date, group_by, transaction_type):
+        expressions = [MonthlyCategoryRollup.GROUPS[name][1] for name in group_by]
+        columns = [f"{expression} as {name}" for expression, name in zip(expressions, group_by)]
+        where = "t.user_id = %s AND t.transaction_date >= %s AND t.transaction_date < %s"
+        params = [user_id, start_date, end_date]
+        if transaction_type:
+            where += " AND t.transaction_type = %s"
+            params.append(transaction_type)
+        
+        db.execute(
+            f"""SELECT {', '.join(columns)}, SUM({MonthlyCategoryRollup.AMOUNT_SQL}) as total, COUNT(*) as count
+                {MonthlyCategoryRollup.SOURCE_SQL}
+                WHERE {where}
+                GROUP BY {', '.join(expressions)}""",
+            params
+        )
+        return db.fetchall()
+    
+    @staticmethod
+    def rebuild_all(config, workers=4, users_per_task=100, progress=None):
+        """Rebuild every user's monthly and daily rollup rows in parallel; each user is rebuilt in its own database transaction"""
+        workers = max(1, min(workers, pool_registry.pool_size - 1 or 1))
+        db = SimpleDBConnection(pool_registry.checkout(config))
+        try:
+            db.execute("SELECT user_id FROM Users ORDER BY user_id")
+            user_ids = [row['user_id'] for row in db.fetchall()]
+        finally:
+            db.close()
+        
+        def rebuild(batch):
+            worker_db = SimpleDBConnection(pool_registry.checkout(config))
+            try:
+                for user_id in batch:
+                    MonthlyCategoryRollup.rebuild_user(worker_db, user_id)
+                    DailyRollup.rebuild_user(worker_db, user_id)
+                    # Snapshot totals are kept by deltas, so they are rebuilt from the new rollups on next read
+                    DashboardSnapshot.invalidate(worker_db, [user_id])
+                    worker_db.commit()
+                    report_cache.bump(user_id, database_key(config))
+            except Exception as e:
+                worker_db.rollback()
+                raise e
+            finally:
+                worker_db.close()
+            return len(batch)
+        
+        batches = [user_ids[i:i + users_per_task] for i in range(0, len(user_ids), users_per_task)]
+        rebuilt = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(rebuild, batch) for batch in batches]
+            for future in as_completed(futures):
+                rebuilt += future.result()
+                if progress:
+                    progress(rebuilt, len(user_ids))
+        return rebuilt
@@ -0,0 +1,352 @@
+from datetime import date, timedelta
+from config.db import get_db_connection
+from models.account import Account
+from models.daily_rollup import DailyRollup
+from models.dashboard_snapshot import DashboardSnapshot
+from models.monthly_rollup import MonthlyCategoryRollup
+from models.transaction import Transaction
+from utils.recurrence import FREQUENCIES, occurrences, next_occurrence
+from utils.event_bus import event_bus
+from utils.report_cache import report_cache
+
+class RecurringSchedule:
+    """Recurring transaction rule; occurrences are projected lazily and materialized by a job"""
+    
+    FIELDS = ('account_id', 'category_id', 'amount', 'transaction_type', 'description',
+              'frequency', 'start_date', 'end_date')
+    INSERT_COLUMNS = Transaction.INSERT_COLUMNS + ['recurring_schedule_id']
+    INSERT_CHUNK_SIZE = 1000
+    
+    def __init__(self, schedule_id=None, user_id=None, account_id=None, category_id=None,
+                 amount=0.00, transaction_type=None, description=None, frequency=None,
+                 start_date=None, end_date=None, next_due_date=None, is_active=True,
+                 created_at=None, updated_at=None):
+        self.schedule_id = schedule_id
+        self.user_id = user_id
+        self.account_id = account_id
+        self.category_id = category_id
+        self.amount = float(amount) if amount else 0.00
+        self.transaction_type = transaction_type
+        self.description = description
+        self.frequency = frequency
+        self.start_date = start_date
+        self.end_date = end_date
+        self.next_due_date = next_due_date
+        self.is_active = is_active
+        self.created_at = created_at
+        self.updated_at = updated_at
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'schedule_id': self.schedule_id,
+            'user_id': self.user_id,
+            'account_id': self.account_id,
+            'category_id': self.category_id,
+            'amount': self.amount,
+            'transaction_type': self.transaction_type,
+            'description': self.description,
+            'frequency': self.frequency,
+            'start_date': self.start_date.isoformat() if isinstance(self.start_date, date) else self.start_date,
+            'end_date': self.end_date.isoformat() if isinstance(self.end_date, date) else self.end_date,
+            'next_due_date': self.next_due_date.isoformat() if isinstance(self.next_due_date, date) else self.next_due_date,
+            'is_active': bool(self.is_active),
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+    
+    def validate(self):
+        """Normalize dates and check the rule; raises ValueError"""
+        if self.frequency not in FREQUENCIES:
+            raise ValueError(f"frequency must be one of {', '.join(FREQUENCIES)}")
+        if self.transaction_type not in ('income', 'expense', 'transfer'):
+            raise ValueError('transaction_type must be income, expense or transfer')
+        if not self.account_id:
+            raise ValueError('account_id is required')
+        if not self.amount:
+            raise ValueError('amount is required')
+        if not self.start_date:
+            raise ValueError('start_date is required')
+        if isinstance(self.start_date, str):
+            self.start_date = date.fromisoformat(self.start_date)
+        if isinstance(self.end_date, str):
+            self.end_date = date.fromisoformat(self.end_date) if self.end_date else None
+        if self.end_date and self.end_date < self.start_date:
+            raise ValueError('end_date must not be before start_date')
+    
+    def _next_due_after(self, last_materialized):
+        """First occurrence still to be written, given the last materialized date (or None)"""
+        if last_materialized is None:
+            return self.start_date
+        return next_occurrence(self.start_date, self.frequency, last_materialized, self.end_date)
+    
+    def save(self, db=None, commit=True):
+        """Insert or update the schedule; next_due_date follows what is already materialized"""
+        self.validate()
+        db = db or get_db_connection()
+        if not db.connection:
+            raise Exception("No database connection")
+        
+        try:
+            db.execute("SELECT 1 FROM Accounts WHERE account_id = %s AND user_id = %s",
+                       (self.account_id, self.user_id))
+            if not db.fetchall():
+                raise ValueError('Account not found')
+            
+            last_materialized = None
+            if self.schedule_id:
+                db.execute(
+                    "SELECT MAX(transaction_date) as last_date FROM Transactions WHERE recurring_schedule_id = %s",
+                    (self.schedule_id,)
+                )
+                last_materialized = db.fetchone()['last_date']
+            self.next_due_date = self._next_due_after(last_materialized)
+            if self.next_due_date is None:
+                self.is_active = False
+            
+            values = (self.account_id, self.category_id, self.amount, self.transaction_type,
+                      self.description, self.frequency, self.start_date, self.end_date,
+                      self.next_due_date, self.is_active)
+            if self.schedule_id:
+                query = """
+                    UPDATE RecurringSchedules
+                    SET account_id=%s, category_id=%s, amount=%s, transaction_type=%s,
+                        description=%s, frequency=%s, start_date=%s, end_date=%s,
+                        next_due_date=%s, is_active=%s
+                    WHERE schedule_id=%s AND user_id=%s
+                """
+                db.execute(query, values + (self.schedule_id, self.user_id))
+            else:
+                query = """
+                    INSERT INTO RecurringSchedules (account_id, category_id, amount, transaction_type,
+                                                    description, frequency, start_date, end_date,
+                                                    next_due_date, is_active, user_id)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """
+                db.execute(query, values + (self.user_id,))
+                self.schedule_id = db.cursor.lastrowid
+            
+            if commit:
+                db.commit()
+                report_cache.bump(self.user_id)
+            return True
+        
+        except Exception as e:
+            db.rollback()
+            raise e
+    
+    @staticmethod
+    def create_from_transaction(transaction, frequency):
+        """Start a schedule at an already saved transaction, which becomes its first occurrence"""
+        schedule = RecurringSchedule(
+            user_id=transaction.user_id,
+            account_id=transaction.account_id,
+            category_id=transaction.category_id,
+            amount=transaction.amount,
+            transaction_type=transaction.transaction_type,
+            description=transaction.description,
+            frequency=frequency,
+            start_date=transaction.transaction_date
+        )
+        
+        db = get_db_connection()
+        if not db.connection:
+            raise Exception("No database connection")
+        
+        try:
+            schedule.save(db, commit=False)
+            db.execute(
+                "UPDATE Transactions SET recurring_schedule_id = %s WHERE transaction_id = %s AND user_id = %s",
+                (schedule.schedule_id, transaction.transaction_id, transaction.user_id)
+            )
+            schedule.next_due_date = schedule._next_due_after(schedule.start_date)
+            schedule.is_active = schedule.next_due_date is not None
+            db.execute(
+                "UPDATE RecurringSchedules SET next_due_date = %s, is_active = %s WHERE schedule_id = %s",
+                (schedule.next_due_date, schedule.is_active, schedule.schedule_id)
+            )
+            db.commit()
+            report_cache.bump(schedule.user_id)
+            return schedule
+        
+        except Exception as e:
+            db.rollback()
+            raise e
+    
+    @staticmethod
+    def get_by_user(user_id, active_only=False):
+        """Get a user's schedules, soonest due first"""
+        db = get_db_connection()
+        if not db.connection:
+            return []
+        
+        try:
+            query = "SELECT * FROM RecurringSchedules WHERE user_id = %s"
+            if active_only:
+                query += " AND is_active = TRUE"
+            query += " ORDER BY is_active DESC, next_due_date, schedule_id"
+            
+            db.execute(query, (user_id,))
+            return [RecurringSchedule(**row) for row in db.fetchall()]
+        
+        except Exception as e:
+            print(f"Error getting recurring schedules: {e}")
+            return []
+    
+    @staticmethod
+    def find_by_id(schedule_id, user_id):
+        """Find one of the user's schedules"""
+        db = get_db_connection()
+        if not db.connection:
+            return None
+        
+        try:
+            db.execute("SELECT * FROM RecurringSchedules WHERE schedule_id = %s AND user_id = %s",
+                       (schedule_id, user_id))
+            row = db.fetchone()
+            return RecurringSchedule(**row) if row else None
+        
+        except Exception as e:
+            print(f"Error finding recurring schedule: {e}")
+            return None
+    
+    def delete(self):
+        """Delete the schedule; transactions it already created are kept"""
+        db = get_db_connection()
+        if not db.connection:
+            raise Exception("No database connection")
+        
+        try:
+            db.execute("DELETE FROM RecurringSchedules WHERE schedule_id = %s AND user_id = %s",
+                       (self.schedule_id, self.user_id))
+            db.commit()
+            report_cache.bump(self.user_id)
+            return True
+        
+        except Exception as e:
+            db.rollback()
+            raise e
+    
+    @staticmethod
+    def expand(user_id, start_date, end_date):
+        """Project not-yet-materialized occurrences in [start_date, end_date) without storing them"""
+        db = get_db_connection()
+        if not db.connection:
+            return []
+        
+        query = """
+            SELECT * FROM RecurringSchedules
+            WHERE user_id = %s AND is_active = TRUE AND next_due_date < %s
+        """
+        db.execute(query, (user_id, end_date))
+        
+        projected = []
+        for row in db.fetchall():
+            schedule = RecurringSchedule(**row)
+            # Anything before next_due_date is already a real transaction
+            window_start = max(start_date, schedule.next_due_date)
+            for day in occurrences(schedule.start_date, schedule.frequency, window_start, end_date, schedule.end_date):
+                projected.append({
+                    'schedule_id': schedule.schedule_id,
+                    'transaction_date': day.isoformat(),
+                    'account_id': schedule.account_id,
+                    'category_id': schedule.category_id,
+                    'amount': schedule.amount,
+                    'transaction_type': schedule.transaction_type,
+                    'description': schedule.description,
+                    'frequency': schedule.frequency,
+                    'projected': True
+                })
+        
+        projected.sort(key=lambda item: (item['transaction_date'], item['schedule_id']))
+        return projected
+    
+    @staticmethod
+    def materialize_due(today=None, batch_size=500):
+        """Write every occurrence due up to `today` as a transaction, a batch of schedules at a time"""
+        today = today or date.today()
+        db = get_db_connection()
+        if not db.connection:
+            raise Exception("No database connection")
+        
+        insert_query = f"""
+            INSERT INTO Transactions ({', '.join(RecurringSchedule.INSERT_COLUMNS)})
+            VALUES ({', '.join(['%s'] * len(RecurringSchedule.INSERT_COLUMNS))})
+        """
+        processed = 0
+        created = 0
+        
+        while True:
+            try:
+                db.execute(
+                    """SELECT * FROM RecurringSchedules
+                       WHERE is_active = TRUE AND next_due_date <= %s
+                       ORDER BY next_due_date, schedule_id
+                       LIMIT %s
+                       FOR UPDATE""",
+                    (today, batch_size)
+                )
+                schedules = [RecurringSchedule(**row) for row in db.fetchall()]
+                if not schedules:
+                    db.commit()
+                    break
+                
+                rows = []
+                next_due = {}
+                for schedule in schedules:
+                    for day in occurrences(schedule.start_date, schedule.frequency, schedule.next_due_date,
+                                           today + timedelta(days=1), schedule.end_date):
+                        fingerprint = Transaction.compute_fingerprint(
+                            schedule.account_id, day, schedule.amount,
+                            schedule.transaction_type, schedule.description
+                        )
+                        rows.append((schedule.user_id, schedule.account_id, schedule.category_id, day, None,
+                                     schedule.amount, schedule.transaction_type, schedule.description,
+                                     'completed', None, fingerprint, schedule.schedule_id))
+                    next_due[schedule.schedule_id] = next_occurrence(
+                        schedule.start_date, schedule.frequency, today, schedule.end_date
+                    )
+                
+                for i in range(0, len(rows), RecurringSchedule.INSERT_CHUNK_SIZE):
+                    chunk = rows[i:i + RecurringSchedule.INSERT_CHUNK_SIZE]
+                    db.executemany(insert_query, chunk)
+                    Account.apply_balance_deltas(db, Transaction.ledger_deltas(chunk))
+                    entries = Transaction.rollup_entries(chunk)
+                    MonthlyCategoryRollup.record_inserts(db, entries)
+                    DailyRollup.apply(db, entries)
+                
+                # One statement advances every schedule in the batch; ended ones are deactivated
+                cases = ' '.join(['WHEN %s THEN %s'] * len(next_due))
+                params = []
+                for schedule_id, day in next_due.items():
+                    params.extend([schedule_id, day])
+                db.execute(
+                    f"""UPDATE RecurringSchedules
+                        SET next_due_date = CASE schedule_id {cases} END,
+                            is_active = next_due_date IS NOT NULL
+                        WHERE schedule_id IN ({', '.join(['%s'] * len(next_due))})""",
+                    params + list(next_due.keys())
+                )
+                DashboardSnapshot.add_totals(db, Transaction.rollup_entries(rows))
+                db.commit()
+            
+            except Exception as e:
+                db.rollback()
+                raise e
+            
+            processed += len(schedules)
+            created += len(rows)
+            created_by_user = {}
+            for row in rows:
+                created_by_user[row[0]] = created_by_user.get(row[0], 0) + 1
+            for user_id in {schedule.user_id for schedule in schedules}:
+                Transaction.invalidate_count_cache(user_id)
+                if not created_by_user.get(user_id):
+                    report_cache.bump(user_id)
+                    continue
+                DashboardSnapshot.after_write(user_id)
+                event_bus.publish(user_id, 'transactions', {'action': 'recurring', 'count': created_by_user[user_id]})
+            if len(schedules) < batch_size:
+                break
+        
+        return {'schedules': processed, 'created': created}
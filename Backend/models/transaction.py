@@ -1,5 +1,33 @@
 from datetime import datetime, date, timedelta
-from config.db import get_db_connection
+from decimal import Decimal, ROUND_HALF_UP
+import hashlib
+from config.db import get_db_connection, current_database_key
+from models.account import Account
+from models.daily_rollup import DailyRollup
+from models.dashboard_snapshot import DashboardSnapshot
+from models.monthly_rollup import MonthlyCategoryRollup
+from models.transaction_split import TransactionSplit
+from utils.periods import period_range, rolling_range, comparison_ranges
+from utils.pagination import encode_cursor, decode_cursor
+from utils.event_bus import event_bus
+from collections import OrderedDict
+import math
+import threading
+import time
+
+# Cached COUNT(*) per (database, user, filters) so paging does not recount on every request.
+# Least recently used entries are dropped past COUNT_CACHE_MAX_ENTRIES.
+COUNT_CACHE_TTL = 60
+COUNT_CACHE_MAX_ENTRIES = 1000
+_count_cache = OrderedDict()
+_count_cache_lock = threading.Lock()
+
+def _parse_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
 
 class Transaction:
     """Transaction model using mysql.connector"""
@@ -47,44 +75,436 @@ class Transaction:
             raise Exception("No database connection")
         
         try:
+            fingerprint = Transaction.compute_fingerprint(
+                self.account_id, self.transaction_date, self.amount,
+                self.transaction_type, self.description
+            )
+            transaction_date = _parse_date(self.transaction_date)
+            deltas = {(self.account_id, transaction_date): Account.signed_amount(self.transaction_type, self.amount)}
+            rollup_months = None
             if self.transaction_id:
+                # Lock the stored row: its old amount comes off the old account's balance
+                db.execute(
+                    """SELECT account_id, transaction_date, amount, transaction_type FROM Transactions
+                       WHERE transaction_id = %s AND user_id = %s FOR UPDATE""",
+                    (self.transaction_id, self.user_id)
+                )
+                old = db.fetchone()
+                if not old:
+                    raise Exception("Transaction not found")
+                db.execute("SELECT 1 FROM Accounts WHERE account_id = %s AND user_id = %s",
+                           (self.account_id, self.user_id))
+                if not db.fetchall():
+                    raise Exception("Account not found")
+                key = (old['account_id'], old['transaction_date'])
+                deltas[key] = deltas.get(key, 0) - Account.signed_amount(old['transaction_type'], old['amount'])
+                rollup_months = [old['transaction_date'], transaction_date]
+                # Splits must keep adding up to the amount (refresh_months below re-reads them)
+                TransactionSplit.rescale(db, self.transaction_id, old['amount'], self.amount)
+                
                 # Update existing transaction
                 query = """
-                    UPDATE Transactions t
-                    JOIN Accounts a ON t.account_id = a.account_id
-                    SET t.account_id=%s, t.category_id=%s, t.transaction_date=%s,
-                        t.transaction_time=%s, t.amount=%s, t.transaction_type=%s,
-                        t.description=%s, t.status=%s, t.notes=%s
-                    WHERE t.transaction_id=%s AND a.user_id=%s
+                    UPDATE Transactions
+                    SET account_id=%s, category_id=%s, transaction_date=%s,
+                        transaction_time=%s, amount=%s, transaction_type=%s,
+                        description=%s, status=%s, notes=%s, fingerprint=%s
+                    WHERE transaction_id=%s AND user_id=%s
                 """
                 db.execute(query, (
                     self.account_id, self.category_id, self.transaction_date,
                     self.transaction_time, self.amount, self.transaction_type,
-                    self.description, self.status, self.notes,
+                    self.description, self.status, self.notes, fingerprint,
                     self.transaction_id, self.user_id
                 ))
             else:
-                # Insert new transaction
+                # Insert new transaction (user_id is denormalized from the owning account)
                 query = """
-                    INSERT INTO Transactions (account_id, category_id,
+                    INSERT INTO Transactions (user_id, account_id, category_id,
                                             transaction_date, transaction_time, amount,
-                                            transaction_type, description, status, notes)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                                            transaction_type, description, status, notes, fingerprint)
+                    SELECT user_id, account_id, %s, %s, %s, %s, %s, %s, %s, %s, %s
+                    FROM Accounts
+                    WHERE account_id=%s AND user_id=%s
                 """
                 db.execute(query, (
-                    self.account_id, self.category_id,
+                    self.category_id,
                     self.transaction_date, self.transaction_time, self.amount,
-                    self.transaction_type, self.description, self.status, self.notes
+                    self.transaction_type, self.description, self.status, self.notes,
+                    fingerprint, self.account_id, self.user_id
                 ))
+                if db.cursor.rowcount == 0:
+                    raise Exception("Account not found")
                 self.transaction_id = db.cursor.lastrowid
             
+            Account.apply_balance_deltas(db, deltas)
+            entry = (self.user_id, transaction_date, self.transaction_type, self.category_id, Decimal(str(self.amount)))
+            snapshot_entries = [entry]
+            if rollup_months:
+                MonthlyCategoryRollup.refresh_months(db, self.user_id, rollup_months)
+                DailyRollup.apply(db, [(self.user_id, old['transaction_date'], old['transaction_type'],
+                                        None, old['amount'])], sign=-1)
+                snapshot_entries.append((self.user_id, old['transaction_date'], old['transaction_type'],
+                                         None, -old['amount'], -1))
+            else:
+                MonthlyCategoryRollup.record_inserts(db, [entry])
+            DailyRollup.apply(db, [entry])
+            DashboardSnapshot.add_totals(db, snapshot_entries)
             db.commit()
+            Transaction.invalidate_count_cache(self.user_id)
+            DashboardSnapshot.after_write(self.user_id)
+            event_bus.publish(self.user_id, 'transaction', {
+                'action': 'updated' if rollup_months else 'created',
+                'transaction': self.to_dict()
+            })
             return True
             
         except Exception as e:
             db.rollback()
             raise e
     
+    # Listing order; (transaction_date, created_at, transaction_id) is also the keyset
+    LIST_ORDER = "t.transaction_date DESC, t.created_at DESC, t.transaction_id DESC"
+    MAX_PER_PAGE = 100
+    
+    # SQL twin of compute_fingerprint, for set-based updates (see migration 0004)
+    FINGERPRINT_SQL = (
+        "SHA1(CONCAT_WS('|', {p}account_id, {p}transaction_date, {p}amount, {p}transaction_type, "
+        "LOWER(REPLACE(REPLACE(REPLACE(REPLACE(COALESCE({p}description, ''), ' ', ''), "
+        "CHAR(9), ''), CHAR(13), ''), CHAR(10), ''))))"
+    )
+    
+    # Split-aware category attribution: a transaction with TransactionSplits rows
+    # counts once per split under the split's category, otherwise under its own.
+    # Amounts are magnitudes; transaction_type gives the direction (as in Account.SIGNED_AMOUNT_SQL)
+    SPLIT_JOIN_SQL = "LEFT JOIN TransactionSplits s ON s.transaction_id = t.transaction_id"
+    SPLIT_CATEGORY_SQL = "COALESCE(s.category_id, t.category_id)"
+    SPLIT_AMOUNT_SQL = "ABS(COALESCE(s.amount, t.amount))"
+    
+    @staticmethod
+    def compute_fingerprint(account_id, transaction_date, amount, transaction_type, description):
+        """Duplicate-detection hash over account, date, amount, type and normalized description"""
+        normalized = ''.join(ch for ch in (description or '') if ch not in ' \t\r\n').lower()
+        # Matches the DECIMAL(12,2) column, which rounds halves away from zero
+        amount = Decimal(str(amount)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        key = '|'.join([str(account_id), _parse_date(transaction_date).isoformat(), str(amount),
+                        transaction_type or '', normalized])
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def from_row(row):
+        """Build a Transaction from a Transactions row"""
+        return Transaction(
+            transaction_id=row['transaction_id'],
+            user_id=row['user_id'],
+            account_id=row['account_id'],
+            category_id=row['category_id'],
+            transaction_date=row['transaction_date'],
+            transaction_time=row.get('transaction_time'),
+            amount=row['amount'],
+            transaction_type=row['transaction_type'],
+            description=row.get('description'),
+            status=row.get('status', 'completed'),
+            notes=row.get('notes'),
+            created_at=row['created_at'],
+            updated_at=row['updated_at']
+        )
+    
+    @staticmethod
+    def row_to_dict(row):
+        """Transaction dict with the joined account/category names for display"""
+        trans_dict = Transaction.from_row(row).to_dict()
+        trans_dict['account_name'] = row.get('account_name')
+        trans_dict['category_name'] = row.get('category_name')
+        return trans_dict
+    
+    @staticmethod
+    def build_filters(user_id, start_date=None, end_date=None, category_id=None,
+                      account_id=None, transaction_type=None):
+        """WHERE clause and params for the listing filters (end_date is inclusive)"""
+        clauses = ["t.user_id = %s"]
+        params = [user_id]
+        
+        if start_date:
+            clauses.append("t.transaction_date >= %s")
+            params.append(_parse_date(start_date))
+        if end_date:
+            clauses.append("t.transaction_date < %s")
+            params.append(_parse_date(end_date) + timedelta(days=1))
+        if category_id:
+            clauses.append("t.category_id = %s")
+            params.append(category_id)
+        if account_id:
+            clauses.append("t.account_id = %s")
+            params.append(account_id)
+        if transaction_type:
+            clauses.append("t.transaction_type = %s")
+            params.append(transaction_type)
+        
+        return " AND ".join(clauses), params
+    
+    @staticmethod
+    def _fetch_page(db, where, params, limit, after=None, offset=0):
+        """Fetch one page of rows in LIST_ORDER, seeking past `after` or skipping `offset` rows"""
+        if after is not None:
+            # Seek: rows strictly after the last (date, created_at, id) seen
+            after_date, after_created, after_id = after
+            query = f"""
+                SELECT t.*, a.account_name, c.name as category_name
+                FROM Transactions t
+                LEFT JOIN Accounts a ON t.account_id = a.account_id
+                LEFT JOIN Categories c ON t.category_id = c.category_id
+                WHERE {where}
+                    AND (t.transaction_date < %s
+                         OR (t.transaction_date = %s
+                             AND (t.created_at < %s
+                                  OR (t.created_at = %s AND t.transaction_id < %s))))
+                ORDER BY {Transaction.LIST_ORDER}
+                LIMIT %s
+            """
+            db.execute(query, params + [after_date, after_date, after_created, after_created, after_id, limit])
+        elif offset:
+            # Page-number compatibility: skip rows on the narrow index, then join the page
+            query = f"""
+                SELECT t.*, a.account_name, c.name as category_name
+                FROM (
+                    SELECT t.transaction_id
+                    FROM Transactions t
+                    WHERE {where}
+                    ORDER BY {Transaction.LIST_ORDER}
+                    LIMIT %s OFFSET %s
+                ) page
+                INNER JOIN Transactions t ON t.transaction_id = page.transaction_id
+                LEFT JOIN Accounts a ON t.account_id = a.account_id
+                LEFT JOIN Categories c ON t.category_id = c.category_id
+                ORDER BY {Transaction.LIST_ORDER}
+            """
+            db.execute(query, params + [limit, offset])
+        else:
+            query = f"""
+                SELECT t.*, a.account_name, c.name as category_name
+                FROM Transactions t
+                LEFT JOIN Accounts a ON t.account_id = a.account_id
+                LEFT JOIN Categories c ON t.category_id = c.category_id
+                WHERE {where}
+                ORDER BY {Transaction.LIST_ORDER}
+                LIMIT %s
+            """
+            db.execute(query, params + [limit])
+        return db.fetchall()
+    
+    @staticmethod
+    def get_filtered_count(db, user_id, where, params):
+        """COUNT(*) for a filter set, cached for COUNT_CACHE_TTL seconds or until the user writes"""
+        key = (current_database_key(), user_id, where, tuple(str(p) for p in params))
+        now = time.monotonic()
+        with _count_cache_lock:
+            cached = _count_cache.get(key)
+            if cached and cached[1] > now:
+                _count_cache.move_to_end(key)
+                return cached[0]
+            if cached:
+                del _count_cache[key]
+        
+        db.execute(f"SELECT COUNT(*) as count FROM Transactions t WHERE {where}", params)
+        result = db.fetchone()
+        count = result['count'] if result else 0
+        
+        with _count_cache_lock:
+            _count_cache[key] = (count, now + COUNT_CACHE_TTL)
+            _count_cache.move_to_end(key)
+            while len(_count_cache) > COUNT_CACHE_MAX_ENTRIES:
+                _count_cache.popitem(last=False)
+        return count
+    
+    @staticmethod
+    def invalidate_count_cache(user_id):
+        """Drop cached counts for a user after their transactions change"""
+        # Every database's entries for this user id go; over-invalidating only costs a recount
+        with _count_cache_lock:
+            for key in [k for k in _count_cache if k[1] == user_id]:
+                del _count_cache[key]
+    
+    @staticmethod
+    def get_by_user(user_id, page=1, per_page=10, cursor=None, start_date=None, end_date=None,
+                    category_id=None, account_id=None, transaction_type=None):
+        """Get a page of a user's transactions, by cursor (keyset) or page number"""
+        per_page = max(1, min(per_page or 10, Transaction.MAX_PER_PAGE))
+        page = max(1, page or 1)
+        after = decode_cursor(cursor, 3) if cursor else None
+        where, params = Transaction.build_filters(
+            user_id, start_date, end_date, category_id, account_id, transaction_type
+        )
+        
+        db = get_db_connection()
+        if not db.connection:
+            raise Exception("No database connection")
+        
+        offset = 0 if after is not None else (page - 1) * per_page
+        rows = Transaction._fetch_page(db, where, params, per_page + 1, after=after, offset=offset)
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        
+        next_cursor = None
+        if has_more:
+            last = rows[-1]
+            next_cursor = encode_cursor(last['transaction_date'], last['created_at'], last['transaction_id'])
+        
+        total = Transaction.get_filtered_count(db, user_id, where, params)
+        
+        return {
+            'items': [Transaction.row_to_dict(row) for row in rows],
+            'total': total,
+            'page': None if after is not None else page,
+            'per_page': per_page,
+            'total_pages': math.ceil(total / per_page) if total else 0,
+            'next_cursor': next_cursor,
+            'has_more': has_more
+        }
+    
+    SEARCH_MATCH_SQL = "MATCH(t.description, t.notes) AGAINST (%s IN BOOLEAN MODE)"
+    
+    @staticmethod
+    def search(user_id, query, per_page=20, cursor=None, start_date=None, end_date=None,
+               category_id=None, account_id=None, transaction_type=None):
+        """Boolean-mode full-text search over description and notes, most relevant first"""
+        query = (query or '').strip()
+        if not query:
+            raise ValueError('q is required')
+        per_page = max(1, min(per_page or 20, Transaction.MAX_PER_PAGE))
+        after = decode_cursor(cursor, 2) if cursor else None
+        where, params = Transaction.build_filters(
+            user_id, start_date, end_date, category_id, account_id, transaction_type
+        )
+        
+        db = get_db_connection()
+        if not db.connection:
+            raise Exception("No database connection")
+        
+        # Relevance is cast to a fixed-scale DECIMAL so the cursor compares exactly
+        sql = f"""
+            SELECT t.*, a.account_name, c.name as category_name,
+                   CAST({Transaction.SEARCH_MATCH_SQL} AS DECIMAL(20,6)) as relevance
+            FROM Transactions t
+            LEFT JOIN Accounts a ON t.account_id = a.account_id
+            LEFT JOIN Categories c ON t.category_id = c.category_id
+            WHERE {where} AND {Transaction.SEARCH_MATCH_SQL}
+        """
+        sql_params = [query] + params + [query]
+        if after is not None:
+            after_relevance, after_id = after
+            sql += " HAVING relevance < %s OR (relevance = %s AND t.transaction_id < %s)"
+            sql_params += [after_relevance, after_relevance, after_id]
+        sql += " ORDER BY relevance DESC, t.transaction_id DESC LIMIT %s"
+        
+        db.execute(sql, sql_params + [per_page + 1])
+        rows = db.fetchall()
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_cursor(rows[-1]['relevance'], rows[-1]['transaction_id'])
+        
+        items = []
+        for row in rows:
+            item = Transaction.row_to_dict(row)
+            item['relevance'] = float(row['relevance'])
+            items.append(item)
+        
+        return {
+            'items': items,
+            'per_page': per_page,
+            'next_cursor': next_cursor,
+            'has_more': has_more
+        }
+    
+    EXPORT_COLUMNS = [
+        'transaction_id', 'transaction_date', 'transaction_time', 'account_id', 'account_name',
+        'category_id', 'category_name', 'transaction_type', 'amount', 'description', 'status', 'notes'
+    ]
+    
+    @staticmethod
+    def stream_export(user_id, start_date=None, end_date=None, category_id=None,
+                      account_id=None, transaction_type=None, batch_size=1000):
+        """Generator of row-tuple batches for exporting a user's ledger in EXPORT_COLUMNS order"""
+        # Filters are validated now so bad input fails before the response starts streaming
+        where, params = Transaction.build_filters(
+            user_id, start_date, end_date, category_id, account_id, transaction_type
+        )
+        query = f"""
+            SELECT t.transaction_id, t.transaction_date, t.transaction_time, t.account_id,
+                   a.account_name, t.category_id, c.name as category_name, t.transaction_type,
+                   t.amount, t.description, t.status, t.notes
+            FROM Transactions t
+            LEFT JOIN Accounts a ON t.account_id = a.account_id
+            LEFT JOIN Categories c ON t.category_id = c.category_id
+            WHERE {where}
+            ORDER BY {Transaction.LIST_ORDER}
+        """
+        
+        def batches():
+            db = get_db_connection()
+            if not db.connection:
+                raise Exception("No database connection")
+            yield from db.stream(query, params, batch_size)
+        
+        return batches()
+    
+    INSERT_COLUMNS = [
+        'user_id', 'account_id', 'category_id', 'transaction_date', 'transaction_time',
+        'amount', 'transaction_type', 'description', 'status', 'notes', 'fingerprint'
+    ]
+    
+    @staticmethod
+    def insert_many(db, rows):
+        """Insert row tuples (INSERT_COLUMNS order) as one multi-row INSERT, updating balances and rollups; the caller commits"""
+        if not rows:
+            return 0
+        query = f"""
+            INSERT INTO Transactions ({', '.join(Transaction.INSERT_COLUMNS)})
+            VALUES ({', '.join(['%s'] * len(Transaction.INSERT_COLUMNS))})
+        """
+        db.executemany(query, rows)
+        Account.apply_balance_deltas(db, Transaction.ledger_deltas(rows))
+        entries = Transaction.rollup_entries(rows)
+        MonthlyCategoryRollup.record_inserts(db, entries)
+        DailyRollup.apply(db, entries)
+        return len(rows)
+    
+    @staticmethod
+    def rollup_entries(rows):
+        """(user_id, date, type, category_id, amount) for row tuples that start with INSERT_COLUMNS"""
+        columns = Transaction.INSERT_COLUMNS
+        indexes = [columns.index(name) for name in ('user_id', 'transaction_date', 'transaction_type', 'category_id', 'amount')]
+        return [tuple(row[i] for i in indexes) for row in rows]
+    
+    @staticmethod
+    def ledger_deltas(rows):
+        """{(account_id, transaction_date): delta} for row tuples that start with INSERT_COLUMNS"""
+        columns = Transaction.INSERT_COLUMNS
+        account, day = columns.index('account_id'), columns.index('transaction_date')
+        amount, kind = columns.index('amount'), columns.index('transaction_type')
+        deltas = {}
+        for row in rows:
+            key = (row[account], _parse_date(row[day]))
+            deltas[key] = deltas.get(key, 0) + Account.signed_amount(row[kind], row[amount])
+        return deltas
+    
+    @staticmethod
+    def count_fingerprints(db, user_id, fingerprints):
+        """How many stored transactions match each fingerprint, in one IN (...) probe"""
+        fingerprints = list(set(fingerprints))
+        if not fingerprints:
+            return {}
+        query = f"""
+            SELECT fingerprint, COUNT(*) as count
+            FROM Transactions
+            WHERE user_id = %s AND fingerprint IN ({', '.join(['%s'] * len(fingerprints))})
+            GROUP BY fingerprint
+        """
+        db.execute(query, [user_id] + fingerprints)
+        return {row['fingerprint']: row['count'] for row in db.fetchall()}
+    
     @staticmethod
     def get_recent_transactions(user_id, limit=10, offset=0):
         """Get recent transactions for a user"""
@@ -93,114 +513,64 @@ class Transaction:
             return []
         
         try:
-            query = """
-                SELECT t.*, a.account_name, c.name as category_name
-                FROM Transactions t
-                LEFT JOIN Accounts a ON t.account_id = a.account_id
-                LEFT JOIN Categories c ON t.category_id = c.category_id
-                WHERE t.user_id = %s
-                ORDER BY t.transaction_date DESC, t.created_at DESC
-                LIMIT %s OFFSET %s
-            """
-            db.execute(query, (user_id, limit, offset))
-            rows = db.fetchall()
-            
-            transactions = []
-            for row in rows:
-                trans = Transaction(
-                    transaction_id=row['transaction_id'],
-                    user_id=row['user_id'],
-                    account_id=row['account_id'],
-                    category_id=row['category_id'],
-                    transaction_date=row['transaction_date'],
-                    amount=row['amount'],
-                    transaction_type=row['transaction_type'],
-                    description=row['description'],
-                    reference_number=row['reference_number'],
-                    is_recurring=row['is_recurring'],
-                    created_at=row['created_at'],
-                    updated_at=row['updated_at']
-                )
-                # Add extra fields for display
-                trans_dict = trans.to_dict()
-                trans_dict['account_name'] = row['account_name']
-                trans_dict['category_name'] = row['category_name']
-                transactions.append(trans_dict)
-            
-            return transactions
+            where, params = Transaction.build_filters(user_id)
+            rows = Transaction._fetch_page(db, where, params, limit, offset=offset)
+            return [Transaction.row_to_dict(row) for row in rows]
             
         except Exception as e:
             print(f"Error getting transactions: {e}")
             return []
     
     @staticmethod
-    def get_transaction_summary(user_id, period='month'):
-        """Get transaction summary (income, expenses, etc.)"""
+    def get_transaction_summary(user_id, period='month', compare='previous', days=None):
+        """Get transaction summary (income, expenses, trend vs. a comparison period)"""
+        empty_summary = {
+            'total_income': 0.00,
+            'total_expense': 0.00,
+            'net_income': 0.00,
+            'income_trend': 0.0,
+            'expense_trend': 0.0,
+            'period': period
+        }
+        
         db = get_db_connection()
         if not db.connection:
-            return {
-                'total_income': 0.00,
-                'total_expense': 0.00,
-                'net_income': 0.00,
-                'income_trend': 0.0,
-                'expense_trend': 0.0,
-                'period': period
-            }
+            return empty_summary
         
         try:
-            # Get current period data
-            if period == 'month':
-                current_query = """
-                    SELECT 
-                        SUM(CASE WHEN t.transaction_type = 'income' THEN t.amount ELSE 0 END) as income,
-                        SUM(CASE WHEN t.transaction_type = 'expense' THEN ABS(t.amount) ELSE 0 END) as expense
-                    FROM Transactions t
-                    JOIN Accounts a ON t.account_id = a.account_id
-                    WHERE a.user_id = %s 
-                    AND MONTH(t.transaction_date) = MONTH(CURRENT_DATE())
-                    AND YEAR(t.transaction_date) = YEAR(CURRENT_DATE())
-                """
-                previous_query = """
-                    SELECT 
-                        SUM(CASE WHEN t.transaction_type = 'income' THEN t.amount ELSE 0 END) as income,
-                        SUM(CASE WHEN t.transaction_type = 'expense' THEN t.amount ELSE 0 END) as expense
-                    FROM Transactions t
-                    JOIN Accounts a ON t.account_id = a.account_id
-                    WHERE a.user_id = %s 
-                    AND MONTH(t.transaction_date) = MONTH(DATE_SUB(CURRENT_DATE(), INTERVAL 1 MONTH))
-                    AND YEAR(t.transaction_date) = YEAR(DATE_SUB(CURRENT_DATE(), INTERVAL 1 MONTH))
-                """
-            else:  # Default to year
-                current_query = """
-                    SELECT 
-                        SUM(CASE WHEN t.transaction_type = 'income' THEN t.amount ELSE 0 END) as income,
-                        SUM(CASE WHEN t.transaction_type = 'expense' THEN t.amount ELSE 0 END) as expense
-                    FROM Transactions t
-                    JOIN Accounts a ON t.account_id = a.account_id
-                    WHERE a.user_id = %s 
-                    AND YEAR(t.transaction_date) = YEAR(CURRENT_DATE())
-                """
-                previous_query = """
-                    SELECT 
-                        SUM(CASE WHEN t.transaction_type = 'income' THEN t.amount ELSE 0 END) as income,
-                        SUM(CASE WHEN t.transaction_type = 'expense' THEN t.amount ELSE 0 END) as expense
-                    FROM Transactions t
-                    JOIN Accounts a ON t.account_id = a.account_id
-                    WHERE a.user_id = %s 
-                    AND YEAR(t.transaction_date) = YEAR(DATE_SUB(CURRENT_DATE(), INTERVAL 1 YEAR))
-                """
+            if period not in ('week', 'month', 'quarter', 'year', 'days'):
+                period = 'year'
+                empty_summary['period'] = period
+            (current_start, current_end), (previous_start, previous_end) = comparison_ranges(
+                period, compare, days
+            )
             
-            # Get current period
-            db.execute(current_query, (user_id,))
-            current = db.fetchone()
-            current_income = float(current['income']) if current['income'] else 0.00
-            current_expense = float(current['expense']) if current['expense'] else 0.00
+            # One pass over both windows: the OR of two ranges on the same index
+            # prefix is read as two index range scans, and CASE splits the sums.
+            query = """
+                SELECT 
+                    SUM(CASE WHEN transaction_date >= %s AND transaction_date < %s
+                             AND transaction_type = 'income' THEN ABS(amount) ELSE 0 END) as current_income,
+                    SUM(CASE WHEN transaction_date >= %s AND transaction_date < %s
+                             AND transaction_type = 'expense' THEN ABS(amount) ELSE 0 END) as current_expense,
+                    SUM(CASE WHEN transaction_date >= %s AND transaction_date < %s
+                             AND transaction_type = 'income' THEN ABS(amount) ELSE 0 END) as previous_income,
+                    SUM(CASE WHEN transaction_date >= %s AND transaction_date < %s
+                             AND transaction_type = 'expense' THEN ABS(amount) ELSE 0 END) as previous_expense
+                FROM Transactions
+                WHERE user_id = %s 
+                AND ((transaction_date >= %s AND transaction_date < %s)
+                     OR (transaction_date >= %s AND transaction_date < %s))
+            """
+            current = (current_start, current_end)
+            previous = (previous_start, previous_end)
+            db.execute(query, current + current + previous + previous + (user_id,) + current + previous)
+            row = db.fetchone() or {}
             
-            # Get previous period for trend calculation
-            db.execute(previous_query, (user_id,))
-            previous = db.fetchone()
-            previous_income = float(previous['income']) if previous['income'] else 0.00
-            previous_expense = float(previous['expense']) if previous['expense'] else 0.00
+            current_income = float(row.get('current_income') or 0)
+            current_expense = float(row.get('current_expense') or 0)
+            previous_income = float(row.get('previous_income') or 0)
+            previous_expense = float(row.get('previous_expense') or 0)
             
             # Calculate trends
             income_trend = 0.0
@@ -217,19 +587,15 @@ class Transaction:
                 'net_income': current_income - current_expense,
                 'income_trend': round(income_trend, 1),
                 'expense_trend': round(expense_trend, 1),
-                'period': period
+                'period': period,
+                'compare': compare,
+                'current_period': {'start': current_start.isoformat(), 'end': current_end.isoformat()},
+                'previous_period': {'start': previous_start.isoformat(), 'end': previous_end.isoformat()}
             }
             
         except Exception as e:
             print(f"Error getting transaction summary: {e}")
-            return {
-                'total_income': 0.00,
-                'total_expense': 0.00,
-                'net_income': 0.00,
-                'income_trend': 0.0,
-                'expense_trend': 0.0,
-                'period': period
-            }
+            return empty_summary
     
     @staticmethod
     def get_count(user_id):
@@ -241,9 +607,8 @@ class Transaction:
         try:
             query = """
                 SELECT COUNT(*) as count 
-                FROM Transactions t
-                JOIN Accounts a ON t.account_id = a.account_id
-                WHERE a.user_id = %s
+                FROM Transactions
+                WHERE user_id = %s
             """
             db.execute(query, (user_id,))
             result = db.fetchone()
@@ -255,7 +620,7 @@ class Transaction:
     
     @staticmethod
     def get_summary_for_period(user_id, start_date, end_date):
-        """Get transaction summary for a specific period"""
+        """Get transaction summary for the half-open period [start_date, end_date)"""
         db = get_db_connection()
         if not db.connection:
             return {'total_income': 0, 'total_expenses': 0, 'net_income': 0, 'transaction_count': 0}
@@ -263,11 +628,11 @@ class Transaction:
         try:
             query = """
                 SELECT 
-                    SUM(CASE WHEN transaction_type = 'income' THEN amount ELSE 0 END) as total_income,
-                    SUM(CASE WHEN transaction_type = 'expense' THEN amount ELSE 0 END) as total_expenses,
+                    SUM(CASE WHEN transaction_type = 'income' THEN ABS(amount) ELSE 0 END) as total_income,
+                    SUM(CASE WHEN transaction_type = 'expense' THEN ABS(amount) ELSE 0 END) as total_expenses,
                     COUNT(*) as transaction_count
                 FROM Transactions 
-                WHERE user_id = %s AND transaction_date BETWEEN %s AND %s
+                WHERE user_id = %s AND transaction_date >= %s AND transaction_date < %s
             """
             db.execute(query, (user_id, start_date, end_date))
             result = db.fetchone()
@@ -297,38 +662,40 @@ class Transaction:
         
         try:
             # Calculate date range based on period
-            end_date = datetime.now()
             if period == 'month':
-                start_date = end_date - timedelta(days=30)
+                start_date, end_date = rolling_range(30)
             elif period == 'week':
-                start_date = end_date - timedelta(days=7)
+                start_date, end_date = rolling_range(7)
             elif period == 'year':
-                start_date = end_date - timedelta(days=365)
+                start_date, end_date = rolling_range(365)
             else:
-                start_date = datetime(end_date.year, end_date.month, 1)
+                start_date, end_date = period_range('month')
             
-            query = """
+            # Aggregate the user's expenses (split-aware), then attach category names
+            query = f"""
                 SELECT 
                     c.category_id,
-                    c.category_name,
-                    c.category_type,
-                    c.icon,
-                    SUM(t.amount) as total_amount,
-                    COUNT(t.transaction_id) as transaction_count
-                FROM Categories c
-                LEFT JOIN Transactions t ON c.category_id = t.category_id
-                LEFT JOIN Accounts a ON t.account_id = a.account_id
-                WHERE (c.user_id = %s OR c.is_default = 1)
-                    AND (t.transaction_id IS NULL OR 
-                         (a.user_id = %s 
-                          AND t.transaction_date BETWEEN %s AND %s
-                          AND t.transaction_type = 'expense'))
-                GROUP BY c.category_id, c.category_name, c.category_type, c.icon
-                HAVING total_amount > 0
-                ORDER BY total_amount DESC
+                    c.name as category_name,
+                    c.type as category_type,
+                    agg.total_amount,
+                    agg.transaction_count
+                FROM (
+                    SELECT {Transaction.SPLIT_CATEGORY_SQL} as category_id,
+                           SUM({Transaction.SPLIT_AMOUNT_SQL}) as total_amount,
+                           COUNT(DISTINCT t.transaction_id) as transaction_count
+                    FROM Transactions t
+                    {Transaction.SPLIT_JOIN_SQL}
+                    WHERE t.user_id = %s
+                        AND t.transaction_date >= %s AND t.transaction_date < %s
+                        AND t.transaction_type = 'expense'
+                    GROUP BY {Transaction.SPLIT_CATEGORY_SQL}
+                ) agg
+                INNER JOIN Categories c ON c.category_id = agg.category_id
+                WHERE agg.total_amount > 0
+                ORDER BY agg.total_amount DESC
             """
             
-            db.execute(query, (user_id, user_id, start_date, end_date))
+            db.execute(query, (user_id, start_date, end_date))
             results = db.fetchall()
             
             categories = []
@@ -337,7 +704,7 @@ class Transaction:
                     'category_id': row['category_id'],
                     'category_name': row['category_name'],
                     'category_type': row['category_type'],
-                    'icon': row['icon'],
+                    'icon': row.get('icon'),
                     'total_amount': float(row['total_amount'] or 0),
                     'transaction_count': row['transaction_count']
                 })
@@ -357,11 +724,11 @@ class Transaction:
         
         try:
             query = """
-                SELECT t.*, a.account_name, c.category_name, a.user_id
+                SELECT t.*, a.account_name, c.name as category_name
                 FROM Transactions t
                 LEFT JOIN Accounts a ON t.account_id = a.account_id
                 LEFT JOIN Categories c ON t.category_id = c.category_id
-                WHERE t.transaction_id = %s AND a.user_id = %s
+                WHERE t.transaction_id = %s AND t.user_id = %s
             """
             db.execute(query, (transaction_id, user_id))
             row = db.fetchone()
@@ -396,13 +763,33 @@ class Transaction:
             raise Exception("No database connection")
         
         try:
+            db.execute(
+                """SELECT account_id, transaction_date, amount, transaction_type FROM Transactions
+                   WHERE transaction_id = %s AND user_id = %s FOR UPDATE""",
+                (self.transaction_id, self.user_id)
+            )
+            row = db.fetchone()
+            if not row:
+                db.rollback()
+                return False
+            
             query = """
-                DELETE t FROM Transactions t
-                JOIN Accounts a ON t.account_id = a.account_id
-                WHERE t.transaction_id = %s AND a.user_id = %s
+                DELETE FROM Transactions
+                WHERE transaction_id = %s AND user_id = %s
             """
             db.execute(query, (self.transaction_id, self.user_id))
+            Account.apply_balance_deltas(db, {
+                (row['account_id'], row['transaction_date']): -Account.signed_amount(row['transaction_type'], row['amount'])
+            })
+            MonthlyCategoryRollup.refresh_months(db, self.user_id, [row['transaction_date']])
+            DailyRollup.apply(db, [(self.user_id, row['transaction_date'], row['transaction_type'],
+                                    None, row['amount'])], sign=-1)
+            DashboardSnapshot.add_totals(db, [(self.user_id, row['transaction_date'], row['transaction_type'],
+                                               None, -row['amount'], -1)])
             db.commit()
+            Transaction.invalidate_count_cache(self.user_id)
+            DashboardSnapshot.after_write(self.user_id)
+            event_bus.publish(self.user_id, 'transaction', {'action': 'deleted', 'transaction_id': self.transaction_id})
             return True
             
         except Exception as e:
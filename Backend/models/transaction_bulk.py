@@ -0,0 +1,234 @@
+from datetime import date
+from config.db import get_db_connection
+from models.account import Account
+from models.daily_rollup import DailyRollup
+from models.dashboard_snapshot import DashboardSnapshot
+from models.monthly_rollup import MonthlyCategoryRollup
+from models.transaction import Transaction
+from utils.event_bus import event_bus
+
+class TransactionBulk:
+    """Set-based bulk update/delete of a user's transactions, chunked inside one DB transaction"""
+    
+    CHUNK_SIZE = 1000
+    MAX_IDS = 100000
+    # amount is deliberately absent: TransactionSplits rows must keep adding up to it
+    UPDATABLE_FIELDS = ('category_id', 'account_id', 'transaction_type', 'transaction_date',
+                        'status', 'description', 'notes')
+    # Changing these moves money between accounts or days, so balances and snapshots must be adjusted
+    BALANCE_FIELDS = ('account_id', 'transaction_type', 'transaction_date')
+    # Changing these moves amounts between MonthlyCategoryRollup rows
+    ROLLUP_FIELDS = ('category_id', 'transaction_type', 'transaction_date')
+    # Changing these moves amounts between DailyRollup rows
+    DAILY_FIELDS = ('transaction_type', 'transaction_date')
+    # Changing these changes the duplicate-detection fingerprint
+    FINGERPRINT_FIELDS = ('account_id', 'transaction_type', 'transaction_date', 'description')
+    
+    @staticmethod
+    def _chunks(ids, size):
+        for i in range(0, len(ids), size):
+            yield ids[i:i + size]
+    
+    @staticmethod
+    def resolve_ids(db, user_id, ids=None, filters=None):
+        """Lock and return the user's transaction IDs selected by an ID list or a filter set"""
+        if ids is not None:
+            ids = sorted({int(i) for i in ids})
+            if len(ids) > TransactionBulk.MAX_IDS:
+                raise ValueError(f'At most {TransactionBulk.MAX_IDS} transactions per request')
+            owned = []
+            for chunk in TransactionBulk._chunks(ids, TransactionBulk.CHUNK_SIZE):
+                db.execute(
+                    f"""SELECT transaction_id FROM Transactions
+                        WHERE user_id = %s AND transaction_id IN ({', '.join(['%s'] * len(chunk))})
+                        FOR UPDATE""",
+                    [user_id] + chunk
+                )
+                owned.extend(row['transaction_id'] for row in db.fetchall())
+            return owned
+        
+        if not filters:
+            raise ValueError('ids or filter is required')
+        where, params = Transaction.build_filters(
+            user_id,
+            filters.get('start_date'),
+            filters.get('end_date'),
+            filters.get('category_id'),
+            filters.get('account_id'),
+            filters.get('type')
+        )
+        db.execute(
+            f"SELECT t.transaction_id FROM Transactions t WHERE {where} LIMIT %s FOR UPDATE",
+            params + [TransactionBulk.MAX_IDS + 1]
+        )
+        found = [row['transaction_id'] for row in db.fetchall()]
+        if len(found) > TransactionBulk.MAX_IDS:
+            raise ValueError(f'Filter matches more than {TransactionBulk.MAX_IDS} transactions')
+        return found
+    
+    @staticmethod
+    def _ledger_sums(db, user_id, chunk):
+        """Signed totals of a chunk of transactions per (account, date)"""
+        db.execute(
+            f"""SELECT account_id, transaction_date, SUM({Account.SIGNED_AMOUNT_SQL.format(p='')}) as total
+                FROM Transactions
+                WHERE user_id = %s AND transaction_id IN ({', '.join(['%s'] * len(chunk))})
+                GROUP BY account_id, transaction_date""",
+            [user_id] + chunk
+        )
+        return {(row['account_id'], row['transaction_date']): row['total'] or 0 for row in db.fetchall()}
+    
+    @staticmethod
+    def _months(db, user_id, chunk):
+        """Distinct months of a chunk of transactions"""
+        db.execute(
+            f"""SELECT DISTINCT DATE_SUB(transaction_date, INTERVAL DAYOFMONTH(transaction_date) - 1 DAY) as month
+                FROM Transactions
+                WHERE user_id = %s AND transaction_id IN ({', '.join(['%s'] * len(chunk))})""",
+            [user_id] + chunk
+        )
+        return {row['month'] for row in db.fetchall()}
+    
+    @staticmethod
+    def _daily_sums(db, user_id, chunk):
+        """DailyRollup entries (user_id, date, type, None, total, count) for a chunk of transactions"""
+        db.execute(
+            f"""SELECT transaction_date, transaction_type, SUM(ABS(amount)) as total, COUNT(*) as count
+                FROM Transactions
+                WHERE user_id = %s AND transaction_id IN ({', '.join(['%s'] * len(chunk))})
+                GROUP BY transaction_date, transaction_type""",
+            [user_id] + chunk
+        )
+        return [(user_id, row['transaction_date'], row['transaction_type'], None, row['total'], row['count'])
+                for row in db.fetchall()]
+    
+    @staticmethod
+    def _negate(entries):
+        """Daily sum entries turned into removals for DashboardSnapshot.add_totals"""
+        return [entry[:4] + (-entry[4], -entry[5]) for entry in entries]
+    
+    @staticmethod
+    def _validate_changes(db, user_id, changes):
+        """Keep only updatable fields and check referenced accounts/categories belong to the user"""
+        changes = {k: v for k, v in (changes or {}).items() if k in TransactionBulk.UPDATABLE_FIELDS}
+        if not changes:
+            raise ValueError(f"No updatable fields (allowed: {', '.join(TransactionBulk.UPDATABLE_FIELDS)})")
+        
+        if 'transaction_type' in changes and changes['transaction_type'] not in ('income', 'expense', 'transfer'):
+            raise ValueError('transaction_type must be income, expense or transfer')
+        if 'transaction_date' in changes:
+            try:
+                changes['transaction_date'] = date.fromisoformat(str(changes['transaction_date']))
+            except ValueError:
+                raise ValueError('transaction_date must be a date in YYYY-MM-DD format')
+        if changes.get('account_id') is not None:
+            db.execute("SELECT 1 FROM Accounts WHERE account_id = %s AND user_id = %s",
+                       (changes['account_id'], user_id))
+            if not db.fetchall():
+                raise ValueError('Account not found')
+        if changes.get('category_id') is not None:
+            db.execute("SELECT 1 FROM Categories WHERE category_id = %s AND user_id = %s",
+                       (changes['category_id'], user_id))
+            if not db.fetchall():
+                raise ValueError('Category not found')
+        return changes
+    
+    @staticmethod
+    def update(user_id, changes, ids=None, filters=None):
+        """Apply the same field changes to many transactions; returns the matched and changed counts"""
+        db = get_db_connection()
+        if not db.connection:
+            raise Exception("No database connection")
+        
+        try:
+            changes = TransactionBulk._validate_changes(db, user_id, changes)
+            target_ids = TransactionBulk.resolve_ids(db, user_id, ids, filters)
+            
+            assignments = [f"{field} = %s" for field in changes]
+            if any(field in changes for field in TransactionBulk.FINGERPRINT_FIELDS):
+                # Assignments run left to right, so this sees the new values
+                assignments.append(f"fingerprint = {Transaction.FINGERPRINT_SQL.format(p='')}")
+            affects_balances = any(field in changes for field in TransactionBulk.BALANCE_FIELDS)
+            affects_rollups = any(field in changes for field in TransactionBulk.ROLLUP_FIELDS)
+            affects_daily = any(field in changes for field in TransactionBulk.DAILY_FIELDS)
+            
+            updated = 0
+            deltas = {}
+            months = set()
+            snapshot_entries = []
+            if affects_rollups and target_ids and 'transaction_date' in changes:
+                months.add(changes['transaction_date'])
+            for chunk in TransactionBulk._chunks(target_ids, TransactionBulk.CHUNK_SIZE):
+                before = TransactionBulk._ledger_sums(db, user_id, chunk) if affects_balances else {}
+                if affects_rollups:
+                    months |= TransactionBulk._months(db, user_id, chunk)
+                if affects_daily:
+                    removed = TransactionBulk._daily_sums(db, user_id, chunk)
+                    DailyRollup.apply(db, removed, sign=-1)
+                    snapshot_entries.extend(TransactionBulk._negate(removed))
+                db.execute(
+                    f"""UPDATE Transactions SET {', '.join(assignments)}
+                        WHERE user_id = %s AND transaction_id IN ({', '.join(['%s'] * len(chunk))})""",
+                    list(changes.values()) + [user_id] + chunk
+                )
+                updated += db.cursor.rowcount
+                if affects_daily:
+                    added = TransactionBulk._daily_sums(db, user_id, chunk)
+                    DailyRollup.apply(db, added)
+                    snapshot_entries.extend(added)
+                if affects_balances:
+                    after = TransactionBulk._ledger_sums(db, user_id, chunk)
+                    for key in set(before) | set(after):
+                        deltas[key] = deltas.get(key, 0) + after.get(key, 0) - before.get(key, 0)
+            
+            accounts_adjusted = Account.apply_balance_deltas(db, deltas)
+            MonthlyCategoryRollup.refresh_months(db, user_id, months)
+            DashboardSnapshot.add_totals(db, snapshot_entries)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            raise e
+        
+        Transaction.invalidate_count_cache(user_id)
+        DashboardSnapshot.after_write(user_id)
+        event_bus.publish(user_id, 'transactions', {'action': 'updated', 'count': updated})
+        return {'matched': len(target_ids), 'updated': updated, 'accounts_adjusted': accounts_adjusted}
+    
+    @staticmethod
+    def delete(user_id, ids=None, filters=None):
+        """Delete many transactions and reverse their effect on account balances"""
+        db = get_db_connection()
+        if not db.connection:
+            raise Exception("No database connection")
+        
+        try:
+            target_ids = TransactionBulk.resolve_ids(db, user_id, ids, filters)
+            
+            deleted = 0
+            deltas = {}
+            snapshot_entries = []
+            for chunk in TransactionBulk._chunks(target_ids, TransactionBulk.CHUNK_SIZE):
+                for key, total in TransactionBulk._ledger_sums(db, user_id, chunk).items():
+                    deltas[key] = deltas.get(key, 0) - total
+                removed = TransactionBulk._daily_sums(db, user_id, chunk)
+                DailyRollup.apply(db, removed, sign=-1)
+                snapshot_entries.extend(TransactionBulk._negate(removed))
+                db.execute(
+                    f"""DELETE FROM Transactions
+                        WHERE user_id = %s AND transaction_id IN ({', '.join(['%s'] * len(chunk))})""",
+                    [user_id] + chunk
+                )
+                deleted += db.cursor.rowcount
+            
+            accounts_adjusted = Account.apply_balance_deltas(db, deltas)
+            MonthlyCategoryRollup.refresh_months(db, user_id, [day for _, day in deltas])
+            DashboardSnapshot.add_totals(db, snapshot_entries)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            raise e
+        
+        Transaction.invalidate_count_cache(user_id)
+        DashboardSnapshot.after_write(user_id)
+        event_bus.publish(user_id, 'transactions', {'action': 'deleted', 'count': deleted})
+        return {'matched': len(target_ids), 'deleted': deleted, 'accounts_adjusted': accounts_adjusted}
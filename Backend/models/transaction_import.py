@@ -0,0 +1,203 @@
+import mysql.connector
+from config.db import get_db_connection
+from models.dashboard_snapshot import DashboardSnapshot
+from models.transaction import Transaction
+from utils.importers import parse_date, parse_amount
+from utils.event_bus import event_bus
+
+TYPE_ALIASES = {
+    'income': 'income', 'credit': 'income', 'deposit': 'income',
+    'expense': 'expense', 'debit': 'expense', 'withdrawal': 'expense', 'payment': 'expense',
+    'transfer': 'transfer', 'xfer': 'transfer'
+}
+
+class TransactionImport:
+    """Bulk import pipeline: validate parsed records, resolve names in memory, insert in multi-row batches"""
+    
+    CHUNK_SIZE = 1000
+    MAX_REPORTED_ERRORS = 1000
+    
+    def __init__(self, user_id, default_account_id=None, chunk_size=CHUNK_SIZE, skip_duplicates=True):
+        self.user_id = user_id
+        self.default_account_id = default_account_id
+        self.chunk_size = chunk_size
+        self.skip_duplicates = skip_duplicates
+        self.rows = 0
+        self.imported = 0
+        self.duplicates = 0
+        self.error_count = 0
+        self.errors = []
+        self._account_ids = set()
+        self._accounts_by_name = {}
+        self._categories_by_id = {}
+        self._categories_by_name = {}
+        # Per fingerprint: rows this run inserted, and pre-existing rows already matched
+        self._inserted = {}
+        self._matched = {}
+    
+    def load_lookups(self, db):
+        """Load the user's accounts and categories once so rows resolve without queries"""
+        db.execute("SELECT account_id, account_name FROM Accounts WHERE user_id = %s", (self.user_id,))
+        for row in db.fetchall():
+            self._account_ids.add(row['account_id'])
+            self._accounts_by_name[(row['account_name'] or '').strip().lower()] = row['account_id']
+        
+        db.execute("SELECT category_id, name, type FROM Categories WHERE user_id = %s", (self.user_id,))
+        for row in db.fetchall():
+            self._categories_by_id[row['category_id']] = row['type']
+            self._categories_by_name[(row['name'] or '').strip().lower()] = (row['category_id'], row['type'])
+    
+    def _resolve_account(self, value):
+        value = (value or '').strip()
+        if not value:
+            if self.default_account_id in self._account_ids:
+                return self.default_account_id
+            raise ValueError('account is required (pass a default account_id or an account column)')
+        if value.isdigit() and int(value) in self._account_ids:
+            return int(value)
+        account_id = self._accounts_by_name.get(value.lower())
+        if account_id is None:
+            raise ValueError(f'unknown account: {value}')
+        return account_id
+    
+    def _resolve_category(self, value):
+        value = (value or '').strip()
+        if not value:
+            return None, None
+        if value.isdigit() and int(value) in self._categories_by_id:
+            return int(value), self._categories_by_id[int(value)]
+        category = self._categories_by_name.get(value.lower())
+        if category is None:
+            raise ValueError(f'unknown category: {value}')
+        return category
+    
+    def prepare(self, record):
+        """Validate one parsed record and return its INSERT_COLUMNS tuple"""
+        transaction_date = parse_date(record.get('date'))
+        amount = parse_amount(record.get('amount'))
+        
+        raw_type = (record.get('type') or '').strip().lower()
+        if raw_type:
+            transaction_type = TYPE_ALIASES.get(raw_type)
+            if transaction_type is None:
+                raise ValueError(f'invalid transaction type: {raw_type}')
+        else:
+            transaction_type = None
+        
+        account_id = self._resolve_account(record.get('account'))
+        category_id, category_type = self._resolve_category(record.get('category'))
+        
+        # Without an explicit type, use the category's type, then the amount's sign
+        if transaction_type is None:
+            transaction_type = category_type or ('expense' if amount < 0 else 'income')
+        
+        amount = abs(amount)
+        description = record.get('description') or None
+        fingerprint = Transaction.compute_fingerprint(
+            account_id, transaction_date, amount, transaction_type, description
+        )
+        
+        return (
+            self.user_id, account_id, category_id, transaction_date, None,
+            amount, transaction_type, description, 'completed',
+            record.get('notes') or None, fingerprint
+        )
+    
+    def _error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < self.MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'error': message})
+    
+    def _dedupe(self, db, chunk):
+        """Drop rows that are already stored, probing the whole chunk with one query"""
+        stored = Transaction.count_fingerprints(db, self.user_id, [values[-1] for _, values in chunk])
+        fresh = []
+        for line, values in chunk:
+            fingerprint = values[-1]
+            # Identical rows are legitimate (two coffees), so match them one-for-one
+            # against rows that existed before this import started
+            preexisting = stored.get(fingerprint, 0) - self._inserted.get(fingerprint, 0)
+            if self._matched.get(fingerprint, 0) < preexisting:
+                self._matched[fingerprint] = self._matched.get(fingerprint, 0) + 1
+                self.duplicates += 1
+            else:
+                fresh.append((line, values))
+        return fresh
+    
+    def _record_inserted(self, rows):
+        self.imported += len(rows)
+        for _, values in rows:
+            self._inserted[values[-1]] = self._inserted.get(values[-1], 0) + 1
+    
+    def _flush(self, db, chunk):
+        """Insert one chunk in its own transaction, isolating bad rows if the batch fails"""
+        if self.skip_duplicates:
+            chunk = self._dedupe(db, chunk)
+            if not chunk:
+                return
+        
+        try:
+            Transaction.insert_many(db, [values for _, values in chunk])
+            DashboardSnapshot.add_totals(db, Transaction.rollup_entries([values for _, values in chunk]))
+            db.commit()
+            self._record_inserted(chunk)
+            return
+        except mysql.connector.Error as err:
+            print(f"Batch insert failed ({err}), retrying rows individually")
+            db.rollback()
+        
+        # Each row also updates balances and rollups; a savepoint undoes all of a failed row's writes
+        inserted = []
+        for line, values in chunk:
+            db.execute("SAVEPOINT import_row")
+            try:
+                Transaction.insert_many(db, [values])
+                db.execute("RELEASE SAVEPOINT import_row")
+                inserted.append((line, values))
+            except mysql.connector.Error as err:
+                db.execute("ROLLBACK TO SAVEPOINT import_row")
+                self._error(line, str(err))
+        DashboardSnapshot.add_totals(db, Transaction.rollup_entries([values for _, values in inserted]))
+        db.commit()
+        self._record_inserted(inserted)
+    
+    def run(self, records):
+        """Import (line_number, record) pairs from a parser and return the summary"""
+        db = get_db_connection()
+        if not db.connection:
+            raise Exception("No database connection")
+        
+        self.load_lookups(db)
+        
+        chunk = []
+        try:
+            for line, record in records:
+                self.rows += 1
+                try:
+                    chunk.append((line, self.prepare(record)))
+                except ValueError as e:
+                    self._error(line, str(e))
+                    continue
+                
+                if len(chunk) >= self.chunk_size:
+                    self._flush(db, chunk)
+                    chunk = []
+            
+            if chunk:
+                self._flush(db, chunk)
+        finally:
+            if self.imported:
+                Transaction.invalidate_count_cache(self.user_id)
+                DashboardSnapshot.after_write(self.user_id)
+                event_bus.publish(self.user_id, 'transactions', {'action': 'imported', 'count': self.imported})
+        
+        return self.summary()
+    
+    def summary(self):
+        return {
+            'rows': self.rows,
+            'imported': self.imported,
+            'duplicates': self.duplicates,
+            'failed': self.error_count,
+            'errors': self.errors
+        }
@@ -0,0 +1,185 @@
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from config.db import get_db_connection
+from models.dashboard_snapshot import DashboardSnapshot
+from models.monthly_rollup import MonthlyCategoryRollup
+from utils.event_bus import event_bus
+
+class TransactionSplit:
+    """A share of one transaction attributed to a category (TransactionSplits table)"""
+    
+    INSERT_COLUMNS = ('transaction_id', 'category_id', 'amount', 'description')
+    
+    def __init__(self, split_id=None, transaction_id=None, category_id=None, amount=None,
+                 description=None, category_name=None):
+        self.split_id = split_id
+        self.transaction_id = transaction_id
+        self.category_id = category_id
+        self.amount = amount
+        self.description = description
+        self.category_name = category_name
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'split_id': self.split_id,
+            'transaction_id': self.transaction_id,
+            'category_id': self.category_id,
+            'category_name': self.category_name,
+            'amount': float(self.amount) if self.amount is not None else 0.0,
+            'description': self.description
+        }
+    
+    @staticmethod
+    def get_by_transaction(transaction_id, user_id):
+        """Splits of one of the user's transactions, in insertion order"""
+        db = get_db_connection()
+        if not db.connection:
+            return []
+        
+        try:
+            query = """
+                SELECT s.*, c.name as category_name
+                FROM TransactionSplits s
+                INNER JOIN Transactions t ON t.transaction_id = s.transaction_id
+                LEFT JOIN Categories c ON c.category_id = s.category_id
+                WHERE s.transaction_id = %s AND t.user_id = %s
+                ORDER BY s.split_id
+            """
+            db.execute(query, (transaction_id, user_id))
+            return [TransactionSplit(**row) for row in db.fetchall()]
+            
+        except Exception as e:
+            print(f"Error getting transaction splits: {e}")
+            return []
+    
+    @staticmethod
+    def _parse(splits):
+        """Validate request split dicts into (category_id, amount, description) tuples"""
+        if not isinstance(splits, list) or not splits:
+            raise ValueError('splits must be a non-empty list')
+        
+        parsed = []
+        for index, split in enumerate(splits, 1):
+            if not isinstance(split, dict) or 'category_id' not in split or 'amount' not in split:
+                raise ValueError(f'split {index}: category_id and amount are required')
+            try:
+                # Round like the DECIMAL column (half away from zero) so sums match stored amounts
+                amount = Decimal(str(split['amount'])).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+            except InvalidOperation:
+                raise ValueError(f"split {index}: invalid amount")
+            if amount == 0:
+                raise ValueError(f'split {index}: amount must not be zero')
+            parsed.append((int(split['category_id']), amount, split.get('description')))
+        return parsed
+    
+    @staticmethod
+    def replace_for_transaction(transaction_id, user_id, splits):
+        """Replace a transaction's splits; amounts must add up to the transaction amount"""
+        parsed = TransactionSplit._parse(splits)
+        
+        db = get_db_connection()
+        if not db.connection:
+            raise Exception("No database connection")
+        
+        try:
+            db.execute(
+                "SELECT amount, transaction_date FROM Transactions WHERE transaction_id = %s AND user_id = %s FOR UPDATE",
+                (transaction_id, user_id)
+            )
+            transaction = db.fetchone()
+            if not transaction:
+                raise ValueError('Transaction not found')
+            
+            # Splits take the transaction's sign so aggregates can sum either column
+            transaction_amount = Decimal(transaction['amount'])
+            sign = -1 if transaction_amount < 0 else 1
+            parsed = [(category_id, sign * abs(amount), description)
+                      for category_id, amount, description in parsed]
+            total = sum(amount for _, amount, _ in parsed)
+            if total != transaction_amount:
+                raise ValueError(f"Split amounts add up to {abs(total)}, transaction amount is {abs(transaction_amount)}")
+            
+            category_ids = sorted({category_id for category_id, _, _ in parsed})
+            db.execute(
+                f"""SELECT COUNT(*) as owned FROM Categories
+                    WHERE user_id = %s AND category_id IN ({', '.join(['%s'] * len(category_ids))})""",
+                [user_id] + category_ids
+            )
+            if db.fetchone()['owned'] != len(category_ids):
+                raise ValueError('Category not found')
+            
+            db.execute("DELETE FROM TransactionSplits WHERE transaction_id = %s", (transaction_id,))
+            # mysql.connector sends this as a single multi-row INSERT
+            db.executemany(
+                f"""INSERT INTO TransactionSplits ({', '.join(TransactionSplit.INSERT_COLUMNS)})
+                    VALUES ({', '.join(['%s'] * len(TransactionSplit.INSERT_COLUMNS))})""",
+                [(transaction_id, category_id, amount, description)
+                 for category_id, amount, description in parsed]
+            )
+            MonthlyCategoryRollup.refresh_months(db, user_id, [transaction['transaction_date']])
+            db.commit()
+            DashboardSnapshot.after_write(user_id)
+            event_bus.publish(user_id, 'transaction', {'action': 'split', 'transaction_id': transaction_id})
+            
+        except Exception as e:
+            db.rollback()
+            raise e
+        
+        return TransactionSplit.get_by_transaction(transaction_id, user_id)
+    
+    @staticmethod
+    def rescale(db, transaction_id, old_amount, new_amount):
+        """Scale a transaction's splits to a new amount so they still add up to it; the caller locks the row and commits"""
+        db.execute(
+            "SELECT split_id, amount FROM TransactionSplits WHERE transaction_id = %s ORDER BY split_id FOR UPDATE",
+            (transaction_id,)
+        )
+        splits = db.fetchall()
+        old_amount, new_amount = Decimal(str(old_amount)), Decimal(str(new_amount))
+        if not splits or old_amount == new_amount:
+            return 0
+        if new_amount == 0:
+            raise ValueError('Remove the splits before setting the amount of a split transaction to zero')
+        
+        # Keep each split's share; the last split takes the rounding remainder
+        ratio = new_amount / old_amount
+        amounts = [(Decimal(split['amount']) * ratio).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+                   for split in splits]
+        amounts[-1] += new_amount - sum(amounts)
+        if any(amount == 0 or (amount < 0) != (new_amount < 0) for amount in amounts):
+            raise ValueError('Splits cannot be rescaled to this amount; update the splits first')
+        
+        for split, amount in zip(splits, amounts):
+            db.execute("UPDATE TransactionSplits SET amount = %s WHERE split_id = %s", (amount, split['split_id']))
+        return len(splits)
+    
+    @staticmethod
+    def delete_for_transaction(transaction_id, user_id):
+        """Remove all splits so the transaction counts towards its own category again"""
+        db = get_db_connection()
+        if not db.connection:
+            raise Exception("No database connection")
+        
+        try:
+            db.execute(
+                "SELECT transaction_date FROM Transactions WHERE transaction_id = %s AND user_id = %s FOR UPDATE",
+                (transaction_id, user_id)
+            )
+            transaction = db.fetchone()
+            if not transaction:
+                db.rollback()
+                return 0
+            
+            db.execute("DELETE FROM TransactionSplits WHERE transaction_id = %s", (transaction_id,))
+            deleted = db.cursor.rowcount
+            if deleted:
+                MonthlyCategoryRollup.refresh_months(db, user_id, [transaction['transaction_date']])
+            db.commit()
+            if deleted:
+                DashboardSnapshot.after_write(user_id)
+                event_bus.publish(user_id, 'transaction', {'action': 'unsplit', 'transaction_id': transaction_id})
+            return deleted
+            
+        except Exception as e:
+            db.rollback()
+            raise e
@@ -1,6 +1,7 @@
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 from config.db import get_db_connection
+from utils.report_cache import report_cache
 
 class SimpleUser:
     """Simple User model using mysql.connector"""
@@ -72,6 +73,7 @@ class SimpleUser:
                 self.user_id = db.cursor.lastrowid
             
             db.commit()
+            report_cache.bump(self.user_id)
             return True
             
         except Exception as e:
@@ -178,6 +180,7 @@ class SimpleUser:
             query = "UPDATE Users SET last_login = %s WHERE user_id = %s"
             db.execute(query, (datetime.utcnow(), self.user_id))
             db.commit()
+            report_cache.bump(self.user_id)
             return True
         except Exception as e:
             print(f"Error updating last login: {e}")
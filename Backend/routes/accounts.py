@@ -1,13 +1,15 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models.account import Account
-from utils.decorators import require_db_connection
+from utils.decorators import require_db_connection, cache_response
+from datetime import date, timedelta
 
 accounts_bp = Blueprint('accounts', __name__, url_prefix='/api/accounts')
 
 @accounts_bp.route('', methods=['GET', 'OPTIONS'])
 @jwt_required()
 @require_db_connection
+@cache_response
 def get_accounts():
     """Get all accounts for user"""
     print(f"[Accounts] GET /accounts endpoint hit - Method: {request.method}")
@@ -42,6 +44,7 @@ def get_accounts():
 @accounts_bp.route('/<int:account_id>', methods=['GET', 'OPTIONS'])
 @jwt_required()
 @require_db_connection
+@cache_response
 def get_account(account_id):
     """Get specific account"""
     if request.method == 'OPTIONS':
@@ -147,5 +150,61 @@ def delete_account(account_id):
         
         return jsonify({'error': 'Account not found'}), 404
         
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@accounts_bp.route('/<int:account_id>/balance', methods=['GET', 'OPTIONS'])
+@jwt_required()
+@require_db_connection
+@cache_response
+def get_account_balance(account_id):
+    """Get account balance at the end of a date"""
+    if request.method == 'OPTIONS':
+        return '', 200
+    
+    try:
+        user_id = int(get_jwt_identity())
+        try:
+            day = date.fromisoformat(request.args.get('date', date.today().isoformat()))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        balance = Account.get_balance_at(account_id, user_id, day)
+        if balance is None:
+            return jsonify({'error': 'Account not found'}), 404
+        
+        return jsonify({'account_id': account_id, 'date': day.isoformat(), 'balance': balance}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@accounts_bp.route('/<int:account_id>/balance-history', methods=['GET', 'OPTIONS'])
+@jwt_required()
+@require_db_connection
+@cache_response
+def get_account_balance_history(account_id):
+    """Get daily end-of-day balances for a date range"""
+    if request.method == 'OPTIONS':
+        return '', 200
+    
+    try:
+        user_id = int(get_jwt_identity())
+        try:
+            end_date = date.fromisoformat(request.args.get('end_date', date.today().isoformat()))
+            start_date = date.fromisoformat(request.args.get('start_date', (end_date - timedelta(days=29)).isoformat()))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if start_date > end_date:
+            return jsonify({'error': 'start_date must not be after end_date'}), 400
+        if (end_date - start_date).days > 366 * 2:
+            return jsonify({'error': 'History is limited to two years per request'}), 400
+        
+        history = Account.get_balance_history(account_id, user_id, start_date, end_date)
+        if history is None:
+            return jsonify({'error': 'Account not found'}), 404
+        
+        return jsonify({'account_id': account_id, 'history': history}), 200
+        
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
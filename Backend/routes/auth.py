@@ -4,6 +4,7 @@ from datetime import datetime
 from models.user import SimpleUser
 from models.category import Category
 from config.db import get_db_connection
+from utils.decorators import conditional_get
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
@@ -147,6 +148,7 @@ def refresh():
 @auth_bp.route('/me', methods=['GET'])
 @jwt_required()
 @require_db_connection
+@conditional_get
 def get_current_user():
     """Get current user info"""
     try:
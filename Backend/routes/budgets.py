@@ -1,14 +1,17 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models.budget import Budget
+from models.dashboard_snapshot import DashboardSnapshot
 from config.db import get_db_connection
-from utils.decorators import require_db_connection
+from utils.decorators import require_db_connection, conditional_get
+from utils.event_bus import event_bus
 
 budgets_bp = Blueprint('budgets', __name__, url_prefix='/api/budgets')
 
 @budgets_bp.route('/performance', methods=['GET', 'OPTIONS'])
 @jwt_required()
 @require_db_connection
+@conditional_get
 def get_budget_performance():
     """Get budget performance data"""
     if request.method == 'OPTIONS':
@@ -25,6 +28,7 @@ def get_budget_performance():
 @budgets_bp.route('', methods=['GET', 'OPTIONS'])
 @jwt_required()
 @require_db_connection
+@conditional_get
 def get_budgets():
     """Get all budgets for user"""
     if request.method == 'OPTIONS':
@@ -110,6 +114,8 @@ def create_budget():
         
         budget_id = db.cursor.lastrowid
         db.commit()
+        DashboardSnapshot.after_write(user_id)
+        event_bus.publish(user_id, 'budget', {'action': 'created', 'budget_id': budget_id})
         
         return jsonify({
             'message': 'Budget created successfully',
@@ -149,6 +155,8 @@ def update_budget(budget_id):
         ))
         
         db.commit()
+        DashboardSnapshot.after_write(user_id)
+        event_bus.publish(user_id, 'budget', {'action': 'updated', 'budget_id': budget_id})
         
         return jsonify({
             'message': 'Budget updated successfully'
@@ -180,6 +188,8 @@ def delete_budget(budget_id):
         
         db.execute(update_query, (budget_id, user_id))
         db.commit()
+        DashboardSnapshot.after_write(user_id)
+        event_bus.publish(user_id, 'budget', {'action': 'deleted', 'budget_id': budget_id})
         
         return jsonify({
             'message': 'Budget deleted successfully'
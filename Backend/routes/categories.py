@@ -1,14 +1,16 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models.category import Category
+from models.dashboard_snapshot import DashboardSnapshot
 from config.db import get_db_connection
-from utils.decorators import require_db_connection
+from utils.decorators import require_db_connection, cache_response
 
 categories_bp = Blueprint('categories', __name__, url_prefix='/api/categories')
 
 @categories_bp.route('', methods=['GET', 'OPTIONS'])
 @jwt_required()
 @require_db_connection
+@cache_response
 def get_categories():
     """Get all categories for user"""
     if request.method == 'OPTIONS':
@@ -32,6 +34,7 @@ def get_categories():
 @categories_bp.route('/<int:category_id>', methods=['GET', 'OPTIONS'])
 @jwt_required()
 @require_db_connection
+@cache_response
 def get_category(category_id):
     """Get specific category"""
     if request.method == 'OPTIONS':
@@ -144,9 +147,9 @@ def delete_category(category_id):
         # Check if category is in use
         usage_query = """
             SELECT COUNT(*) as count FROM Transactions 
-            WHERE category_id = %s
+            WHERE user_id = %s AND category_id = %s
         """
-        db.execute(usage_query, (category_id,))
+        db.execute(usage_query, (user_id, category_id))
         usage = db.fetchone()
         
         if usage and usage['count'] > 0:
@@ -168,6 +171,7 @@ def delete_category(category_id):
             message = 'Category deleted successfully'
         
         db.commit()
+        DashboardSnapshot.after_write(user_id)
         
         return jsonify({
             'message': message
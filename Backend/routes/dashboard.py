@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, session, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
 from models.transaction import Transaction
@@ -6,13 +6,16 @@ from models.account import Account
 from models.category import Category
 from models.budget import Budget
 from models.goal import FinancialGoal
-from utils.decorators import require_db_connection
+from models.dashboard_bundle import DashboardBundle
+from models.dashboard_snapshot import DashboardSnapshot
+from utils.decorators import require_db_connection, cache_response
 
 dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/api/dashboard')
 
 @dashboard_bp.route('/summary', methods=['GET', 'OPTIONS'])
 @jwt_required()
 @require_db_connection
+@cache_response
 def get_dashboard_summary():
     """Get dashboard summary data"""
     print(f"[Dashboard] /summary endpoint hit - Method: {request.method}")
@@ -24,32 +27,37 @@ def get_dashboard_summary():
         user_id = int(get_jwt_identity())
         print(f"[Dashboard] User ID from JWT: {user_id}")
         
-        # Get transaction summary for current month
-        today = datetime.now()
-        start_of_month = datetime(today.year, today.month, 1)
-        print(f"[Dashboard] Date range: {start_of_month} to {today}")
-        
-        summary = Transaction.get_summary_for_period(user_id, start_of_month, today)
-        print(f"[Dashboard] Summary data retrieved: {summary}")
-        
-        response_data = {
-            'total_income': summary.get('total_income', 0),
-            'total_expenses': summary.get('total_expenses', 0),
-            'net_income': summary.get('net_income', 0),
-            'transaction_count': summary.get('transaction_count', 0)
-        }
+        # Current month totals from the user's precomputed snapshot (one primary-key read)
+        response_data = DashboardSnapshot.to_summary(DashboardSnapshot.get(user_id))
         print(f"[Dashboard] Sending response: {response_data}")
         return jsonify(response_data), 200
-        
+    
     except Exception as e:
         print(f"[Dashboard] Error in /summary: {str(e)}")
         import traceback
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+@dashboard_bp.route('/snapshot', methods=['GET', 'OPTIONS'])
+@jwt_required()
+@require_db_connection
+@cache_response
+def get_dashboard_snapshot():
+    """Get the precomputed dashboard snapshot (totals, recent transactions, top categories, budgets)"""
+    if request.method == 'OPTIONS':
+        return '', 200
+    
+    try:
+        user_id = int(get_jwt_identity())
+        return jsonify(DashboardSnapshot.to_dict(DashboardSnapshot.get(user_id))), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @dashboard_bp.route('/recent-transactions', methods=['GET', 'OPTIONS'])
 @jwt_required()
 @require_db_connection
+@cache_response
 def get_recent_transactions():
     """Get recent transactions for dashboard"""
     print(f"[Dashboard] /recent-transactions endpoint hit - Method: {request.method}")
@@ -61,13 +69,16 @@ def get_recent_transactions():
         limit = request.args.get('limit', 5, type=int)
         print(f"[Dashboard] Getting recent transactions for user {user_id}, limit: {limit}")
         
-        transactions = Transaction.get_recent_transactions(user_id, limit=limit)
+        if 0 < limit <= DashboardSnapshot.RECENT_LIMIT:
+            transactions = DashboardSnapshot.get(user_id)['recent_transactions'][:limit]
+        else:
+            transactions = Transaction.get_recent_transactions(user_id, limit=limit)
         print(f"[Dashboard] Retrieved {len(transactions) if transactions else 0} transactions")
         
         return jsonify({
             'transactions': transactions
         }), 200
-        
+    
     except Exception as e:
         print(f"[Dashboard] Error in /recent-transactions: {str(e)}")
         import traceback
@@ -77,6 +88,7 @@ def get_recent_transactions():
 @dashboard_bp.route('/spending-by-category', methods=['GET', 'OPTIONS'])
 @jwt_required()
 @require_db_connection
+@cache_response
 def get_spending_by_category():
     """Get spending breakdown by category"""
     if request.method == 'OPTIONS':
@@ -91,13 +103,14 @@ def get_spending_by_category():
         return jsonify({
             'categories': spending
         }), 200
-        
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @dashboard_bp.route('/transactions/summary', methods=['GET', 'OPTIONS'])
 @jwt_required()
 @require_db_connection
+@cache_response
 def get_transaction_summary():
     """Get transaction summary for dashboard"""
     if request.method == 'OPTIONS':
@@ -105,11 +118,55 @@ def get_transaction_summary():
     
     try:
         user_id = int(get_jwt_identity())
-        period = request.args.get('period', 'month')
+        period = request.args.get('period', 'month')  # week, month, quarter, year or days
+        compare = request.args.get('compare', 'previous')  # previous or yoy
+        days = request.args.get('days', type=int)
         
-        summary = Transaction.get_transaction_summary(user_id, period)
-        return jsonify(summary), 200
+        if period == 'days' and (not days or days < 1):
+            return jsonify({'error': 'days must be a positive integer when period=days'}), 400
         
+        summary = Transaction.get_transaction_summary(user_id, period, compare, days)
+        return jsonify(summary), 200
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@dashboard_bp.route('/bundle', methods=['GET', 'OPTIONS'])
+@jwt_required()
+@require_db_connection
+@cache_response
+def get_dashboard_bundle():
+    """Get every dashboard section in one response, computed concurrently"""
+    if request.method == 'OPTIONS':
+        return '', 200
+    
+    try:
+        user_id = int(get_jwt_identity())
+        period = request.args.get('period', 'month')
+        compare = request.args.get('compare', 'previous')
+        days = request.args.get('days', type=int)
+        limit = request.args.get('limit', 5, type=int)
+        timeout = min(request.args.get('timeout', DashboardBundle.DEFAULT_TIMEOUT, type=float),
+                      DashboardBundle.MAX_TIMEOUT)
+        
+        if period == 'days' and (not days or days < 1):
+            return jsonify({'error': 'days must be a positive integer when period=days'}), 400
+        
+        calls = DashboardBundle.section_calls(user_id, limit, period, compare, days)
+        if request.args.get('sections'):
+            names = [name.strip() for name in request.args['sections'].split(',') if name.strip()]
+            unknown = [name for name in names if name not in calls]
+            if unknown:
+                return jsonify({'error': f"Unknown sections: {', '.join(unknown)} "
+                                         f"(expected {', '.join(DashboardBundle.SECTIONS)})"}), 400
+            calls = {name: calls[name] for name in names}
+        
+        bundle = DashboardBundle.run(current_app._get_current_object(), session['db_config'], calls, timeout)
+        response = jsonify(bundle)
+        if not bundle['complete']:
+            # A partial bundle must not be cached or revalidated as if it were complete
+            response.headers['Cache-Control'] = 'no-store'
+        return response, 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,5 +1,8 @@
 from flask import Blueprint, request, jsonify, session
-from config.db import get_db_connection, init_db_tables, SimpleDBConnection
+from flask_jwt_extended import jwt_required
+from config.db import get_db_connection, SimpleDBConnection, pool_registry, close_db_connection, connection_validator
+from config.migrations import run_migrations
+from utils.report_cache import report_cache
 import mysql.connector
 
 database_bp = Blueprint('database', __name__, url_prefix='/api/database')
@@ -35,26 +38,29 @@ def connect_database():
                 'error': 'Failed to connect to database'
             }), 400
         
-        # Store connection info in session
-        session['db_config'] = {
+        db_config = {
             'host': data.get('host', 'localhost'),
             'user': data.get('user'),
             'password': data.get('password'),
             'database': data.get('database'),
             'port': int(data.get('port', 3306))
         }
-        session['db_connected'] = True
-        session.permanent = True
         
-        # Initialize tables
-        init_db_tables()
+        # Apply pending schema migrations (no DDL once the schema is current)
+        try:
+            migrations = run_migrations(test_db, db_config)
+        finally:
+            test_db.close()
         
-        # Close test connection
-        test_db.close()
+        # Store connection info in session only once the schema is usable
+        session['db_config'] = db_config
+        session['db_connected'] = True
+        session.permanent = True
         
         return jsonify({
             'connected': True,
-            'message': 'Successfully connected to database'
+            'message': 'Successfully connected to database',
+            'schema_version': migrations['version']
         }), 200
         
     except Exception as e:
@@ -71,10 +77,9 @@ def disconnect_database():
         session.pop('db_config', None)
         session.pop('db_connected', None)
         
-        # Close any existing connection
-        db = get_db_connection()
-        if db.connection:
-            db.close()
+        # Return this request's connection; other sessions may share the pool,
+        # which is closed by idle eviction once nobody uses it
+        close_db_connection()
         
         return jsonify({
             'connected': False,
@@ -115,6 +120,34 @@ def database_status():
             'error': str(e)
         }), 500
 
+@database_bp.route('/pool-stats', methods=['GET', 'OPTIONS'])
+@jwt_required()
+def get_pool_stats():
+    """Get connection pool and validation statistics"""
+    if request.method == 'OPTIONS':
+        return '', 200
+    
+    try:
+        stats = pool_registry.stats()
+        stats.update(connection_validator.stats())
+        return jsonify(stats), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@database_bp.route('/cache-stats', methods=['GET', 'OPTIONS'])
+@jwt_required()
+def get_cache_stats():
+    """Get report cache hit, miss and eviction counters"""
+    if request.method == 'OPTIONS':
+        return '', 200
+    
+    try:
+        return jsonify(report_cache.stats()), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @database_bp.route('/test', methods=['POST'])
 def test_connection():
     """Test database connection with provided credentials"""
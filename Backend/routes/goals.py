@@ -3,13 +3,16 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from models.goal import FinancialGoal
 from config.db import get_db_connection
 from datetime import datetime
-from utils.decorators import require_db_connection
+from utils.decorators import require_db_connection, conditional_get
+from utils.event_bus import event_bus
+from utils.report_cache import report_cache
 
 goals_bp = Blueprint('goals', __name__, url_prefix='/api/goals')
 
 @goals_bp.route('', methods=['GET', 'OPTIONS'])
 @jwt_required()
 @require_db_connection
+@conditional_get
 def get_goals():
     """Get all goals for user"""
     if request.method == 'OPTIONS':
@@ -32,6 +35,7 @@ def get_goals():
 @goals_bp.route('/<int:goal_id>', methods=['GET', 'OPTIONS'])
 @jwt_required()
 @require_db_connection
+@conditional_get
 def get_goal(goal_id):
     """Get specific goal"""
     if request.method == 'OPTIONS':
@@ -81,6 +85,8 @@ def create_goal():
         
         goal_id = db.cursor.lastrowid
         db.commit()
+        report_cache.bump(user_id)
+        event_bus.publish(user_id, 'goal', {'action': 'created', 'goal_id': goal_id})
         
         return jsonify({
             'message': 'Goal created successfully',
@@ -147,6 +153,8 @@ def update_goal(goal_id):
         
         db.execute(update_query, params)
         db.commit()
+        report_cache.bump(user_id)
+        event_bus.publish(user_id, 'goal', {'action': 'updated', 'goal_id': goal_id})
         
         return jsonify({
             'message': 'Goal updated successfully'
@@ -176,6 +184,8 @@ def delete_goal(goal_id):
         
         db.execute(delete_query, (goal_id, user_id))
         db.commit()
+        report_cache.bump(user_id)
+        event_bus.publish(user_id, 'goal', {'action': 'deleted', 'goal_id': goal_id})
         
         return jsonify({
             'message': 'Goal deleted successfully'
@@ -230,6 +240,14 @@ def update_goal_progress(goal_id):
         ))
         
         db.commit()
+        report_cache.bump(user_id)
+        event_bus.publish(user_id, 'goal', {
+            'action': 'progress',
+            'goal_id': goal_id,
+            'current_amount': current_amount,
+            'target_amount': target_amount,
+            'is_achieved': is_achieved
+        })
         
         return jsonify({
             'message': 'Goal progress updated successfully',
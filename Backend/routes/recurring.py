@@ -0,0 +1,167 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models.recurring_schedule import RecurringSchedule
+from datetime import date, timedelta
+from utils.decorators import require_db_connection, conditional_get
+
+recurring_bp = Blueprint('recurring', __name__, url_prefix='/api/recurring')
+
+@recurring_bp.route('', methods=['GET', 'OPTIONS'])
+@jwt_required()
+@require_db_connection
+@conditional_get
+def get_schedules():
+    """Get all recurring schedules for user"""
+    if request.method == 'OPTIONS':
+        return '', 200
+    
+    try:
+        user_id = int(get_jwt_identity())
+        active_only = request.args.get('active_only', 'false').lower() == 'true'
+        
+        schedules = RecurringSchedule.get_by_user(user_id, active_only)
+        
+        return jsonify({
+            'schedules': [schedule.to_dict() for schedule in schedules],
+            'total': len(schedules)
+        }), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@recurring_bp.route('/forecast', methods=['GET', 'OPTIONS'])
+@jwt_required()
+@require_db_connection
+@conditional_get
+def get_forecast():
+    """Upcoming occurrences of the user's schedules, projected without storing them"""
+    if request.method == 'OPTIONS':
+        return '', 200
+    
+    try:
+        user_id = int(get_jwt_identity())
+        
+        try:
+            start_date = date.fromisoformat(request.args.get('start_date', date.today().isoformat()))
+            if request.args.get('end_date'):
+                # end_date is inclusive, like the transaction filters
+                end_date = date.fromisoformat(request.args['end_date']) + timedelta(days=1)
+            else:
+                end_date = start_date + timedelta(days=request.args.get('days', 30, type=int))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if (end_date - start_date).days > 366 * 2:
+            return jsonify({'error': 'Forecast window is limited to two years'}), 400
+        
+        occurrences = RecurringSchedule.expand(user_id, start_date, end_date)
+        income = sum(item['amount'] for item in occurrences if item['transaction_type'] == 'income')
+        expense = sum(abs(item['amount']) for item in occurrences if item['transaction_type'] == 'expense')
+        
+        return jsonify({
+            'start_date': start_date.isoformat(),
+            'end_date': (end_date - timedelta(days=1)).isoformat(),
+            'occurrences': occurrences,
+            'projected_income': income,
+            'projected_expense': expense,
+            'projected_net': income - expense
+        }), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@recurring_bp.route('/<int:schedule_id>', methods=['GET', 'OPTIONS'])
+@jwt_required()
+@require_db_connection
+@conditional_get
+def get_schedule(schedule_id):
+    """Get specific recurring schedule"""
+    if request.method == 'OPTIONS':
+        return '', 200
+    
+    try:
+        user_id = int(get_jwt_identity())
+        schedule = RecurringSchedule.find_by_id(schedule_id, user_id)
+        
+        if not schedule:
+            return jsonify({'error': 'Schedule not found'}), 404
+        
+        return jsonify({'schedule': schedule.to_dict()}), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@recurring_bp.route('', methods=['POST'])
+@jwt_required()
+@require_db_connection
+def create_schedule():
+    """Create new recurring schedule"""
+    try:
+        user_id = int(get_jwt_identity())
+        data = request.get_json() or {}
+        
+        schedule = RecurringSchedule(user_id=user_id, **{
+            field: data.get(field) for field in RecurringSchedule.FIELDS
+        })
+        
+        try:
+            schedule.save()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({
+            'message': 'Recurring schedule created successfully',
+            'schedule': schedule.to_dict()
+        }), 201
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@recurring_bp.route('/<int:schedule_id>', methods=['PUT'])
+@jwt_required()
+@require_db_connection
+def update_schedule(schedule_id):
+    """Update recurring schedule"""
+    try:
+        user_id = int(get_jwt_identity())
+        schedule = RecurringSchedule.find_by_id(schedule_id, user_id)
+        
+        if not schedule:
+            return jsonify({'error': 'Schedule not found'}), 404
+        
+        data = request.get_json() or {}
+        for field in RecurringSchedule.FIELDS + ('is_active',):
+            if field in data:
+                setattr(schedule, field, data[field])
+        
+        try:
+            schedule.save()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({
+            'message': 'Recurring schedule updated successfully',
+            'schedule': schedule.to_dict()
+        }), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@recurring_bp.route('/<int:schedule_id>', methods=['DELETE'])
+@jwt_required()
+@require_db_connection
+def delete_schedule(schedule_id):
+    """Delete recurring schedule (transactions it created are kept)"""
+    try:
+        user_id = int(get_jwt_identity())
+        schedule = RecurringSchedule.find_by_id(schedule_id, user_id)
+        
+        if not schedule:
+            return jsonify({'error': 'Schedule not found'}), 404
+        
+        schedule.delete()
+        
+        return jsonify({'message': 'Recurring schedule deleted successfully'}), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,12 +1,22 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from config.db import get_db_connection
+from models.daily_rollup import DailyRollup
+from models.monthly_rollup import MonthlyCategoryRollup
+from utils.decorators import cache_response
+from utils.periods import month_range, year_range, rolling_range
 
 reports_bp = Blueprint('reports', __name__, url_prefix='/api/reports')
 
+def _category_names(db, user_id):
+    """category_id -> (name, type) for the user's categories"""
+    db.execute("SELECT category_id, name, type FROM Categories WHERE user_id = %s", (user_id,))
+    return {row['category_id']: (row['name'], row['type']) for row in db.fetchall()}
+
 @reports_bp.route('/monthly/<int:year>/<int:month>', methods=['GET', 'OPTIONS'])
 @jwt_required()
+@cache_response
 def get_monthly_report(year, month):
     """Get monthly spending report by category"""
     if request.method == 'OPTIONS':
@@ -20,52 +30,31 @@ def get_monthly_report(year, month):
             return jsonify({'error': 'No database connection'}), 500
         
         # Get spending by category for the specified month
-        query = """
-            SELECT 
-                c.category_name as category_name,
-                c.category_type as category_type,
-                SUM(t.amount) as total
-            FROM Transactions t
-            INNER JOIN Categories c ON t.category_id = c.category_id
-            WHERE t.user_id = %s 
-                AND YEAR(t.transaction_date) = %s 
-                AND MONTH(t.transaction_date) = %s
-                AND t.transaction_type = 'expense'
-            GROUP BY c.category_id, c.category_name, c.category_type
-            ORDER BY total DESC
-        """
-        
-        db.execute(query, (user_id, year, month))
-        rows = db.fetchall()
+        month_start, month_end = month_range(year, month)
+        # Category totals and income come from the monthly rollup (split-aware)
+        rows = MonthlyCategoryRollup.totals(db, user_id, month_start, month_end, ('type', 'category'))
+        names = _category_names(db, user_id)
+        
+        expense_rows = [row for row in rows if row['type'] == 'expense' and row['category'] in names]
+        expense_rows.sort(key=lambda row: row['total'], reverse=True)
         
         categories = []
         labels = []
         data = []
         total_expense = 0.0
         
-        for row in rows:
+        for row in expense_rows:
             amount = float(row['total'])
+            category_name = names[row['category']][0]
             categories.append({
-                'category': row['category_name'],
+                'category': category_name,
                 'amount': amount
             })
-            labels.append(row['category_name'])
+            labels.append(category_name)
             data.append(amount)
             total_expense += amount
         
-        # Also get total income for the month
-        income_query = """
-            SELECT SUM(amount) as total
-            FROM Transactions
-            WHERE user_id = %s 
-                AND YEAR(transaction_date) = %s 
-                AND MONTH(transaction_date) = %s
-                AND transaction_type = 'income'
-        """
-        
-        db.execute(income_query, (user_id, year, month))
-        income_result = db.fetchone()
-        total_income = float(income_result['total']) if income_result['total'] else 0.0
+        total_income = float(sum(row['total'] for row in rows if row['type'] == 'income'))
         
         return jsonify({
             'categories': categories,
@@ -96,6 +85,7 @@ def get_monthly_report(year, month):
 
 @reports_bp.route('/yearly/<int:year>', methods=['GET', 'OPTIONS'])
 @jwt_required()
+@cache_response
 def get_yearly_report(year):
     """Get yearly report with monthly breakdown"""
     if request.method == 'OPTIONS':
@@ -109,20 +99,8 @@ def get_yearly_report(year):
             return jsonify({'error': 'No database connection'}), 500
         
         # Get monthly breakdown for the year
-        query = """
-            SELECT 
-                MONTH(transaction_date) as month,
-                transaction_type,
-                SUM(amount) as total
-            FROM Transactions
-            WHERE user_id = %s 
-                AND YEAR(transaction_date) = %s
-            GROUP BY MONTH(transaction_date), transaction_type
-            ORDER BY month
-        """
-        
-        db.execute(query, (user_id, year))
-        rows = db.fetchall()
+        year_start, year_end = year_range(year)
+        rows = MonthlyCategoryRollup.totals(db, user_id, year_start, year_end, ('month', 'type'))
         
         # Initialize monthly data
         monthly_data = {}
@@ -135,10 +113,10 @@ def get_yearly_report(year):
         
         # Fill in actual data
         for row in rows:
-            month = row['month']
-            if row['transaction_type'] == 'income':
+            month = row['month'].month
+            if row['type'] == 'income':
                 monthly_data[month]['income'] = float(row['total'])
-            elif row['transaction_type'] == 'expense':
+            elif row['type'] == 'expense':
                 monthly_data[month]['expense'] = float(row['total'])
         
         # Calculate net income
@@ -190,6 +168,7 @@ def get_yearly_report(year):
 
 @reports_bp.route('/expense-trends', methods=['GET', 'OPTIONS'])
 @jwt_required()
+@cache_response
 def get_expense_trends():
     """Get expense trends over last 6 months"""
     if request.method == 'OPTIONS':
@@ -203,30 +182,19 @@ def get_expense_trends():
             return jsonify({'error': 'No database connection'}), 500
         
         # Get expense trends by category over last 6 months
-        query = """
-            SELECT 
-                DATE_FORMAT(t.transaction_date, '%Y-%m') as month,
-                c.category_name as category_name,
-                SUM(t.amount) as total
-            FROM Transactions t
-            INNER JOIN Categories c ON t.category_id = c.category_id
-            WHERE t.user_id = %s 
-                AND t.transaction_type = 'expense'
-                AND t.transaction_date >= DATE_SUB(CURRENT_DATE(), INTERVAL 6 MONTH)
-            GROUP BY DATE_FORMAT(t.transaction_date, '%Y-%m'), c.category_id, c.category_name
-            ORDER BY month, total DESC
-        """
-        
-        db.execute(query, (user_id,))
-        rows = db.fetchall()
+        trend_start, trend_end = rolling_range(183)
+        rows = MonthlyCategoryRollup.totals(db, user_id, trend_start, trend_end, ('month', 'category'), 'expense')
+        names = _category_names(db, user_id)
         
         # Organize data by month and category
         trends = {}
         categories = set()
         
         for row in rows:
-            month = row['month']
-            category = row['category_name']
+            if row['category'] not in names:
+                continue
+            month = row['month'].strftime('%Y-%m')
+            category = names[row['category']][0]
             amount = float(row['total'])
             
             if month not in trends:
@@ -271,6 +239,7 @@ def get_expense_trends():
 
 @reports_bp.route('/cashflow', methods=['GET', 'OPTIONS'])
 @jwt_required()
+@cache_response
 def get_cashflow_report():
     """Get cashflow report"""
     if request.method == 'OPTIONS':
@@ -287,43 +256,27 @@ def get_cashflow_report():
         # Get cashflow data
         if period == 'month':
             date_format = '%Y-%m-%d'
-            interval = 'DAY'
             days = 30
         elif period == 'quarter':
             date_format = '%Y-%m'
-            interval = 'MONTH'
             days = 90
         else:  # year
             date_format = '%Y-%m'
-            interval = 'MONTH'
             days = 365
         
-        query = f"""
-            SELECT 
-                DATE_FORMAT(transaction_date, %s) as date,
-                transaction_type,
-                SUM(amount) as total
-            FROM Transactions
-            WHERE user_id = %s 
-                AND transaction_date >= DATE_SUB(CURRENT_DATE(), INTERVAL {days} DAY)
-            GROUP BY DATE_FORMAT(transaction_date, %s), transaction_type
-            ORDER BY date
-        """
-        
-        db.execute(query, (date_format, user_id, date_format))
-        rows = db.fetchall()
+        # One range scan of the daily rollup; monthly buckets are summed here
+        range_start, range_end = rolling_range(days)
+        rows = DailyRollup.get_range(db, user_id, range_start, range_end)
         
         # Organize cashflow data
         cashflow = {}
         for row in rows:
-            date = row['date']
+            date = row['day'].strftime(date_format)
             if date not in cashflow:
                 cashflow[date] = {'income': 0.0, 'expense': 0.0}
             
-            if row['transaction_type'] == 'income':
-                cashflow[date]['income'] = float(row['total'])
-            elif row['transaction_type'] == 'expense':
-                cashflow[date]['expense'] = float(row['total'])
+            cashflow[date]['income'] += float(row['income_total'])
+            cashflow[date]['expense'] += float(row['expense_total'])
         
         # Calculate running balance
         dates = sorted(cashflow.keys())
@@ -367,5 +320,71 @@ def get_cashflow_report():
             'final_balance': running_balance
         }), 200
         
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@reports_bp.route('/daily', methods=['GET', 'OPTIONS'])
+@jwt_required()
+@cache_response
+def get_daily_report():
+    """Daily income, expense and net for calendar heatmaps"""
+    if request.method == 'OPTIONS':
+        return '', 200
+    
+    try:
+        user_id = get_jwt_identity()
+        db = get_db_connection()
+        
+        if not db.connection:
+            return jsonify({'error': 'No database connection'}), 500
+        
+        try:
+            if request.args.get('end_date'):
+                # end_date is inclusive, like the transaction filters
+                range_end = date.fromisoformat(request.args['end_date']) + timedelta(days=1)
+            else:
+                range_end = date.today() + timedelta(days=1)
+            if request.args.get('start_date'):
+                range_start = date.fromisoformat(request.args['start_date'])
+            else:
+                range_start = range_end - timedelta(days=request.args.get('days', 365, type=int))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if range_start >= range_end:
+            return jsonify({'error': 'start_date must not be after end_date'}), 400
+        if (range_end - range_start).days > DailyRollup.MAX_DAYS:
+            return jsonify({'error': f'Daily report is limited to {DailyRollup.MAX_DAYS} days'}), 400
+        
+        rows = DailyRollup.get_range(db, user_id, range_start, range_end)
+        
+        # Only days with transactions are listed; missing days are zero
+        days = []
+        total_income = 0.0
+        total_expense = 0.0
+        for row in rows:
+            income = float(row['income_total'])
+            expense = float(row['expense_total'])
+            days.append({
+                'date': row['day'].isoformat(),
+                'income': income,
+                'expense': expense,
+                'net': income - expense,
+                'count': row['transaction_count']
+            })
+            total_income += income
+            total_expense += expense
+        
+        return jsonify({
+            'start_date': range_start.isoformat(),
+            'end_date': (range_end - timedelta(days=1)).isoformat(),
+            'days': days,
+            'total_income': total_income,
+            'total_expense': total_expense,
+            'net': total_income - total_expense,
+            'max_income': max((day['income'] for day in days), default=0.0),
+            'max_expense': max((day['expense'] for day in days), default=0.0)
+        }), 200
+        
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
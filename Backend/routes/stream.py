@@ -0,0 +1,75 @@
+from flask import Blueprint, request, jsonify, Response
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+import json
+import time
+from utils.event_bus import event_bus, EventBus, HEARTBEAT_INTERVAL
+
+stream_bp = Blueprint('stream', __name__, url_prefix='/api/stream')
+
+# Reconnect delay suggested to EventSource clients, in milliseconds
+RETRY_MS = 5000
+
+def _format_event(event):
+    """One Server-Sent Events frame"""
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+@stream_bp.route('/dashboard', methods=['GET', 'OPTIONS'])
+@jwt_required(locations=['headers', 'query_string'])
+def stream_dashboard():
+    """Push dashboard delta events to the client as Server-Sent Events"""
+    if request.method == 'OPTIONS':
+        return '', 200
+    
+    try:
+        # EventSource cannot set headers, so browsers pass the token as ?jwt=
+        user_id = int(get_jwt_identity())
+        expires_at = get_jwt().get('exp')
+        
+        subscription = event_bus.subscribe(user_id)
+        if subscription is None:
+            if event_bus.transport is None:
+                return jsonify({'error': 'Event stream is disabled'}), 503
+            return jsonify({'error': 'Too many open streams for this user'}), 429
+        
+        # Events are not replayed, so a reconnecting client is told to refetch
+        first = 'resync' if request.headers.get('Last-Event-ID') else 'ready'
+        
+        def generate():
+            try:
+                yield f"retry: {RETRY_MS}\n\n"
+                yield _format_event(EventBus.make_event(first, {'heartbeat': HEARTBEAT_INTERVAL}))
+                while not subscription.closed:
+                    if expires_at and time.time() >= expires_at:
+                        yield _format_event(EventBus.make_event('token_expired', {}))
+                        return
+                    event = subscription.get(HEARTBEAT_INTERVAL)
+                    if event is None:
+                        # Keeps proxies from timing the stream out; a failed write ends it
+                        yield ": heartbeat\n\n"
+                        continue
+                    yield _format_event(event)
+            finally:
+                event_bus.unsubscribe(subscription)
+        
+        response = Response(generate(), mimetype='text/event-stream')
+        # Also covers a client that disconnects before the generator starts
+        response.call_on_close(lambda: event_bus.unsubscribe(subscription))
+        response.headers['Cache-Control'] = 'no-store'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@stream_bp.route('/stats', methods=['GET', 'OPTIONS'])
+@jwt_required()
+def get_stream_stats():
+    """Get event bus stream, delivery and overflow counters"""
+    if request.method == 'OPTIONS':
+        return '', 200
+    
+    try:
+        return jsonify(event_bus.stats()), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,14 +1,25 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models.transaction import Transaction
-from datetime import datetime
-from utils.decorators import require_db_connection
+from models.transaction_import import TransactionImport
+from models.transaction_bulk import TransactionBulk
+from models.transaction_split import TransactionSplit
+from models.recurring_schedule import RecurringSchedule
+from utils.importers import detect_format, parse_statement
+from utils.recurrence import FREQUENCIES
+from datetime import datetime, date, time, timedelta
+from decimal import Decimal
+import csv
+import io
+import json
+from utils.decorators import require_db_connection, conditional_get
 
 transactions_bp = Blueprint('transactions', __name__, url_prefix='/api/transactions')
 
 @transactions_bp.route('', methods=['GET', 'OPTIONS'])
 @jwt_required()
 @require_db_connection
+@conditional_get
 def get_transactions():
     """Get all transactions for the current user"""
     if request.method == 'OPTIONS':
@@ -18,6 +29,7 @@ def get_transactions():
         user_id = int(get_jwt_identity())
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
+        cursor = request.args.get('cursor')
         
         # Get filter parameters
         start_date = request.args.get('start_date')
@@ -26,28 +38,253 @@ def get_transactions():
         account_id = request.args.get('account_id', type=int)
         transaction_type = request.args.get('type')
         
-        transactions = Transaction.get_by_user(
-            user_id,
-            page=page,
-            per_page=per_page,
-            start_date=start_date,
-            end_date=end_date,
-            category_id=category_id,
-            account_id=account_id,
-            transaction_type=transaction_type
-        )
+        try:
+            transactions = Transaction.get_by_user(
+                user_id,
+                page=page,
+                per_page=per_page,
+                cursor=cursor,
+                start_date=start_date,
+                end_date=end_date,
+                category_id=category_id,
+                account_id=account_id,
+                transaction_type=transaction_type
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         return jsonify({
-            'transactions': [t.to_dict() for t in transactions['items']],
+            'transactions': transactions['items'],
             'total': transactions['total'],
             'page': transactions['page'],
             'per_page': transactions['per_page'],
-            'total_pages': transactions['total_pages']
+            'total_pages': transactions['total_pages'],
+            'next_cursor': transactions['next_cursor'],
+            'has_more': transactions['has_more']
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@transactions_bp.route('/search', methods=['GET', 'OPTIONS'])
+@jwt_required()
+@require_db_connection
+@conditional_get
+def search_transactions():
+    """Full-text search over transaction descriptions and notes"""
+    if request.method == 'OPTIONS':
+        return '', 200
+    
+    try:
+        user_id = int(get_jwt_identity())
+        
+        try:
+            results = Transaction.search(
+                user_id,
+                request.args.get('q'),
+                per_page=request.args.get('per_page', 20, type=int),
+                cursor=request.args.get('cursor'),
+                start_date=request.args.get('start_date'),
+                end_date=request.args.get('end_date'),
+                category_id=request.args.get('category_id', type=int),
+                account_id=request.args.get('account_id', type=int),
+                transaction_type=request.args.get('type')
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({
+            'transactions': results['items'],
+            'per_page': results['per_page'],
+            'next_cursor': results['next_cursor'],
+            'has_more': results['has_more']
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _export_value(value):
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        # mysql.connector returns TIME columns as timedelta
+        total = int(value.total_seconds())
+        return f"{total // 3600:02d}:{total % 3600 // 60:02d}:{total % 60:02d}"
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+def _csv_chunks(columns, batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_export_value(v) for v in row] for row in rows)
+        yield buffer.getvalue()
+
+def _ndjson_chunks(columns, batches):
+    for rows in batches:
+        yield ''.join(
+            json.dumps(dict(zip(columns, (_export_value(v) for v in row)))) + '\n'
+            for row in rows
+        )
+
+@transactions_bp.route('/export', methods=['GET', 'OPTIONS'])
+@jwt_required()
+@require_db_connection
+@conditional_get
+def export_transactions():
+    """Stream the user's transactions as CSV or NDJSON"""
+    if request.method == 'OPTIONS':
+        return '', 200
+    
+    try:
+        user_id = int(get_jwt_identity())
+        export_format = request.args.get('format', 'csv').lower()
+        if export_format not in ('csv', 'ndjson'):
+            return jsonify({'error': 'format must be "csv" or "ndjson"'}), 400
+        
+        try:
+            batches = Transaction.stream_export(
+                user_id,
+                start_date=request.args.get('start_date'),
+                end_date=request.args.get('end_date'),
+                category_id=request.args.get('category_id', type=int),
+                account_id=request.args.get('account_id', type=int),
+                transaction_type=request.args.get('type')
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        columns = Transaction.EXPORT_COLUMNS
+        if export_format == 'csv':
+            body, mimetype = _csv_chunks(columns, batches), 'text/csv'
+        else:
+            body, mimetype = _ndjson_chunks(columns, batches), 'application/x-ndjson'
+        
+        return Response(
+            stream_with_context(body),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename=transactions.{export_format}'}
+        )
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@transactions_bp.route('/import', methods=['POST', 'OPTIONS'])
+@jwt_required()
+@require_db_connection
+def import_transactions():
+    """Bulk import transactions from an uploaded CSV, OFX or QIF statement"""
+    if request.method == 'OPTIONS':
+        return '', 200
+    
+    try:
+        user_id = int(get_jwt_identity())
+        upload = request.files.get('file')
+        if upload is None:
+            return jsonify({'error': 'file is required'}), 400
+        
+        try:
+            fmt = detect_format(upload.filename, request.form.get('format'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        account_id = request.form.get('account_id', type=int)
+        skip_duplicates = request.form.get('skip_duplicates', 'true').lower() != 'false'
+        
+        # Parse straight from the upload stream; rows are inserted chunk by chunk
+        stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', errors='replace', newline='')
+        importer = TransactionImport(user_id, default_account_id=account_id, skip_duplicates=skip_duplicates)
+        result = importer.run(parse_statement(stream, fmt))
+        
+        status = 201 if result['imported'] or result['duplicates'] else 400
+        return jsonify(result), status
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _batch_selection(data):
+    """(ids, filter) from a batch request body; exactly one must be given"""
+    ids = data.get('ids')
+    filters = data.get('filter')
+    if (ids is None) == (filters is None):
+        raise ValueError('Provide either ids or filter')
+    if ids is not None and not isinstance(ids, list):
+        raise ValueError('ids must be a list')
+    return ids, filters
+
+@transactions_bp.route('/batch', methods=['PUT', 'OPTIONS'])
+@jwt_required()
+@require_db_connection
+def batch_update_transactions():
+    """Apply the same changes to many transactions at once"""
+    if request.method == 'OPTIONS':
+        return '', 200
+    
+    try:
+        user_id = int(get_jwt_identity())
+        data = request.get_json() or {}
+        
+        try:
+            ids, filters = _batch_selection(data)
+            result = TransactionBulk.update(user_id, data.get('changes'), ids=ids, filters=filters)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify(result), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@transactions_bp.route('/batch/recategorize', methods=['PUT', 'OPTIONS'])
+@jwt_required()
+@require_db_connection
+def batch_recategorize_transactions():
+    """Move many transactions to one category"""
+    if request.method == 'OPTIONS':
+        return '', 200
+    
+    try:
+        user_id = int(get_jwt_identity())
+        data = request.get_json() or {}
+        if 'category_id' not in data:
+            return jsonify({'error': 'category_id is required'}), 400
+        
+        try:
+            ids, filters = _batch_selection(data)
+            result = TransactionBulk.update(user_id, {'category_id': data['category_id']}, ids=ids, filters=filters)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify(result), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@transactions_bp.route('/batch', methods=['DELETE'])
+@jwt_required()
+@require_db_connection
+def batch_delete_transactions():
+    """Delete many transactions at once"""
+    try:
+        user_id = int(get_jwt_identity())
+        data = request.get_json() or {}
+        
+        try:
+            ids, filters = _batch_selection(data)
+            result = TransactionBulk.delete(user_id, ids=ids, filters=filters)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify(result), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @transactions_bp.route('', methods=['POST'])
 @jwt_required()
 @require_db_connection
@@ -57,12 +294,20 @@ def create_transaction():
         user_id = int(get_jwt_identity())
         data = request.get_json()
         
+        # Older clients send the date as `date`
+        if 'transaction_date' not in data and 'date' in data:
+            data['transaction_date'] = data['date']
+        
         # Validate required fields
-        required_fields = ['amount', 'transaction_type', 'category_id', 'account_id', 'date']
+        required_fields = ['amount', 'transaction_type', 'category_id', 'account_id', 'transaction_date']
         for field in required_fields:
             if field not in data:
                 return jsonify({'error': f'{field} is required'}), 400
         
+        frequency = data.get('recurring_frequency')
+        if data.get('is_recurring') and frequency not in FREQUENCIES:
+            return jsonify({'error': f"recurring_frequency must be one of {', '.join(FREQUENCIES)}"}), 400
+        
         # Create transaction
         transaction = Transaction(
             user_id=user_id,
@@ -70,17 +315,22 @@ def create_transaction():
             transaction_type=data['transaction_type'],
             category_id=data['category_id'],
             account_id=data['account_id'],
-            date=data['date'],
+            transaction_date=date.fromisoformat(data['transaction_date']),
             description=data.get('description', ''),
-            is_recurring=data.get('is_recurring', False),
-            recurring_frequency=data.get('recurring_frequency')
+            notes=data.get('notes')
         )
         
         transaction.save()
         
+        # A recurring transaction is the first occurrence of a new schedule
+        schedule = None
+        if data.get('is_recurring'):
+            schedule = RecurringSchedule.create_from_transaction(transaction, frequency)
+        
         return jsonify({
             'message': 'Transaction created successfully',
-            'transaction': transaction.to_dict()
+            'transaction': transaction.to_dict(),
+            'schedule': schedule.to_dict() if schedule else None
         }), 201
         
     except Exception as e:
@@ -89,6 +339,7 @@ def create_transaction():
 @transactions_bp.route('/<int:id>', methods=['GET', 'OPTIONS'])
 @jwt_required()
 @require_db_connection
+@conditional_get
 def get_transaction(id):
     """Get a specific transaction"""
     if request.method == 'OPTIONS':
@@ -96,7 +347,7 @@ def get_transaction(id):
     
     try:
         user_id = int(get_jwt_identity())
-        transaction = Transaction.find_by_id(id)
+        transaction = Transaction.find_by_id(id, user_id)
         
         if not transaction:
             return jsonify({'error': 'Transaction not found'}), 404
@@ -104,7 +355,10 @@ def get_transaction(id):
         if transaction.user_id != user_id:
             return jsonify({'error': 'Unauthorized'}), 403
         
-        return jsonify({'transaction': transaction.to_dict()}), 200
+        transaction_data = transaction.to_dict()
+        transaction_data['splits'] = [split.to_dict() for split in TransactionSplit.get_by_transaction(id, user_id)]
+        
+        return jsonify({'transaction': transaction_data}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -116,7 +370,7 @@ def update_transaction(id):
     """Update a transaction"""
     try:
         user_id = int(get_jwt_identity())
-        transaction = Transaction.find_by_id(id)
+        transaction = Transaction.find_by_id(id, user_id)
         
         if not transaction:
             return jsonify({'error': 'Transaction not found'}), 404
@@ -135,16 +389,17 @@ def update_transaction(id):
             transaction.category_id = data['category_id']
         if 'account_id' in data:
             transaction.account_id = data['account_id']
-        if 'date' in data:
-            transaction.date = data['date']
+        if 'transaction_date' in data or 'date' in data:
+            transaction.transaction_date = date.fromisoformat(data.get('transaction_date') or data['date'])
         if 'description' in data:
             transaction.description = data['description']
-        if 'is_recurring' in data:
-            transaction.is_recurring = data['is_recurring']
-        if 'recurring_frequency' in data:
-            transaction.recurring_frequency = data['recurring_frequency']
+        if 'notes' in data:
+            transaction.notes = data['notes']
         
-        transaction.save()
+        try:
+            transaction.save()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         return jsonify({
             'message': 'Transaction updated successfully',
@@ -161,7 +416,7 @@ def delete_transaction(id):
     """Delete a transaction"""
     try:
         user_id = int(get_jwt_identity())
-        transaction = Transaction.find_by_id(id)
+        transaction = Transaction.find_by_id(id, user_id)
         
         if not transaction:
             return jsonify({'error': 'Transaction not found'}), 404
@@ -173,5 +428,65 @@ def delete_transaction(id):
         
         return jsonify({'message': 'Transaction deleted successfully'}), 200
         
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@transactions_bp.route('/<int:id>/splits', methods=['GET', 'OPTIONS'])
+@jwt_required()
+@require_db_connection
+@conditional_get
+def get_transaction_splits(id):
+    """Get the category splits of a transaction"""
+    if request.method == 'OPTIONS':
+        return '', 200
+    
+    try:
+        user_id = int(get_jwt_identity())
+        if not Transaction.find_by_id(id, user_id):
+            return jsonify({'error': 'Transaction not found'}), 404
+        
+        splits = TransactionSplit.get_by_transaction(id, user_id)
+        return jsonify({'splits': [split.to_dict() for split in splits]}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@transactions_bp.route('/<int:id>/splits', methods=['PUT'])
+@jwt_required()
+@require_db_connection
+def replace_transaction_splits(id):
+    """Replace the category splits of a transaction"""
+    try:
+        user_id = int(get_jwt_identity())
+        if not Transaction.find_by_id(id, user_id):
+            return jsonify({'error': 'Transaction not found'}), 404
+        
+        data = request.get_json() or {}
+        try:
+            splits = TransactionSplit.replace_for_transaction(id, user_id, data.get('splits'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({
+            'message': 'Transaction splits saved successfully',
+            'splits': [split.to_dict() for split in splits]
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@transactions_bp.route('/<int:id>/splits', methods=['DELETE'])
+@jwt_required()
+@require_db_connection
+def delete_transaction_splits(id):
+    """Remove the category splits of a transaction"""
+    try:
+        user_id = int(get_jwt_identity())
+        if not Transaction.find_by_id(id, user_id):
+            return jsonify({'error': 'Transaction not found'}), 404
+        
+        deleted = TransactionSplit.delete_for_transaction(id, user_id)
+        return jsonify({'message': 'Transaction splits removed successfully', 'deleted': deleted}), 200
+        
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
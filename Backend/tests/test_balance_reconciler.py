@@ -0,0 +1,117 @@
+from decimal import Decimal
+import threading
+import pytest
+import models.balance_reconciler as reconciler_module
+from models.balance_reconciler import BalanceReconciler
+
+CONFIG = {'host': 'db', 'port': 3306, 'database': 'finance'}
+
+def account(account_id, user_id, stored, ledger):
+    return {'account_id': account_id, 'user_id': user_id,
+            'stored_balance': Decimal(stored), 'ledger_balance': Decimal(ledger)}
+
+class FakeServer:
+    """Answers the reconciler's queries: shard bounds, ledger rows per shard, and re-reads under lock"""
+    
+    def __init__(self, bounds, shards, reread=None):
+        self.bounds = bounds
+        self.shards = shards
+        self.reread = reread or {}
+        self.updates = []
+        self.commits = 0
+        self.lock = threading.Lock()
+    
+    def connection(self, raw=None):
+        return FakeDB(self)
+
+class FakeDB:
+    def __init__(self, server):
+        self.server = server
+        self.result = None
+    
+    def execute(self, query, params=None):
+        query = ' '.join(query.split())
+        if 'MIN(user_id)' in query:
+            self.result = self.server.bounds
+        elif 'BETWEEN' in query:
+            self.result = self.server.shards.get(params[0], [])
+        elif query.startswith('SELECT account_id FROM Accounts'):
+            self.result = []
+        elif 'IN (' in query and query.startswith('SELECT a.account_id'):
+            self.result = [self.server.reread[account_id] for account_id in params[:len(params) // 2]
+                           if account_id in self.server.reread]
+        else:
+            with self.server.lock:
+                self.server.updates.append((query.split(' ')[0], params))
+    
+    def fetchone(self):
+        return self.result
+    
+    def fetchall(self):
+        return self.result
+    
+    def commit(self):
+        with self.server.lock:
+            self.server.commits += 1
+    
+    def rollback(self):
+        pass
+    
+    def close(self):
+        pass
+
+@pytest.fixture
+def server(monkeypatch):
+    bumped = []
+    
+    def install(*args, **kwargs):
+        fake = FakeServer(*args, **kwargs)
+        fake.bumped = bumped
+        monkeypatch.setattr(reconciler_module, 'SimpleDBConnection', fake.connection)
+        monkeypatch.setattr(reconciler_module.pool_registry, 'checkout', lambda config: None)
+        monkeypatch.setattr(reconciler_module.report_cache, 'bump', lambda user_id, database=None: bumped.append((user_id, database)))
+        return fake
+    return install
+
+def test_shards_cover_the_user_id_range(server):
+    server({'low': 3, 'high': 2500}, {})
+    assert BalanceReconciler(CONFIG, shard_size=1000).shards() == [(3, 1002), (1003, 2002), (2003, 3002)]
+
+def test_no_accounts_means_no_shards(server):
+    server({'low': None, 'high': None}, {})
+    assert BalanceReconciler(CONFIG).shards() == []
+
+def test_workers_are_capped_by_the_pool(monkeypatch):
+    monkeypatch.setattr(reconciler_module.pool_registry, 'pool_size', 3)
+    assert BalanceReconciler(CONFIG, workers=16).workers == 2
+
+def test_report_lists_drift_beyond_the_tolerance_largest_first(server):
+    fake = server({'low': 1, 'high': 4}, {
+        1: [account(10, 1, '100.00', '100.004'), account(11, 2, '50.00', '45.00')],
+        3: [account(12, 3, '0.00', '-80.00'), account(13, 4, '7.00', '7.00')]
+    })
+    reconciler = BalanceReconciler(CONFIG, workers=2, shard_size=2)
+    summary = reconciler.run()
+    
+    assert summary == {'accounts_checked': 4, 'shards': 2, 'drifted': 2, 'fixed': 0, 'total_drift': Decimal('85.00')}
+    assert [drift['account_id'] for drift in reconciler.drifts] == [12, 11]
+    assert reconciler.drifts[0]['drift'] == Decimal('80.00')
+    assert fake.updates == [] and fake.bumped == []
+
+def test_fix_rechecks_under_lock_and_bumps_only_fixed_users(server):
+    fake = server({'low': 1, 'high': 2}, {
+        1: [account(11, 1, '50.00', '45.00'), account(12, 2, '10.00', '20.00')]
+    }, reread={
+        # A concurrent write settled account 12 between the scan and the lock
+        11: account(11, 1, '50.00', '45.00'), 12: account(12, 2, '20.00', '20.00')
+    })
+    reconciler = BalanceReconciler(CONFIG, shard_size=10, fix=True)
+    summary = reconciler.run()
+    
+    assert summary['fixed'] == 1
+    assert {drift['account_id']: drift['fixed'] for drift in reconciler.drifts} == {11: True, 12: False}
+    (update, update_params), (delete, delete_params) = fake.updates
+    assert (update, delete) == ('UPDATE', 'DELETE')
+    assert update_params == [11, Decimal('45.00'), 11]
+    assert delete_params == [11]
+    assert fake.bumped == [(1, 'db:3306/finance')]
@@ -0,0 +1,53 @@
+from datetime import date, datetime
+from decimal import Decimal
+from models.daily_rollup import DailyRollup
+
+class RecordingDB:
+    def __init__(self):
+        self.calls = []
+    
+    def execute(self, query, params=None):
+        self.calls.append((' '.join(query.split()), params))
+
+def rows_of(params, width=5):
+    return [tuple(params[i:i + width]) for i in range(0, len(params), width)]
+
+def test_apply_adds_magnitudes_per_user_and_day():
+    db = RecordingDB()
+    written = DailyRollup.apply(db, [
+        (1, date(2024, 5, 1), 'expense', 3, Decimal('-40.00')),
+        (1, '2024-05-01', 'expense', None, Decimal('10.00')),
+        (1, datetime(2024, 5, 1, 18, 30), 'income', None, Decimal('100.00')),
+        (1, date(2024, 5, 2), 'transfer', None, Decimal('7.00')),
+        (2, date(2024, 5, 1), 'expense', None, Decimal('1.00'))
+    ])
+    assert written == 3
+    assert len(db.calls) == 1
+    assert rows_of(db.calls[0][1]) == [
+        (1, date(2024, 5, 1), Decimal('100.00'), Decimal('50.00'), 3),
+        (1, date(2024, 5, 2), 0, 0, 1),
+        (2, date(2024, 5, 1), 0, Decimal('1.00'), 1)
+    ]
+
+def test_removals_subtract_and_drop_emptied_days():
+    db = RecordingDB()
+    DailyRollup.apply(db, [(1, date(2024, 5, 1), 'expense', None, Decimal('-40.00'), 4)], sign=-1)
+    (upsert, params), (delete, delete_params) = db.calls
+    assert rows_of(params) == [(1, date(2024, 5, 1), 0, Decimal('-40.00'), -4)]
+    assert delete.startswith('DELETE FROM DailyRollup WHERE transaction_count <= 0')
+    assert delete_params == [1, date(2024, 5, 1)]
+
+def test_adding_and_removing_the_same_rows_cancels_out():
+    added, removed = RecordingDB(), RecordingDB()
+    entries = [(1, date(2024, 5, 1), 'expense', None, Decimal('-12.50')),
+               (1, date(2024, 5, 1), 'income', None, Decimal('12.50'))]
+    DailyRollup.apply(added, entries)
+    DailyRollup.apply(removed, entries, sign=-1)
+    plus, minus = rows_of(added.calls[0][1])[0], rows_of(removed.calls[0][1])[0]
+    assert plus[:2] == minus[:2]
+    assert all(a + b == 0 for a, b in zip(plus[2:], minus[2:]))
+
+def test_apply_without_entries_runs_no_sql():
+    db = RecordingDB()
+    assert DailyRollup.apply(db, [], sign=-1) == 0
+    assert db.calls == []
@@ -0,0 +1,83 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import pytest
+from flask import Flask, g
+import models.dashboard_bundle as bundle_module
+from models.dashboard_bundle import DashboardBundle
+
+class FakeConnection:
+    def __init__(self):
+        self.discarded = False
+    
+    def discard(self):
+        self.discarded = True
+
+class FakeDB:
+    def __init__(self, fail_reset=False):
+        self.connection = FakeConnection()
+        self.fail_reset = fail_reset
+        self.statements = []
+    
+    def execute(self, query, params=None):
+        if self.fail_reset and query.endswith('DEFAULT'):
+            raise RuntimeError('connection lost')
+        self.statements.append((query, params))
+
+@pytest.fixture
+def bundle(monkeypatch):
+    executor = ThreadPoolExecutor(max_workers=4)
+    connections = []
+    
+    def get_db_connection():
+        connections.append((g.db_config, FakeDB()))
+        return connections[-1][1]
+    
+    monkeypatch.setattr(DashboardBundle, 'executor', staticmethod(lambda: executor))
+    monkeypatch.setattr(bundle_module, 'get_db_connection', get_db_connection)
+    yield Flask(__name__), connections
+    executor.shutdown(wait=True)
+
+def test_sections_run_on_their_own_time_limited_connections(bundle):
+    app, connections = bundle
+    result = DashboardBundle.run(app, {'database': 'finance'}, {
+        'summary': lambda: {'total_income': 1},
+        'goals': lambda: {'goals': []}
+    }, timeout=5)
+    
+    assert result['complete']
+    assert result['sections'] == {'summary': {'total_income': 1}, 'goals': {'goals': []}}
+    assert {timing['status'] for timing in result['timings'].values()} == {'ok'}
+    assert len(connections) == 2
+    for config, db in connections:
+        assert config == {'database': 'finance'}
+        (limit, (remaining_ms,)), (reset, _) = db.statements
+        assert limit == 'SET SESSION MAX_EXECUTION_TIME = %s' and 0 < remaining_ms <= 5000
+        assert reset == 'SET SESSION MAX_EXECUTION_TIME = DEFAULT'
+
+def test_failed_and_late_sections_are_left_out(bundle):
+    app, connections = bundle
+    release = threading.Event()
+    
+    def broken():
+        raise ValueError('no budgets table')
+    
+    result = DashboardBundle.run(app, {}, {
+        'summary': lambda: {'ok': True},
+        'budget_performance': broken,
+        'spending_by_category': lambda: release.wait(5)
+    }, timeout=0.2)
+    release.set()
+    
+    assert not result['complete']
+    assert result['sections'] == {'summary': {'ok': True}, 'budget_performance': None, 'spending_by_category': None}
+    assert result['timings']['budget_performance'] == {'status': 'error', 'error': 'no budgets table'}
+    assert result['timings']['spending_by_category'] == {'status': 'timeout'}
+
+def test_a_session_that_cannot_be_reset_is_not_returned_to_the_pool():
+    db = FakeDB(fail_reset=True)
+    DashboardBundle._reset_session(db)
+    assert db.connection.discarded
+    
+    db = FakeDB()
+    DashboardBundle._reset_session(db)
+    assert not db.connection.discarded
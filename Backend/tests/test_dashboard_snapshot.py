@@ -0,0 +1,136 @@
+from datetime import date
+from decimal import Decimal
+import json
+import pytest
+import models.dashboard_snapshot as snapshot_module
+from models.dashboard_snapshot import DashboardSnapshot
+from models.transaction import Transaction
+
+TODAY = date(2024, 5, 15)
+
+class FixedDate(date):
+    @classmethod
+    def today(cls):
+        return cls(TODAY.year, TODAY.month, TODAY.day)
+
+class ScriptedDB:
+    def __init__(self, fetchone=(), fetchall=(), fail_on=None):
+        self.connection = object()
+        self.one = list(fetchone)
+        self.all = list(fetchall)
+        self.fail_on = fail_on
+        self.calls = []
+        self.commits = 0
+        self.rollbacks = 0
+    
+    def execute(self, query, params=None):
+        query = ' '.join(query.split())
+        if self.fail_on and self.fail_on in query:
+            raise RuntimeError('lock wait timeout')
+        self.calls.append((query, params))
+    
+    def fetchone(self):
+        return self.one.pop(0)
+    
+    def fetchall(self):
+        return self.all.pop(0)
+    
+    def commit(self):
+        self.commits += 1
+    
+    def rollback(self):
+        self.rollbacks += 1
+
+@pytest.fixture
+def today(monkeypatch):
+    monkeypatch.setattr(snapshot_module, 'date', FixedDate)
+    return TODAY
+
+def test_add_totals_counts_month_to_date_entries_only(today):
+    db = ScriptedDB()
+    DashboardSnapshot.add_totals(db, [
+        (1, date(2024, 5, 1), 'expense', 3, Decimal('-40.00')),
+        (1, '2024-05-15', 'income', None, Decimal('100.00')),
+        (1, date(2024, 4, 30), 'expense', None, Decimal('5.00')),
+        (1, date(2024, 5, 16), 'expense', None, Decimal('7.00')),
+        (2, date(2024, 5, 2), 'transfer', None, Decimal('9.00'))
+    ])
+    (query, params), = db.calls
+    assert query.startswith('INSERT INTO DashboardSnapshots')
+    assert params[:12] == [
+        1, DashboardSnapshot.UNBUILT_DATE, DashboardSnapshot.UNBUILT_DATE, Decimal('100.00'), Decimal('40.00'), 2,
+        2, DashboardSnapshot.UNBUILT_DATE, DashboardSnapshot.UNBUILT_DATE, 0, 0, 1
+    ]
+    assert params[12:] == [today, today, today]
+
+def test_removals_are_marked_by_a_negative_count(today):
+    db = ScriptedDB()
+    DashboardSnapshot.add_totals(db, [(1, date(2024, 5, 3), 'expense', None, Decimal('-40.00'), -2)])
+    assert db.calls[0][1][3:6] == [0, Decimal('-40.00'), -2]
+
+def test_changes_that_cancel_out_run_no_sql(today):
+    db = ScriptedDB()
+    assert DashboardSnapshot.add_totals(db, [
+        (1, date(2024, 5, 3), 'expense', None, Decimal('-40.00')),
+        (1, date(2024, 5, 3), 'expense', None, Decimal('40.00'), -1),
+        (1, date(2024, 3, 3), 'expense', None, Decimal('40.00'))
+    ]) == 0
+    assert db.calls == []
+
+def test_after_write_bumps_the_cache_before_publishing(monkeypatch):
+    order = []
+    monkeypatch.setattr(DashboardSnapshot, 'update', staticmethod(lambda user_id: order.append('update') or {'x': 1}))
+    monkeypatch.setattr(snapshot_module.report_cache, 'bump', lambda user_id: order.append('bump'))
+    monkeypatch.setattr(DashboardSnapshot, 'publish', staticmethod(lambda user_id, snapshot: order.append(('publish', snapshot))))
+    assert DashboardSnapshot.after_write(7) == {'x': 1}
+    assert order == ['update', 'bump', ('publish', {'x': 1})]
+
+@pytest.fixture
+def published(monkeypatch):
+    events = []
+    monkeypatch.setattr(snapshot_module.event_bus, 'publish', lambda user_id, kind, data: events.append((kind, data)))
+    return events
+
+def test_publish_sends_the_summary_and_budget_crossings(published):
+    alert = {'budget_id': 4, 'threshold': 100}
+    DashboardSnapshot.publish(7, {'total_income': 10.0, 'total_expenses': 4.0, 'transaction_count': 2,
+                                  'budget_alerts': [alert]})
+    assert published == [
+        ('summary', {'total_income': 10.0, 'total_expenses': 4.0, 'net_income': 6.0, 'transaction_count': 2}),
+        ('budget_threshold', alert)
+    ]
+
+def test_failed_update_asks_clients_to_resync(published):
+    DashboardSnapshot.publish(7, None)
+    assert published == [('resync', {'reason': 'snapshot'})]
+
+def test_update_that_fails_drops_the_row(monkeypatch, today):
+    db = ScriptedDB(fail_on='FOR UPDATE')
+    monkeypatch.setattr(snapshot_module, 'get_db_connection', lambda: db)
+    assert DashboardSnapshot.update(7) is None
+    assert db.rollbacks == 1
+    assert db.calls == [('DELETE FROM DashboardSnapshots WHERE user_id IN (%s)', [7])]
+    assert db.commits == 1
+
+def budget(budget_id, budgeted, spent):
+    return {'budget_id': budget_id, 'category_id': budget_id, 'category_name': f'c{budget_id}',
+            'budget_amount': Decimal(budgeted), 'spent': Decimal(spent)}
+
+def lists(monkeypatch, previous_month, previous_percentages, budgets):
+    monkeypatch.setattr(Transaction, '_fetch_page', staticmethod(lambda *args: []))
+    previous = {'period_month': previous_month, 'budget_utilization': json.dumps({'budgets': [
+        {'budget_id': budget_id, 'percentage': percentage} for budget_id, percentage in previous_percentages.items()
+    ]})}
+    db = ScriptedDB(fetchall=[[], budgets])
+    return DashboardSnapshot._lists(db, 7, TODAY, previous)
+
+def test_budget_alerts_report_the_highest_threshold_crossed(monkeypatch):
+    result = lists(monkeypatch, date(2024, 5, 1), {1: 70, 2: 85, 3: 100}, [
+        budget(1, '100', '105'), budget(2, '100', '90'), budget(3, '100', '120'), budget(4, '50', '40')
+    ])
+    assert [(alert['budget_id'], alert['threshold']) for alert in result['budget_alerts']] == [(1, 100), (4, 80)]
+    assert result['budget_utilization']['overall_percentage'] == int(355 / 350 * 100)
+
+def test_no_alerts_against_another_months_snapshot(monkeypatch):
+    result = lists(monkeypatch, date(2024, 4, 1), {1: 10}, [budget(1, '100', '105')])
+    assert result['budget_alerts'] == []
@@ -0,0 +1,57 @@
+import threading
+from utils.event_bus import EventBus, MemoryTransport, Subscription
+
+def event(n):
+    return EventBus.make_event('transaction', {'n': n})
+
+def test_events_are_delivered_in_order():
+    subscription = Subscription('1', max_queue=3)
+    for n in range(3):
+        assert subscription.push(event(n))
+    assert [subscription.get(0)['data']['n'] for _ in range(3)] == [0, 1, 2]
+    assert subscription.get(0) is None
+
+def test_overflow_drops_the_backlog_and_sends_one_resync():
+    subscription = Subscription('1', max_queue=2)
+    subscription.push(event(0))
+    subscription.push(event(1))
+    assert subscription.push(event(2)) is False
+    assert subscription.push(event(3)) is False  # nothing queues until the resync is read
+    
+    resync = subscription.get(0)
+    assert resync['type'] == 'resync' and resync['data'] == {'reason': 'overflow'}
+    assert subscription.get(0) is None
+    
+    # After the resync the stream carries new events again
+    assert subscription.push(event(4))
+    assert subscription.get(0)['data']['n'] == 4
+
+def test_get_wakes_up_on_push():
+    subscription = Subscription('1', max_queue=2)
+    threading.Timer(0.05, subscription.push, (event(7),)).start()
+    assert subscription.get(5)['data']['n'] == 7
+
+def test_closed_subscription_ignores_pushes():
+    subscription = Subscription('1', max_queue=1)
+    subscription.close()
+    assert subscription.push(event(0))
+    assert subscription.get(0) is None
+
+def test_bus_counts_overflows_and_limits_streams():
+    bus = EventBus(MemoryTransport(), max_queue=1, max_streams_per_user=1)
+    subscription = bus.subscribe(1)
+    assert bus.subscribe(1) is None
+    
+    bus.publish(1, 'summary', {})
+    bus.publish(1, 'summary', {})
+    stats = bus.stats()
+    assert (stats['delivered'], stats['overflows'], stats['rejected']) == (1, 1, 1)
+    assert subscription.get(0)['type'] == 'resync'
+    
+    bus.unsubscribe(subscription)
+    assert bus.stats()['streams'] == 0
+
+def test_disabled_bus_has_no_streams():
+    bus = EventBus(None)
+    assert bus.subscribe(1) is None
+    bus.publish(1, 'summary', {})
@@ -0,0 +1,70 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+import csv
+import io
+import json
+from config.db import SimpleDBConnection
+from routes.transactions import _csv_chunks, _export_value, _ndjson_chunks
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.closed = False
+    
+    def execute(self, query, params):
+        self.params = params
+    
+    def fetchmany(self, size):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+    
+    def close(self):
+        self.closed = True
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.streaming = FakeCursor(rows)
+        self.consumed = False
+    
+    def cursor(self, dictionary=False, buffered=True):
+        return self.streaming if buffered is False else None
+    
+    def consume_results(self):
+        self.consumed = True
+
+def test_export_values_are_json_and_csv_safe():
+    assert _export_value(date(2024, 5, 1)) == '2024-05-01'
+    assert _export_value(datetime(2024, 5, 1, 8, 30)) == '2024-05-01T08:30:00'
+    assert _export_value(timedelta(hours=26, minutes=3, seconds=4)) == '26:03:04'
+    assert _export_value(Decimal('-12.50')) == '-12.50'
+    assert _export_value(None) is None
+
+def test_csv_chunks_start_with_the_header_and_emit_one_chunk_per_batch():
+    batches = [[(1, date(2024, 5, 1), Decimal('1.00'))], [(2, date(2024, 5, 2), Decimal('2.50'))]]
+    chunks = list(_csv_chunks(['id', 'date', 'amount'], batches))
+    assert len(chunks) == 3
+    assert list(csv.reader(io.StringIO(''.join(chunks)))) == [
+        ['id', 'date', 'amount'], ['1', '2024-05-01', '1.00'], ['2', '2024-05-02', '2.50']
+    ]
+
+def test_ndjson_chunks_emit_one_object_per_line():
+    chunks = list(_ndjson_chunks(['id', 'notes'], [[(1, 'a "quote"'), (2, None)]]))
+    assert [json.loads(line) for line in ''.join(chunks).splitlines()] == [
+        {'id': 1, 'notes': 'a "quote"'}, {'id': 2, 'notes': None}
+    ]
+
+def test_stream_reads_in_batches_and_closes_the_cursor():
+    connection = FakeConnection([(n,) for n in range(5)])
+    db = SimpleDBConnection()
+    db.connection = connection
+    assert [len(rows) for rows in db.stream('SELECT 1', batch_size=2)] == [2, 2, 1]
+    assert connection.streaming.closed and not connection.consumed
+
+def test_abandoned_stream_drains_the_connection():
+    connection = FakeConnection([(n,) for n in range(5)])
+    db = SimpleDBConnection()
+    db.connection = connection
+    batches = db.stream('SELECT 1', batch_size=2)
+    next(batches)
+    batches.close()  # what the WSGI server does when the client disconnects
+    assert connection.consumed and connection.streaming.closed
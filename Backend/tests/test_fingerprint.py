@@ -0,0 +1,46 @@
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+import hashlib
+import os
+import re
+import pytest
+from models.transaction import Transaction
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+def mysql_fingerprint(account_id, transaction_date, amount, transaction_type, description):
+    """What FINGERPRINT_SQL computes for a stored row: amount is the DECIMAL(12,2) column value"""
+    stored_amount = Decimal(str(amount)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    normalized = description or ''
+    for removed in (' ', '\t', '\r', '\n'):
+        normalized = normalized.replace(removed, '')
+    key = '|'.join([str(account_id), transaction_date.isoformat(), str(stored_amount),
+                    transaction_type, normalized.lower()])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+@pytest.mark.parametrize('amount', [
+    '2.675', 2.675, '0.005', '-1.005', 1.005, 0.1 + 0.2, 10, '1234567.894', Decimal('19.99'), '0.015'
+])
+def test_amount_rounding_matches_decimal_column(amount):
+    args = (3, date(2024, 5, 1), amount, 'expense', 'Coffee')
+    assert Transaction.compute_fingerprint(*args) == mysql_fingerprint(*args)
+
+@pytest.mark.parametrize('description', [None, '', 'Coffee Shop', ' COFFEE\tshop\r\n', 'Café Über'])
+def test_description_normalization_matches_sql(description):
+    args = (3, date(2024, 5, 1), '4.50', 'expense', description)
+    assert Transaction.compute_fingerprint(*args) == mysql_fingerprint(*args)
+
+def test_date_strings_and_dates_agree():
+    assert (Transaction.compute_fingerprint(1, '2024-05-01', 5, 'income', 'Pay') ==
+            Transaction.compute_fingerprint(1, date(2024, 5, 1), '5.00', 'income', 'Pay'))
+
+def test_sql_expression_strips_the_same_characters():
+    sql = Transaction.FINGERPRINT_SQL
+    for removed in ("' '", 'CHAR(9)', 'CHAR(13)', 'CHAR(10)'):
+        assert f"{removed}, '')" in sql
+    assert "CONCAT_WS('|', {p}account_id, {p}transaction_date, {p}amount, {p}transaction_type" in sql
+
+def test_migration_backfill_uses_the_same_expression():
+    with open(os.path.join(MIGRATIONS_DIR, '0004_transaction_fingerprints.sql'), encoding='utf-8') as f:
+        migration = re.sub(r'\s+', '', f.read())
+    assert re.sub(r'\s+', '', Transaction.FINGERPRINT_SQL.format(p='')) in migration
@@ -0,0 +1,88 @@
+from datetime import date
+from decimal import Decimal
+import io
+import pytest
+from utils.importers import detect_format, parse_amount, parse_date, parse_statement
+
+def parse(text, fmt):
+    return list(parse_statement(io.StringIO(text), fmt))
+
+def test_csv_columns_are_matched_by_alias_and_blank_rows_skipped():
+    text = ('Posting Date,Payee,Amount,Memo,Extra\n'
+            '2024-05-01, Coffee ,-4.50,latte,x\n'
+            ',,,,\n'
+            '2024-05-02,Rent,-900\n')
+    assert parse(text, 'csv') == [
+        (2, {'date': '2024-05-01', 'amount': '-4.50', 'description': 'Coffee', 'notes': 'latte'}),
+        (4, {'date': '2024-05-02', 'amount': '-900', 'description': 'Rent', 'notes': ''})
+    ]
+
+def test_csv_line_numbers_count_quoted_newlines():
+    text = 'date,amount,description\n2024-05-01,1,"two\nlines"\n2024-05-02,2,next\n'
+    assert [line for line, _ in parse(text, 'csv')] == [3, 4]
+
+def test_empty_csv_yields_nothing():
+    assert parse('', 'csv') == []
+
+def test_ofx_sgml_records():
+    text = ('OFXHEADER:100\n<OFX><BANKTRANLIST>\n'
+            '<STMTTRN>\n<TRNTYPE>DEBIT\n<DTPOSTED>20240501120000[-5:EST]\n<TRNAMT>-12.34\n'
+            '<FITID>A1\n<NAME>Grocer\n<MEMO>weekly\n</STMTTRN>\n'
+            '<STMTTRN><DTPOSTED>20240502<TRNAMT>100.00<NAME>Refund</STMTTRN>\n'
+            '</BANKTRANLIST></OFX>\n')
+    assert parse(text, 'ofx') == [
+        (3, {'date': '20240501120000[-5:EST]', 'amount': '-12.34', 'reference': 'A1',
+             'description': 'Grocer', 'notes': 'weekly'}),
+        (11, {'date': '20240502', 'amount': '100.00', 'description': 'Refund'})
+    ]
+
+def test_ofx_xml_closing_tags_are_ignored():
+    text = '<STMTTRN><DTPOSTED>20240501</DTPOSTED><TRNAMT>-1.00</TRNAMT></STMTTRN>'
+    assert parse(text, 'ofx') == [(1, {'date': '20240501', 'amount': '-1.00'})]
+
+def test_qif_blocks_and_transfer_categories():
+    text = ('!Type:Bank\n'
+            'D5/1\'24\nT-4.50\nPCoffee\nLFood:Coffee\n^\n'
+            'D5/2/2024\nU-100.00\nPTo savings\nL[Savings]\nMmonthly\n^\n'
+            'D5/3/2024\nT1.00\n')
+    assert parse(text, 'qif') == [
+        (2, {'date': "5/1'24", 'amount': '-4.50', 'description': 'Coffee', 'category': 'Food:Coffee'}),
+        (7, {'date': '5/2/2024', 'amount': '-100.00', 'description': 'To savings', 'notes': 'monthly'}),
+        (13, {'date': '5/3/2024', 'amount': '1.00'})
+    ]
+
+@pytest.mark.parametrize('value, expected', [
+    ('2024-05-01', date(2024, 5, 1)),
+    ('05/01/2024', date(2024, 5, 1)),
+    ('5/1/24', date(2024, 5, 1)),
+    ("5/1'24", date(2024, 5, 1)),
+    ('01.05.2024', date(2024, 5, 1)),
+    ('20240501120000.000[-5:EST]', date(2024, 5, 1))
+])
+def test_parse_date_formats(value, expected):
+    assert parse_date(value) == expected
+
+@pytest.mark.parametrize('value', ['', '2024-13-01', 'tomorrow'])
+def test_parse_date_rejects(value):
+    with pytest.raises(ValueError):
+        parse_date(value)
+
+@pytest.mark.parametrize('value, expected', [
+    ('1,234.56', Decimal('1234.56')),
+    ('$-4.50', Decimal('-4.50')),
+    ('(12.00)', Decimal('-12.00')),
+    ('+7', Decimal('7'))
+])
+def test_parse_amount(value, expected):
+    assert parse_amount(value) == expected
+
+@pytest.mark.parametrize('value', ['', 'abc', '1.2.3'])
+def test_parse_amount_rejects(value):
+    with pytest.raises(ValueError):
+        parse_amount(value)
+
+def test_detect_format():
+    assert detect_format('statement.OFX') == 'ofx'
+    assert detect_format('statement.txt', 'QIF') == 'qif'
+    with pytest.raises(ValueError):
+        detect_format('statement.xlsx')
@@ -0,0 +1,72 @@
+from datetime import date, datetime
+from decimal import Decimal
+import pytest
+from models.account import Account
+from models.transaction import Transaction
+
+def insert_row(account_id, transaction_date, amount, transaction_type, user_id=1, category_id=None):
+    values = {'user_id': user_id, 'account_id': account_id, 'category_id': category_id,
+              'transaction_date': transaction_date, 'amount': amount, 'transaction_type': transaction_type}
+    return tuple(values.get(column) for column in Transaction.INSERT_COLUMNS)
+
+class RecordingDB:
+    def __init__(self):
+        self.calls = []
+        self.cursor = type('Cursor', (), {'rowcount': 0})()
+    
+    def execute(self, query, params=None):
+        self.calls.append((' '.join(query.split()), params))
+
+@pytest.mark.parametrize('transaction_type, amount, expected', [
+    ('income', '25.00', Decimal('25.00')),
+    ('income', '-25.00', Decimal('25.00')),
+    ('expense', '25.00', Decimal('-25.00')),
+    ('expense', '-25.00', Decimal('-25.00')),
+    ('transfer', '25.00', Decimal('0')),
+    ('expense', None, Decimal('0'))
+])
+def test_signed_amount_ignores_the_stored_sign(transaction_type, amount, expected):
+    assert Account.signed_amount(transaction_type, amount) == expected
+
+def test_ledger_deltas_group_by_account_and_day():
+    rows = [
+        insert_row(1, '2024-05-01', '100.00', 'income'),
+        insert_row(1, date(2024, 5, 1), '-30.00', 'expense'),
+        insert_row(1, datetime(2024, 5, 2, 9, 0), '5.00', 'expense'),
+        insert_row(2, '2024-05-01', '7.00', 'transfer')
+    ]
+    assert Transaction.ledger_deltas(rows) == {
+        (1, date(2024, 5, 1)): Decimal('70.00'),
+        (1, date(2024, 5, 2)): Decimal('-5.00'),
+        (2, date(2024, 5, 1)): Decimal('0')
+    }
+
+def test_rollup_entries_pick_the_rollup_columns():
+    rows = [insert_row(4, '2024-05-01', '-12.00', 'expense', user_id=9, category_id=3)]
+    assert Transaction.rollup_entries(rows) == [(9, '2024-05-01', 'expense', 3, '-12.00')]
+
+def test_balance_deltas_net_per_account_and_shift_later_snapshots():
+    db = RecordingDB()
+    Account.apply_balance_deltas(db, {
+        (1, date(2024, 5, 1)): Decimal('70'),
+        (1, date(2024, 5, 3)): Decimal('-20'),
+        (2, date(2024, 5, 1)): Decimal('0')
+    })
+    (balances, balance_params), (snapshots, snapshot_params) = db.calls
+    assert balances.startswith('UPDATE Accounts')
+    assert balance_params == [1, Decimal('50'), 1]
+    assert snapshots.startswith('UPDATE AccountBalanceSnapshots')
+    assert snapshot_params == [1, date(2024, 5, 1), Decimal('70'), 1, date(2024, 5, 3), Decimal('-20'),
+                               1, date(2024, 5, 1), 1, date(2024, 5, 3)]
+
+def test_offsetting_deltas_still_move_snapshots_between_the_days():
+    db = RecordingDB()
+    # Moving a transaction from the 1st to the 3rd leaves the balance alone
+    Account.apply_balance_deltas(db, {(1, date(2024, 5, 1)): Decimal('-5'), (1, date(2024, 5, 3)): Decimal('5')})
+    assert len(db.calls) == 1
+    assert db.calls[0][0].startswith('UPDATE AccountBalanceSnapshots')
+
+def test_no_deltas_runs_no_sql():
+    db = RecordingDB()
+    assert Account.apply_balance_deltas(db, {(1, date(2024, 5, 1)): Decimal('0')}) == 0
+    assert db.calls == []
@@ -0,0 +1,86 @@
+from datetime import date
+from decimal import Decimal
+import pytest
+from models.monthly_rollup import MonthlyCategoryRollup
+
+class RecordingDB:
+    def __init__(self):
+        self.calls = []
+    
+    def execute(self, query, params=None):
+        self.calls.append((' '.join(query.split()), params))
+
+def rows_of(params, width=8):
+    return [tuple(params[i:i + width]) for i in range(0, len(params), width)]
+
+def test_record_inserts_buckets_by_user_month_type_and_category():
+    db = RecordingDB()
+    written = MonthlyCategoryRollup.record_inserts(db, [
+        (1, date(2024, 5, 3), 'expense', 7, Decimal('-40.00')),
+        (1, '2024-05-28', 'expense', 7, Decimal('10.00')),
+        (1, date(2024, 6, 1), 'expense', 7, Decimal('5.00')),
+        (1, date(2024, 5, 3), 'expense', None, Decimal('2.00')),
+        (1, date(2024, 5, 3), 'income', 7, Decimal('100.00')),
+        (2, date(2024, 5, 3), 'expense', 7, Decimal('1.00'))
+    ])
+    assert written == 5
+    assert len(db.calls) == 1
+    assert rows_of(db.calls[0][1]) == [
+        (1, date(2024, 5, 1), 'expense', 7, Decimal('50.00'), 2, Decimal('10.00'), Decimal('40.00')),
+        (1, date(2024, 6, 1), 'expense', 7, Decimal('5.00'), 1, Decimal('5.00'), Decimal('5.00')),
+        (1, date(2024, 5, 1), 'expense', 0, Decimal('2.00'), 1, Decimal('2.00'), Decimal('2.00')),
+        (1, date(2024, 5, 1), 'income', 7, Decimal('100.00'), 1, Decimal('100.00'), Decimal('100.00')),
+        (2, date(2024, 5, 1), 'expense', 7, Decimal('1.00'), 1, Decimal('1.00'), Decimal('1.00'))
+    ]
+
+def test_record_inserts_without_entries_runs_no_sql():
+    db = RecordingDB()
+    assert MonthlyCategoryRollup.record_inserts(db, []) == 0
+    assert db.calls == []
+
+def test_refresh_months_recomputes_each_distinct_month_once():
+    db = RecordingDB()
+    assert MonthlyCategoryRollup.refresh_months(db, 1, ['2024-12-09', date(2024, 12, 31), date(2025, 2, 1)]) == 2
+    (delete, delete_params), (insert, insert_params) = db.calls
+    assert delete.startswith('DELETE FROM MonthlyCategoryRollup')
+    assert delete_params == [1, date(2024, 12, 1), date(2025, 2, 1)]
+    assert insert_params == [1, date(2024, 12, 1), date(2025, 1, 1), date(2025, 2, 1), date(2025, 3, 1)]
+
+def test_amounts_are_magnitudes_in_sql():
+    assert MonthlyCategoryRollup.AMOUNT_SQL.startswith('ABS(')
+
+@pytest.fixture
+def recorded_ranges(monkeypatch):
+    ranges = []
+    
+    def rollup(db, user_id, start, end, group_by, transaction_type):
+        ranges.append(('rollup', start, end))
+        return [{'type': 'expense', 'total': Decimal('10'), 'count': 1}]
+    
+    def raw(db, user_id, start, end, group_by, transaction_type):
+        ranges.append(('raw', start, end))
+        return [{'type': 'expense', 'total': Decimal('1'), 'count': 1},
+                {'type': 'income', 'total': Decimal('3'), 'count': 1}]
+    
+    monkeypatch.setattr(MonthlyCategoryRollup, '_rollup_totals', staticmethod(rollup))
+    monkeypatch.setattr(MonthlyCategoryRollup, '_raw_totals', staticmethod(raw))
+    return ranges
+
+def test_totals_read_whole_months_from_the_rollup_and_edges_raw(recorded_ranges):
+    rows = MonthlyCategoryRollup.totals(None, 1, date(2024, 1, 15), date(2024, 4, 10), ('type',))
+    assert recorded_ranges == [
+        ('rollup', date(2024, 2, 1), date(2024, 4, 1)),
+        ('raw', date(2024, 1, 15), date(2024, 2, 1)),
+        ('raw', date(2024, 4, 1), date(2024, 4, 10))
+    ]
+    assert sorted((row['type'], row['total'], row['count']) for row in rows) == [
+        ('expense', Decimal('12'), 3), ('income', Decimal('6'), 2)
+    ]
+
+def test_totals_on_month_boundaries_skip_raw_reads(recorded_ranges):
+    MonthlyCategoryRollup.totals(None, 1, date(2024, 1, 1), date(2024, 3, 1), ('type',))
+    assert recorded_ranges == [('rollup', date(2024, 1, 1), date(2024, 3, 1))]
+
+def test_totals_inside_one_month_read_raw(recorded_ranges):
+    MonthlyCategoryRollup.totals(None, 1, date(2024, 1, 5), date(2024, 1, 20), ('type',))
+    assert recorded_ranges == [('raw', date(2024, 1, 5), date(2024, 1, 20))]
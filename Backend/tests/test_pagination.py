@@ -0,0 +1,66 @@
+from datetime import date, datetime
+from decimal import Decimal
+import pytest
+from flask import Flask, g
+import models.transaction as transaction_module
+from models.transaction import Transaction
+from utils.pagination import decode_cursor, encode_cursor
+
+def test_cursor_round_trips_sort_keys():
+    values = (date(2024, 2, 29), datetime(2024, 2, 29, 13, 45, 7, 120), 98765)
+    assert decode_cursor(encode_cursor(*values), 3) == list(values)
+
+def test_cursor_round_trips_decimals_strings_and_none():
+    values = (Decimal('-12.50'), 'Coffee "to go"', None)
+    decoded = decode_cursor(encode_cursor(*values), 3)
+    assert decoded == list(values)
+    assert isinstance(decoded[0], Decimal)
+
+def test_cursor_is_url_safe():
+    token = encode_cursor('??>>~~' * 10, date(2024, 1, 1))
+    assert all(ch.isalnum() or ch in '-_' for ch in token)
+
+@pytest.mark.parametrize('token', ['', 'not a cursor', encode_cursor(1, 2), encode_cursor({'x': 1}, 2, 3)])
+def test_malformed_cursor_is_rejected(token):
+    with pytest.raises(ValueError):
+        decode_cursor(token, 3)
+
+class CountingDB:
+    def __init__(self):
+        self.queries = 0
+    
+    def execute(self, query, params=None):
+        self.queries += 1
+    
+    def fetchone(self):
+        return {'count': 7}
+
+@pytest.fixture
+def count_cache(monkeypatch):
+    monkeypatch.setattr(transaction_module, 'COUNT_CACHE_MAX_ENTRIES', 3)
+    monkeypatch.setattr(transaction_module, '_count_cache', type(transaction_module._count_cache)())
+    app = Flask(__name__)
+    with app.app_context():
+        g.db_config = {'host': 'db', 'database': 'finance'}
+        yield transaction_module._count_cache
+
+def test_count_cache_is_bounded(count_cache):
+    db = CountingDB()
+    for account_id in range(5):
+        Transaction.get_filtered_count(db, 1, 't.account_id = %s', [account_id])
+    assert len(count_cache) == 3
+    
+    Transaction.get_filtered_count(db, 1, 't.account_id = %s', [4])
+    assert db.queries == 5  # still cached
+    Transaction.get_filtered_count(db, 1, 't.account_id = %s', [0])
+    assert db.queries == 6  # evicted as least recently used
+
+def test_count_cache_is_keyed_by_database(count_cache):
+    db = CountingDB()
+    Transaction.get_filtered_count(db, 1, 't.user_id = %s', [1])
+    g.db_config = {'host': 'db', 'database': 'other'}
+    Transaction.get_filtered_count(db, 1, 't.user_id = %s', [1])
+    assert db.queries == 2
+    
+    Transaction.invalidate_count_cache(1)
+    assert not count_cache
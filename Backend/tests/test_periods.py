@@ -0,0 +1,48 @@
+from datetime import date, datetime
+import pytest
+from utils.periods import (comparison_ranges, month_range, period_range, quarter_range,
+                           rolling_range, week_range, year_range)
+
+def test_month_range_is_half_open():
+    assert month_range(2024, 2) == (date(2024, 2, 1), date(2024, 3, 1))
+    assert month_range(2024, 12) == (date(2024, 12, 1), date(2025, 1, 1))
+
+def test_quarter_and_year_ranges():
+    assert quarter_range(2024, 4) == (date(2024, 10, 1), date(2025, 1, 1))
+    assert year_range(2024) == (date(2024, 1, 1), date(2025, 1, 1))
+
+def test_week_range_starts_monday():
+    start, end = week_range(date(2024, 3, 17))  # a Sunday
+    assert start == date(2024, 3, 11)
+    assert end == date(2024, 3, 18)
+
+def test_rolling_range_includes_the_day():
+    assert rolling_range(7, date(2024, 3, 10)) == (date(2024, 3, 4), date(2024, 3, 11))
+
+def test_period_range_accepts_datetimes_and_offsets():
+    assert period_range('month', datetime(2024, 1, 31, 23, 59)) == (date(2024, 1, 1), date(2024, 2, 1))
+    assert period_range('month', date(2024, 1, 15), offset=-1) == (date(2023, 12, 1), date(2024, 1, 1))
+    assert period_range('quarter', date(2024, 5, 5)) == (date(2024, 4, 1), date(2024, 7, 1))
+
+def test_adjacent_ranges_share_a_boundary():
+    # The end of one period is the start of the next, so no day is counted twice or skipped
+    for period in ('week', 'month', 'quarter', 'year'):
+        current = period_range(period, date(2024, 2, 29))
+        following = period_range(period, date(2024, 2, 29), offset=1)
+        assert current[1] == following[0]
+        assert current[0] < current[1]
+
+def test_comparison_ranges():
+    current, previous = comparison_ranges('month', day=date(2024, 3, 15))
+    assert previous == (date(2024, 2, 1), date(2024, 3, 1))
+    assert previous[1] == current[0]
+    
+    current, last_year = comparison_ranges('days', 'yoy', days=30, day=date(2024, 2, 29))
+    assert current == (date(2024, 1, 31), date(2024, 3, 1))
+    assert last_year == (date(2023, 1, 31), date(2023, 3, 1))
+
+def test_unknown_period_is_rejected():
+    with pytest.raises(ValueError):
+        period_range('fortnight')
+    with pytest.raises(ValueError):
+        comparison_ranges('days')
@@ -0,0 +1,39 @@
+from datetime import date
+import pytest
+from utils.recurrence import next_occurrence, occurrence, occurrences
+
+def test_monthly_clamps_to_month_end_without_drifting():
+    start = date(2024, 1, 31)
+    assert [occurrence(start, 'monthly', i) for i in range(5)] == [
+        date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30), date(2024, 5, 31)
+    ]
+
+def test_monthly_clamps_in_non_leap_years():
+    assert occurrence(date(2023, 1, 30), 'monthly', 1) == date(2023, 2, 28)
+    assert occurrence(date(2023, 1, 30), 'monthly', 2) == date(2023, 3, 30)
+
+def test_monthly_crosses_year_end():
+    assert occurrence(date(2024, 11, 30), 'monthly', 3) == date(2025, 2, 28)
+
+def test_yearly_leap_day():
+    start = date(2024, 2, 29)
+    assert [occurrence(start, 'yearly', i) for i in range(5)] == [
+        date(2024, 2, 29), date(2025, 2, 28), date(2026, 2, 28), date(2027, 2, 28), date(2028, 2, 29)
+    ]
+
+def test_occurrences_window_is_half_open():
+    days = list(occurrences(date(2024, 1, 31), 'monthly', date(2024, 2, 29), date(2024, 4, 30)))
+    assert days == [date(2024, 2, 29), date(2024, 3, 31)]
+
+def test_occurrences_stop_after_inclusive_end_date():
+    days = list(occurrences(date(2024, 1, 1), 'weekly', date(2024, 1, 1), date(2025, 1, 1), end_date=date(2024, 1, 15)))
+    assert days == [date(2024, 1, 1), date(2024, 1, 8), date(2024, 1, 15)]
+
+def test_next_occurrence_after_a_clamped_month():
+    start = date(2024, 1, 31)
+    assert next_occurrence(start, 'monthly', date(2024, 2, 29)) == date(2024, 3, 31)
+    assert next_occurrence(start, 'monthly', date(2024, 3, 31), end_date=date(2024, 4, 29)) is None
+
+def test_unknown_frequency_is_rejected():
+    with pytest.raises(ValueError):
+        occurrence(date(2024, 1, 1), 'hourly', 1)
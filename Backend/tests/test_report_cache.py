@@ -0,0 +1,86 @@
+import sys
+import pytest
+from flask import Flask, g
+import utils.report_cache as report_cache_module
+from utils.report_cache import MemoryCacheBackend, ReportCache
+
+@pytest.fixture
+def app_context():
+    app = Flask(__name__)
+    with app.app_context():
+        g.db_config = {'host': 'db', 'port': 3306, 'database': 'finance'}
+        yield
+
+@pytest.fixture
+def cache():
+    return ReportCache(MemoryCacheBackend(max_entries=2, ttl=300))
+
+def test_key_and_etag_are_stable_until_a_bump(app_context, cache):
+    first = cache.resolve(1, 'dashboard.summary', {'args': {'period': ['month']}})
+    assert cache.resolve(1, 'dashboard.summary', {'args': {'period': ['month']}}) == first
+    
+    cache.bump(1)
+    key, etag = cache.resolve(1, 'dashboard.summary', {'args': {'period': ['month']}})
+    assert key != first[0] and etag != first[1]
+
+def test_bump_only_affects_its_user(app_context, cache):
+    other = cache.resolve(2, 'dashboard.summary', {})
+    cache.bump(1)
+    assert cache.resolve(2, 'dashboard.summary', {}) == other
+
+def test_keys_differ_by_endpoint_and_params(app_context, cache):
+    keys = {cache.resolve(1, endpoint, params)[0]
+            for endpoint in ('reports.monthly', 'reports.yearly')
+            for params in ({'args': {'year': ['2024']}}, {'args': {'year': ['2023']}})}
+    assert len(keys) == 4
+
+def test_keys_and_versions_are_scoped_by_database(app_context, cache):
+    finance = cache.resolve(1, 'dashboard.summary', {})
+    g.db_config = {'host': 'db', 'port': 3306, 'database': 'finance_demo'}
+    demo = cache.resolve(1, 'dashboard.summary', {})
+    assert finance[0] != demo[0] and finance[1] != demo[1]
+    
+    # A write in one database leaves the other's entries and ETags valid
+    cache.bump(1)
+    assert cache.resolve(1, 'dashboard.summary', {}) != demo
+    g.db_config = {'host': 'db', 'port': 3306, 'database': 'finance'}
+    assert cache.resolve(1, 'dashboard.summary', {}) == finance
+
+def test_explicit_database_matches_the_context(app_context, cache):
+    key, _ = cache.resolve(1, 'dashboard.summary', {})
+    cache.bump(1, 'db:3306/finance')
+    assert cache.resolve(1, 'dashboard.summary', {})[0] != key
+
+def test_memory_versions_only_change_on_bump(app_context, cache, monkeypatch):
+    key, _ = cache.resolve(1, 'dashboard.summary', {})
+    now = report_cache_module.time.time()
+    monkeypatch.setattr(report_cache_module.time, 'time', lambda: now + 3600)
+    assert cache.resolve(1, 'dashboard.summary', {})[0] == key
+    cache.bump(1)
+    assert cache.resolve(1, 'dashboard.summary', {})[0] != key
+
+def test_memory_backend_is_an_lru(app_context, cache):
+    keys = [cache.resolve(1, 'reports.monthly', {'n': n})[0] for n in range(3)]
+    cache.store(keys[0], {'body': b'0'})
+    cache.store(keys[1], {'body': b'1'})
+    assert cache.get(keys[0]) == {'body': b'0'}
+    cache.store(keys[2], {'body': b'2'})
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    assert cache.stats()['evictions'] == 1
+
+def test_memory_backend_is_disabled_with_several_workers(monkeypatch):
+    monkeypatch.setenv('WEB_CONCURRENCY', '4')
+    monkeypatch.setenv('REPORT_CACHE_BACKEND', 'memory')
+    assert report_cache_module._backend_from_env() is None
+    
+    monkeypatch.delenv('REPORT_CACHE_BACKEND')
+    monkeypatch.setenv('WEB_CONCURRENCY', '1')
+    assert isinstance(report_cache_module._backend_from_env(), MemoryCacheBackend)
+
+def test_missing_redis_package_disables_the_cache(monkeypatch):
+    # A multi-worker deploy defaults to redis; without the package it must still boot
+    monkeypatch.setitem(sys.modules, 'redis', None)
+    monkeypatch.setenv('WEB_CONCURRENCY', '2')
+    monkeypatch.delenv('REPORT_CACHE_BACKEND', raising=False)
+    assert report_cache_module._backend_from_env() is None
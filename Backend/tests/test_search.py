@@ -0,0 +1,60 @@
+from datetime import date
+from decimal import Decimal
+import pytest
+import models.transaction as transaction_module
+from models.transaction import Transaction
+from utils.pagination import decode_cursor, encode_cursor
+
+class SearchDB:
+    def __init__(self, rows):
+        self.connection = object()
+        self.rows = rows
+    
+    def execute(self, query, params=None):
+        self.query = ' '.join(query.split())
+        self.params = params
+    
+    def fetchall(self):
+        return self.rows
+
+@pytest.fixture
+def search_db(monkeypatch):
+    def install(rows):
+        db = SearchDB(rows)
+        monkeypatch.setattr(transaction_module, 'get_db_connection', lambda: db)
+        monkeypatch.setattr(Transaction, 'row_to_dict', staticmethod(lambda row: {'transaction_id': row['transaction_id']}))
+        return db
+    return install
+
+def hit(transaction_id, relevance):
+    return {'transaction_id': transaction_id, 'relevance': Decimal(relevance)}
+
+@pytest.mark.parametrize('query', [None, '', '   '])
+def test_search_requires_a_query(query):
+    with pytest.raises(ValueError, match='q is required'):
+        Transaction.search(1, query)
+
+def test_first_page_orders_by_relevance_and_returns_a_cursor(search_db):
+    db = search_db([hit(9, '2.500000'), hit(4, '1.250000'), hit(3, '1.250000')])
+    result = Transaction.search(1, ' coffee ', per_page=2, start_date='2024-05-01')
+    
+    assert db.query.endswith('ORDER BY relevance DESC, t.transaction_id DESC LIMIT %s')
+    assert 'HAVING' not in db.query
+    assert db.params == ['coffee', 1, date(2024, 5, 1), 'coffee', 3]
+    assert [item['transaction_id'] for item in result['items']] == [9, 4]
+    assert [item['relevance'] for item in result['items']] == [2.5, 1.25]
+    assert result['has_more']
+    assert decode_cursor(result['next_cursor'], 2) == [Decimal('1.250000'), 4]
+
+def test_cursor_seeks_past_the_last_hit_with_ties_broken_by_id(search_db):
+    db = search_db([hit(3, '1.250000')])
+    result = Transaction.search(1, 'coffee', per_page=2, cursor=encode_cursor(Decimal('1.250000'), 4))
+    
+    assert 'HAVING relevance < %s OR (relevance = %s AND t.transaction_id < %s)' in db.query
+    assert db.params[-4:] == [Decimal('1.250000'), Decimal('1.250000'), 4, 3]
+    assert not result['has_more'] and result['next_cursor'] is None
+
+def test_page_size_is_capped(search_db):
+    db = search_db([])
+    assert Transaction.search(1, 'coffee', per_page=10 ** 6)['per_page'] == Transaction.MAX_PER_PAGE
+    assert db.params[-1] == Transaction.MAX_PER_PAGE + 1
@@ -0,0 +1,58 @@
+from datetime import date
+from decimal import Decimal
+import pytest
+from models.transaction_bulk import TransactionBulk
+
+class ScriptedDB:
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = []
+    
+    def execute(self, query, params=None):
+        self.calls.append((' '.join(query.split()), params))
+    
+    def fetchall(self):
+        return self.results.pop(0)
+
+def test_validate_keeps_only_updatable_fields_and_parses_the_date():
+    changes = TransactionBulk._validate_changes(ScriptedDB(), 1, {
+        'transaction_date': '2024-02-29', 'status': 'cleared', 'amount': 5, 'user_id': 2
+    })
+    assert changes == {'transaction_date': date(2024, 2, 29), 'status': 'cleared'}
+
+@pytest.mark.parametrize('changes, message', [
+    ({'amount': 5}, 'No updatable fields'),
+    ({'transaction_type': 'refund'}, 'transaction_type must be'),
+    ({'transaction_date': '2023-02-29'}, 'transaction_date must be a date'),
+    ({'transaction_date': None}, 'transaction_date must be a date')
+])
+def test_validate_rejects_bad_changes(changes, message):
+    with pytest.raises(ValueError, match=message):
+        TransactionBulk._validate_changes(ScriptedDB(), 1, changes)
+
+def test_validate_checks_account_and_category_ownership():
+    db = ScriptedDB([{'1': 1}], [])
+    with pytest.raises(ValueError, match='Category not found'):
+        TransactionBulk._validate_changes(db, 7, {'account_id': 3, 'category_id': 4})
+    assert [params for _, params in db.calls] == [(3, 7), (4, 7)]
+
+def test_resolve_ids_dedupes_sorts_and_locks_in_chunks(monkeypatch):
+    monkeypatch.setattr(TransactionBulk, 'CHUNK_SIZE', 2)
+    db = ScriptedDB([{'transaction_id': 1}, {'transaction_id': 2}], [{'transaction_id': 5}])
+    assert TransactionBulk.resolve_ids(db, 7, ids=['5', 2, 1, 2, 9]) == [1, 2, 5]
+    assert [params for _, params in db.calls] == [[7, 1, 2], [7, 5, 9]]
+    assert all(query.endswith('FOR UPDATE') for query, _ in db.calls)
+
+def test_resolve_ids_limits_the_selection(monkeypatch):
+    monkeypatch.setattr(TransactionBulk, 'MAX_IDS', 2)
+    with pytest.raises(ValueError, match='At most 2'):
+        TransactionBulk.resolve_ids(ScriptedDB(), 7, ids=[1, 2, 3])
+    with pytest.raises(ValueError, match='ids or filter is required'):
+        TransactionBulk.resolve_ids(ScriptedDB(), 7)
+
+def test_negate_turns_daily_sums_into_removals():
+    entries = [(7, date(2024, 5, 1), 'expense', None, Decimal('12.50'), 3)]
+    assert TransactionBulk._negate(entries) == [(7, date(2024, 5, 1), 'expense', None, Decimal('-12.50'), -3)]
+
+def test_chunks_cover_every_id_once():
+    assert list(TransactionBulk._chunks(list(range(5)), 2)) == [[0, 1], [2, 3], [4]]
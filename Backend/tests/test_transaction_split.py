@@ -0,0 +1,115 @@
+from datetime import date
+from decimal import Decimal
+import pytest
+import models.transaction_split as split_module
+from models.transaction_split import TransactionSplit
+
+class ScriptedDB:
+    """Answers fetchone/fetchall from queues and records writes"""
+    
+    def __init__(self, fetchone=(), fetchall=()):
+        self.connection = object()
+        self.cursor = type('Cursor', (), {'rowcount': 0})()
+        self.one = list(fetchone)
+        self.all = list(fetchall)
+        self.calls = []
+        self.many = []
+        self.committed = False
+        self.rolled_back = False
+    
+    def execute(self, query, params=None):
+        self.calls.append((' '.join(query.split()), params))
+    
+    def executemany(self, query, rows):
+        self.many.extend(rows)
+    
+    def fetchone(self):
+        return self.one.pop(0)
+    
+    def fetchall(self):
+        return self.all.pop(0)
+    
+    def commit(self):
+        self.committed = True
+    
+    def rollback(self):
+        self.rolled_back = True
+
+@pytest.fixture
+def use_db(monkeypatch):
+    def install(db):
+        monkeypatch.setattr(split_module, 'get_db_connection', lambda: db)
+        monkeypatch.setattr(split_module.MonthlyCategoryRollup, 'refresh_months', staticmethod(lambda *args: 1))
+        monkeypatch.setattr(split_module.DashboardSnapshot, 'after_write', staticmethod(lambda user_id: None))
+        monkeypatch.setattr(split_module.event_bus, 'publish', lambda *args: None)
+        monkeypatch.setattr(TransactionSplit, 'get_by_transaction', staticmethod(lambda *args: []))
+        return db
+    return install
+
+@pytest.mark.parametrize('splits, message', [
+    ([], 'non-empty list'),
+    ({'category_id': 1, 'amount': 1}, 'non-empty list'),
+    ([{'category_id': 1}], 'split 1: category_id and amount are required'),
+    ([{'category_id': 1, 'amount': 5}, {'category_id': 2, 'amount': 'x'}], 'split 2: invalid amount'),
+    ([{'category_id': 1, 'amount': '0.001'}], 'split 1: amount must not be zero')
+])
+def test_parse_rejects_malformed_splits(splits, message):
+    with pytest.raises(ValueError, match=message):
+        TransactionSplit._parse(splits)
+
+def test_parse_rounds_to_cents():
+    assert TransactionSplit._parse([{'category_id': '4', 'amount': 12.345, 'description': 'x'}]) == [
+        (4, Decimal('12.35'), 'x')
+    ]
+
+def test_splits_take_the_sign_of_a_negative_transaction(use_db):
+    db = use_db(ScriptedDB(fetchone=[{'amount': Decimal('-30.00'), 'transaction_date': date(2024, 5, 1)},
+                                     {'owned': 2}]))
+    TransactionSplit.replace_for_transaction(9, 1, [{'category_id': 1, 'amount': 20},
+                                                    {'category_id': 2, 'amount': '-10'}])
+    assert db.many == [(9, 1, Decimal('-20.00'), None), (9, 2, Decimal('-10.00'), None)]
+    assert db.committed
+
+def test_splits_must_add_up_to_the_transaction(use_db):
+    db = use_db(ScriptedDB(fetchone=[{'amount': Decimal('30.00'), 'transaction_date': date(2024, 5, 1)}]))
+    with pytest.raises(ValueError, match='add up to 29.99, transaction amount is 30.00'):
+        TransactionSplit.replace_for_transaction(9, 1, [{'category_id': 1, 'amount': '19.99'},
+                                                        {'category_id': 2, 'amount': 10}])
+    assert db.rolled_back and not db.many
+
+def test_splits_must_use_the_users_categories(use_db):
+    db = use_db(ScriptedDB(fetchone=[{'amount': Decimal('30.00'), 'transaction_date': date(2024, 5, 1)},
+                                     {'owned': 1}]))
+    with pytest.raises(ValueError, match='Category not found'):
+        TransactionSplit.replace_for_transaction(9, 1, [{'category_id': 1, 'amount': 15},
+                                                        {'category_id': 2, 'amount': 15}])
+    assert db.rolled_back
+
+def rescaled(db):
+    return [params[0] for query, params in db.calls if query.startswith('UPDATE TransactionSplits')]
+
+def test_rescale_keeps_shares_and_gives_the_remainder_to_the_last_split():
+    db = ScriptedDB(fetchall=[[{'split_id': 1, 'amount': Decimal('10.00')},
+                               {'split_id': 2, 'amount': Decimal('10.00')},
+                               {'split_id': 3, 'amount': Decimal('10.00')}]])
+    assert TransactionSplit.rescale(db, 9, '30.00', '10.00') == 3
+    assert rescaled(db) == [Decimal('3.33'), Decimal('3.33'), Decimal('3.34')]
+
+def test_rescale_follows_a_sign_change():
+    db = ScriptedDB(fetchall=[[{'split_id': 1, 'amount': Decimal('20.00')},
+                               {'split_id': 2, 'amount': Decimal('10.00')}]])
+    TransactionSplit.rescale(db, 9, '30.00', '-60.00')
+    assert rescaled(db) == [Decimal('-40.00'), Decimal('-20.00')]
+
+def test_rescale_without_splits_or_change_writes_nothing():
+    for splits, new_amount in (([], '5.00'), ([{'split_id': 1, 'amount': Decimal('5.00')}], '5.00')):
+        db = ScriptedDB(fetchall=[splits])
+        assert TransactionSplit.rescale(db, 9, '5.00', new_amount) == 0
+        assert rescaled(db) == []
+
+@pytest.mark.parametrize('new_amount', ['0', '0.02'])
+def test_rescale_refuses_amounts_the_splits_cannot_share(new_amount):
+    db = ScriptedDB(fetchall=[[{'split_id': n, 'amount': Decimal('10.00')} for n in (1, 2, 3)]])
+    with pytest.raises(ValueError):
+        TransactionSplit.rescale(db, 9, '30.00', new_amount)
+    assert rescaled(db) == []
@@ -1,5 +1,8 @@
+from datetime import date
 from functools import wraps
-from flask import jsonify, request, session
+from flask import Response, jsonify, request, session
+from flask_jwt_extended import get_jwt_identity
+from utils.report_cache import ReportCache, report_cache
 
 def require_db_connection(f):
     """Decorator to check database connection"""
@@ -21,4 +24,72 @@ def require_db_connection(f):
         print(f"[Decorator] Database config found in session: {session.get('db_config')}")
         print(f"[Decorator] Proceeding to call {f.__name__}")
         return f(*args, **kwargs)
+    return decorated_function
+
+def _validate_get(kwargs):
+    """(cache key, ETag, 304 response or None) for this GET from the user's data version"""
+    # Relative periods ("this month", "last 30 days") move with the date
+    params = {'args': request.args.to_dict(flat=False), 'view_args': kwargs, 'today': date.today().isoformat()}
+    key, etag = report_cache.resolve(get_jwt_identity(), request.endpoint, params)
+    if etag is None:
+        return None, None, None
+    
+    conditional = bool(request.if_none_match)
+    not_modified = conditional and request.if_none_match.contains_weak(etag)
+    report_cache.record_validation(conditional, not_modified)
+    if not not_modified:
+        return key, etag, None
+    
+    response = Response(status=304)
+    response.set_etag(etag, weak=True)
+    response.headers['Vary'] = 'Accept-Encoding'
+    return key, etag, response
+
+def conditional_get(f):
+    """Tag GET responses with a data-version ETag and answer 304, without running the view, while it still matches"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if request.method != 'GET':
+            return f(*args, **kwargs)
+        
+        key, etag, not_modified = _validate_get(kwargs)
+        if not_modified is not None:
+            return not_modified
+        
+        response = f(*args, **kwargs)
+        body, status = response if isinstance(response, tuple) else (response, 200)
+        if etag and status == 200 and not body.cache_control.no_store:
+            body.set_etag(etag, weak=True)
+        return response
+    return decorated_function
+
+def cache_response(f):
+    """conditional_get plus serving GET responses as cached encoded bytes"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if request.method != 'GET':
+            return f(*args, **kwargs)
+        
+        key, etag, not_modified = _validate_get(kwargs)
+        if not_modified is not None:
+            return not_modified
+        
+        entry = report_cache.get(key)
+        if entry is None:
+            response = f(*args, **kwargs)
+            body, status = response if isinstance(response, tuple) else (response, 200)
+            if status != 200 or key is None or body.cache_control.no_store:
+                return response
+            entry = ReportCache.make_entry(body.get_data(), body.mimetype)
+            report_cache.store(key, entry)
+        
+        # Hits go straight from cached bytes to the wire
+        use_gzip = 'gzip' in entry and 'gzip' in request.headers.get('Accept-Encoding', '')
+        response = Response(entry['gzip'] if use_gzip else entry['body'], status=200,
+                            mimetype=entry['mimetype'].decode())
+        response.set_etag(etag, weak=True)
+        response.headers['Vary'] = 'Accept-Encoding'
+        if use_gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+        return response
     return decorated_function
\ No newline at end of file
@@ -0,0 +1,216 @@
+from collections import deque
+import json
+import os
+import threading
+import time
+
+# Per-user pub/sub for pushing small dashboard deltas over Server-Sent Events.
+# Writers publish after their transaction commits; every open stream of that user
+# gets the event through its own bounded queue. A stream that falls behind loses
+# its backlog and is sent a single `resync` event instead, so a slow client can
+# never grow memory or hold up the writer. The transport decides which processes
+# see an event: `memory` only reaches streams in this process, `redis` fans out
+# through Redis pub/sub to every worker subscribed to the same server.
+
+class Subscription:
+    """One open stream: a bounded queue of pending events for a single user"""
+
+    def __init__(self, user_id, max_queue):
+        self.user_id = user_id
+        self.max_queue = max_queue
+        self._events = deque()
+        self._overflowed = False
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def push(self, event):
+        """Queue an event; returns False if the queue was full and the backlog was dropped"""
+        with self._cond:
+            if self._closed:
+                return True
+            if self._overflowed:
+                return False
+            if len(self._events) >= self.max_queue:
+                # Backpressure: drop everything pending and ask the client to refetch
+                self._events.clear()
+                self._overflowed = True
+                self._cond.notify()
+                return False
+            self._events.append(event)
+            self._cond.notify()
+            return True
+
+    def get(self, timeout):
+        """Next event, a resync event after an overflow, or None when `timeout` passes with nothing to send"""
+        with self._cond:
+            if not self._events and not self._overflowed and not self._closed:
+                self._cond.wait(timeout)
+            if self._overflowed:
+                self._overflowed = False
+                return EventBus.make_event('resync', {'reason': 'overflow'})
+            if self._events:
+                return self._events.popleft()
+            return None
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+    @property
+    def closed(self):
+        return self._closed
+
+class MemoryTransport:
+    """Delivers events to streams in this process only"""
+
+    def start(self, deliver):
+        self.deliver = deliver
+
+    def publish(self, user_id, event):
+        self.deliver(user_id, event)
+
+    def stats(self):
+        return {}
+
+class RedisTransport:
+    """Fans events out through Redis pub/sub, one channel per user, so every worker's streams receive them"""
+
+    def __init__(self, url, prefix='pfm:events:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("EVENT_BUS_BACKEND=redis requires the redis package (pip install redis)")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._thread = None
+
+    def start(self, deliver):
+        self.deliver = deliver
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(**{self.prefix + '*': self._on_message})
+        # Listener thread; run_in_thread reconnects on its own after a dropped connection
+        self._thread = pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def _on_message(self, message):
+        try:
+            user_id = message['channel'].decode()[len(self.prefix):]
+            self.deliver(user_id, json.loads(message['data']))
+        except Exception as e:
+            print(f"Event bus message dropped: {e}")
+
+    def publish(self, user_id, event):
+        self.client.publish(f"{self.prefix}{user_id}", json.dumps(event))
+
+    def stats(self):
+        return {'listener_alive': bool(self._thread and self._thread.is_alive())}
+
+class EventBus:
+    """Per-user publish/subscribe with bounded per-stream queues"""
+
+    def __init__(self, transport=None, max_queue=100, max_streams_per_user=5):
+        self.transport = transport
+        self.max_queue = max_queue
+        self.max_streams_per_user = max_streams_per_user
+        self._subscriptions = {}  # user_id (str) -> set of Subscription
+        self._lock = threading.Lock()
+        self._started = False
+        self._stats = {'published': 0, 'delivered': 0, 'overflows': 0, 'rejected': 0, 'errors': 0}
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    @staticmethod
+    def make_event(event_type, data):
+        """Event dict sent to clients; ids are clock based so they increase across workers and restarts"""
+        return {'id': str(time.time_ns()), 'type': event_type, 'data': data}
+
+    def _start(self):
+        # Transports start lazily, so CLI commands and imports never open a Redis listener
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        self.transport.start(self._deliver)
+
+    def _deliver(self, user_id, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(str(user_id), ()))
+        for subscription in subscriptions:
+            if subscription.push(event):
+                self._count('delivered')
+            else:
+                self._count('overflows')
+
+    def subscribe(self, user_id):
+        """Open a stream for a user, or None if the bus is disabled or the user has too many open streams"""
+        if self.transport is None:
+            return None
+        self._start()
+        with self._lock:
+            subscriptions = self._subscriptions.setdefault(str(user_id), set())
+            if len(subscriptions) >= self.max_streams_per_user:
+                self._stats['rejected'] += 1
+                return None
+            subscription = Subscription(str(user_id), self.max_queue)
+            subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscription.close()
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def publish(self, user_id, event_type, data=None):
+        """Send an event to the user's open streams; call after the write is committed. Never raises."""
+        if self.transport is None:
+            return
+        try:
+            self.transport.publish(str(user_id), self.make_event(event_type, data or {}))
+            self._count('published')
+        except Exception as e:
+            # A lost event only costs the client a refetch on its next resync
+            print(f"Event bus publish failed: {e}")
+            self._count('errors')
+
+    def stats(self):
+        """Snapshot of bus statistics"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['streams'] = sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+            stats['users'] = len(self._subscriptions)
+        stats['transport'] = type(self.transport).__name__ if self.transport else None
+        stats['max_queue'] = self.max_queue
+        if self.transport is not None:
+            try:
+                stats.update(self.transport.stats())
+            except Exception as e:
+                stats['transport_error'] = str(e)
+        return stats
+
+def _transport_from_env():
+    kind = os.environ.get('EVENT_BUS_BACKEND', 'memory').lower()
+    if kind == 'redis':
+        try:
+            return RedisTransport(os.environ.get('EVENT_BUS_URL', os.environ.get('REPORT_CACHE_URL', 'redis://localhost:6379/0')))
+        except RuntimeError as e:
+            print(f"Warning: {e}; event stream disabled")
+            return None
+    if kind == 'memory':
+        return MemoryTransport()
+    return None  # 'none' disables the stream endpoint
+
+# Seconds between keep-alive comments on an idle stream
+HEARTBEAT_INTERVAL = float(os.environ.get('EVENT_STREAM_HEARTBEAT', 15))
+
+# Global event bus
+event_bus = EventBus(
+    _transport_from_env(),
+    max_queue=int(os.environ.get('EVENT_STREAM_QUEUE_SIZE', 100)),
+    max_streams_per_user=int(os.environ.get('EVENT_STREAM_MAX_PER_USER', 5))
+)
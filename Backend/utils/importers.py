@@ -0,0 +1,142 @@
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+import csv
+import re
+
+# Statement parsers. Each one reads a text stream line by line and yields
+# (line_number, record) pairs, where record is a dict of raw string fields:
+# date, amount, type, description, notes, category, account. Values are
+# validated later by the import pipeline so one bad row never stops a file.
+
+SUPPORTED_FORMATS = ('csv', 'ofx', 'qif')
+
+CSV_ALIASES = {
+    'date': ('date', 'transaction_date', 'posted', 'posting date'),
+    'amount': ('amount', 'transaction_amount'),
+    'type': ('type', 'transaction_type'),
+    'description': ('description', 'payee', 'name', 'merchant'),
+    'notes': ('notes', 'memo'),
+    'category': ('category', 'category_name', 'category_id'),
+    'account': ('account', 'account_name', 'account_id')
+}
+
+def detect_format(filename, explicit=None):
+    """Pick the parser from an explicit format or the file extension"""
+    fmt = explicit
+    if not fmt and filename and '.' in filename:
+        fmt = filename.rsplit('.', 1)[-1]
+    fmt = (fmt or '').lower()
+    if fmt not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported import format: {fmt or 'unknown'} (expected csv, ofx or qif)")
+    return fmt
+
+def parse_csv(stream):
+    """CSV with a header row; column names are matched against CSV_ALIASES"""
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if header is None:
+        return
+
+    normalized = [h.strip().lower() for h in header]
+    columns = {}
+    for field, aliases in CSV_ALIASES.items():
+        for alias in aliases:
+            if alias in normalized:
+                columns[field] = normalized.index(alias)
+                break
+
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        record = {}
+        for field, index in columns.items():
+            record[field] = row[index].strip() if index < len(row) else ''
+        yield reader.line_num, record
+
+OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<\r\n]*)')
+OFX_FIELDS = {'DTPOSTED': 'date', 'TRNAMT': 'amount', 'NAME': 'description', 'MEMO': 'notes', 'FITID': 'reference'}
+
+def parse_ofx(stream):
+    """OFX 1.x (SGML) or 2.x (XML) bank statements: one record per <STMTTRN>"""
+    record = None
+    start_line = 0
+    for line_number, line in enumerate(stream, 1):
+        for closing, tag, value in OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == 'STMTTRN':
+                if closing:
+                    if record is not None:
+                        yield start_line, record
+                    record = None
+                else:
+                    record, start_line = {}, line_number
+            elif record is not None and not closing and tag in OFX_FIELDS:
+                record[OFX_FIELDS[tag]] = value.strip()
+
+def parse_qif(stream):
+    """QIF bank/credit-card exports: one record per block terminated by '^'"""
+    record = {}
+    start_line = None
+    for line_number, line in enumerate(stream, 1):
+        line = line.rstrip('\r\n')
+        if not line or line.startswith('!'):
+            continue
+        code, value = line[0], line[1:].strip()
+        if code == '^':
+            if record:
+                yield start_line, record
+            record, start_line = {}, None
+            continue
+        if start_line is None:
+            start_line = line_number
+        if code == 'D':
+            record['date'] = value
+        elif code in ('T', 'U'):
+            record['amount'] = value
+        elif code == 'P':
+            record['description'] = value
+        elif code == 'M':
+            record['notes'] = value
+        elif code == 'L' and not value.startswith('['):
+            # [Account] in L is a transfer target, not a category
+            record['category'] = value
+    if record:
+        yield start_line, record
+
+PARSERS = {'csv': parse_csv, 'ofx': parse_ofx, 'qif': parse_qif}
+
+def parse_statement(stream, fmt):
+    """Yield (line_number, record) from a statement in the given format"""
+    return PARSERS[fmt](stream)
+
+DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%m/%d/%y', '%d.%m.%Y', '%Y%m%d')
+
+def parse_date(value):
+    """Parse the date formats found in bank exports (ISO, US, QIF apostrophe years, OFX)"""
+    value = (value or '').strip()
+    if not value:
+        raise ValueError('date is required')
+    if re.match(r'^\d{8}', value):
+        # OFX: YYYYMMDD[HHMMSS[.XXX]][TZ]
+        value = value[:8]
+    # QIF writes 2000+ years as 1/5'24
+    value = value.replace("'", '/').replace(' ', '')
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f'unrecognized date: {value}')
+
+def parse_amount(value):
+    """Parse an amount, accepting thousands separators, currency symbols and (negative) parentheses"""
+    value = (value or '').strip()
+    if not value:
+        raise ValueError('amount is required')
+    negative = value.startswith('(') and value.endswith(')')
+    cleaned = re.sub(r'[^0-9.\-+]', '', value)
+    try:
+        amount = Decimal(cleaned)
+    except InvalidOperation:
+        raise ValueError(f'invalid amount: {value}')
+    return -amount if negative else amount
@@ -0,0 +1,47 @@
+from datetime import date, datetime
+from decimal import Decimal
+import base64
+import json
+
+# Opaque keyset cursors: the sort-key values of the last row on a page, JSON
+# encoded (with dates tagged so they round-trip) and base64url wrapped.
+
+def encode_cursor(*values):
+    """Encode the last row's sort-key values as an opaque token"""
+    payload = []
+    for value in values:
+        if isinstance(value, datetime):
+            payload.append({'dt': value.isoformat()})
+        elif isinstance(value, date):
+            payload.append({'d': value.isoformat()})
+        elif isinstance(value, Decimal):
+            payload.append({'n': str(value)})
+        else:
+            payload.append(value)
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(token, size):
+    """Decode a cursor token into `size` sort-key values, raising ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw.decode('utf-8'))
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+    if not isinstance(payload, list) or len(payload) != size:
+        raise ValueError('Invalid cursor')
+
+    values = []
+    for value in payload:
+        if isinstance(value, dict):
+            if 'dt' in value:
+                value = datetime.fromisoformat(value['dt'])
+            elif 'd' in value:
+                value = date.fromisoformat(value['d'])
+            elif 'n' in value:
+                value = Decimal(value['n'])
+            else:
+                raise ValueError('Invalid cursor')
+        values.append(value)
+    return values
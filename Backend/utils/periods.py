@@ -0,0 +1,86 @@
+from datetime import date, datetime, timedelta
+
+# Every helper returns a half-open [start, end) pair of dates so queries can use
+# "transaction_date >= %s AND transaction_date < %s" and stay index range scans.
+
+def _as_date(value):
+    if value is None:
+        return date.today()
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+def _add_months(day, months):
+    """First day of the month `months` after the month containing `day`"""
+    index = day.year * 12 + (day.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def month_range(year, month):
+    """[first of month, first of next month)"""
+    start = date(year, month, 1)
+    return start, _add_months(start, 1)
+
+def quarter_range(year, quarter):
+    """[first of quarter, first of next quarter)"""
+    start = date(year, 3 * (quarter - 1) + 1, 1)
+    return start, _add_months(start, 3)
+
+def year_range(year):
+    """[Jan 1, Jan 1 of next year)"""
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+def week_range(day=None):
+    """[Monday, next Monday) for the week containing `day`"""
+    day = _as_date(day)
+    start = day - timedelta(days=day.weekday())
+    return start, start + timedelta(days=7)
+
+def rolling_range(days, day=None):
+    """The last `days` days up to and including `day`"""
+    end = _as_date(day) + timedelta(days=1)
+    return end - timedelta(days=days), end
+
+def period_range(period, day=None, offset=0):
+    """Calendar week/month/quarter/year containing `day`, shifted by `offset` periods"""
+    day = _as_date(day)
+
+    if period == 'week':
+        start, end = week_range(day)
+        shift = timedelta(days=7 * offset)
+        return start + shift, end + shift
+    if period == 'month':
+        start = _add_months(date(day.year, day.month, 1), offset)
+        return start, _add_months(start, 1)
+    if period == 'quarter':
+        start = _add_months(date(day.year, 3 * ((day.month - 1) // 3) + 1, 1), 3 * offset)
+        return start, _add_months(start, 3)
+    if period == 'year':
+        return year_range(day.year + offset)
+
+    raise ValueError(f"Unknown period: {period}")
+
+def comparison_ranges(period, compare='previous', days=None, day=None):
+    """(current, comparison) ranges: the adjacent earlier period, or the same period a year ago for 'yoy'"""
+    # period 'days' means the last `days` days rather than a calendar period
+    if period == 'days':
+        if not days or days < 1:
+            raise ValueError("days must be a positive number for period 'days'")
+        current = rolling_range(days, day)
+        if compare == 'yoy':
+            return current, (_shift_years(current[0], -1), _shift_years(current[1], -1))
+        return current, (current[0] - timedelta(days=days), current[0])
+
+    current = period_range(period, day)
+    if compare == 'yoy':
+        if period == 'week':
+            shift = timedelta(weeks=52)
+            return current, (current[0] - shift, current[1] - shift)
+        return current, (_shift_years(current[0], -1), _shift_years(current[1], -1))
+    return current, period_range(period, day, offset=-1)
+
+def _shift_years(day, years):
+    try:
+        return day.replace(year=day.year + years)
+    except ValueError:
+        # Feb 29 -> Feb 28
+        return day.replace(year=day.year + years, day=28)
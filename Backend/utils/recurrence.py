@@ -0,0 +1,58 @@
+from datetime import date, timedelta
+import calendar
+
+# Recurrence rules. Occurrence k of a schedule is computed directly from its
+# start date, so a monthly rule started on Jan 31 gives Feb 28/29, Mar 31, ...
+# rather than drifting to the 28th. Windows are half-open [start, end).
+
+FREQUENCIES = ('daily', 'weekly', 'biweekly', 'monthly', 'yearly')
+STEP_DAYS = {'daily': 1, 'weekly': 7, 'biweekly': 14}
+
+def _clamped(year, month, day):
+    return date(year, month, min(day, calendar.monthrange(year, month)[1]))
+
+def occurrence(start, frequency, index):
+    """Date of occurrence `index` (0 = start) of a schedule"""
+    if frequency in STEP_DAYS:
+        return start + timedelta(days=STEP_DAYS[frequency] * index)
+    if frequency == 'monthly':
+        months = start.year * 12 + (start.month - 1) + index
+        return _clamped(months // 12, months % 12 + 1, start.day)
+    if frequency == 'yearly':
+        return _clamped(start.year + index, start.month, start.day)
+    raise ValueError(f"Unknown frequency: {frequency} (expected {', '.join(FREQUENCIES)})")
+
+def first_index_on_or_after(start, frequency, day):
+    """Index of the first occurrence on or after `day`"""
+    if day <= start:
+        return 0
+    if frequency in STEP_DAYS:
+        step = STEP_DAYS[frequency]
+        return -(-(day - start).days // step)
+    if frequency == 'monthly':
+        index = (day.year - start.year) * 12 + (day.month - start.month)
+    elif frequency == 'yearly':
+        index = day.year - start.year
+    else:
+        raise ValueError(f"Unknown frequency: {frequency} (expected {', '.join(FREQUENCIES)})")
+    index = max(index - 1, 0)
+    while occurrence(start, frequency, index) < day:
+        index += 1
+    return index
+
+def occurrences(start, frequency, window_start, window_end, end_date=None):
+    """Occurrence dates in [window_start, window_end), stopping after an inclusive end_date"""
+    index = first_index_on_or_after(start, frequency, window_start)
+    while True:
+        day = occurrence(start, frequency, index)
+        if day >= window_end or (end_date and day > end_date):
+            return
+        yield day
+        index += 1
+
+def next_occurrence(start, frequency, after, end_date=None):
+    """First occurrence strictly after `after`, or None once the schedule has ended"""
+    day = occurrence(start, frequency, first_index_on_or_after(start, frequency, after + timedelta(days=1)))
+    if end_date and day > end_date:
+        return None
+    return day
@@ -0,0 +1,256 @@
+from collections import OrderedDict
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from config.db import current_database_key
+
+# Encoded GET responses cached per (database, user, endpoint, parameters, data version).
+# An entry holds the final JSON bytes and a gzip copy for larger bodies, so a hit
+# skips the models, to_dict() and JSON encoding entirely. The same key, hashed,
+# is the response's weak ETag: a client whose copy is current gets a 304 without
+# any SQL. Every committed write bumps the user's data version, so entries and
+# ETags from before it never match again; entries age out through the LRU cap
+# and TTL instead of being deleted one by one. Versions are read before
+# computing, so a result that races with a write is keyed by the old version.
+# Versions start from the clock, so a restart or a lost counter never reissues
+# an old ETag. Keys and versions are scoped by database identity as well as user
+# id, since user ids from two databases behind one server are unrelated.
+# The memory backend only sees its own process's writes, so any other writer
+# (gunicorn workers, CLI jobs) requires the redis backend.
+
+class MemoryCacheBackend:
+    """In-process LRU with a size cap and TTL; versions live outside the LRU so they are never evicted"""
+
+    def __init__(self, max_entries=1024, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (value, expires_at), LRU order
+        self._versions = {}
+        self._base_version = time.time_ns()
+        self._lock = threading.Lock()
+        self._stats = {'evictions': 0, 'expirations': 0}
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= now:
+                del self._entries[key]
+                self._stats['expirations'] += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def version(self, scope):
+        # Only this process's writes reach this dict; other writers need the redis backend
+        with self._lock:
+            return self._versions.get(scope, self._base_version)
+
+    def bump(self, scope):
+        with self._lock:
+            self._versions[scope] = self._versions.get(scope, self._base_version) + 1
+            return self._versions[scope]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['max_entries'] = self.max_entries
+            stats['ttl'] = self.ttl
+        return stats
+
+class RedisCacheBackend:
+    """Redis-backed entries and versions, shared by every worker process pointed at the same server"""
+
+    def __init__(self, url, ttl=300, prefix='pfm:report:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("REPORT_CACHE_BACKEND=redis requires the redis package (pip install redis)")
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        entry = self.client.hgetall(self.prefix + key)
+        return {field.decode(): value for field, value in entry.items()} if entry else None
+
+    def set(self, key, value):
+        pipe = self.client.pipeline()
+        pipe.delete(self.prefix + key)
+        pipe.hset(self.prefix + key, mapping=value)
+        pipe.expire(self.prefix + key, self.ttl)
+        pipe.execute()
+
+    def version(self, scope):
+        key = f"{self.prefix}version:{scope}"
+        version = self.client.get(key)
+        if version is None:
+            self.client.set(key, time.time_ns(), nx=True)
+            version = self.client.get(key)
+        return int(version)
+
+    def bump(self, scope):
+        self.version(scope)
+        return self.client.incr(f"{self.prefix}version:{scope}")
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + '*'):
+            if not key.decode().startswith(f"{self.prefix}version:"):
+                self.client.delete(key)
+
+    def stats(self):
+        # Redis evicts and expires on its own; these counters are server-wide
+        info = self.client.info('stats')
+        return {
+            'evictions': info.get('evicted_keys', 0),
+            'expirations': info.get('expired_keys', 0),
+            'ttl': self.ttl
+        }
+
+class ReportCache:
+    """Cache of encoded responses with per-user data-version invalidation"""
+
+    # Bodies at least this large also get a gzip copy for clients that accept it
+    GZIP_MIN_BYTES = 1024
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'stores': 0, 'invalidations': 0, 'errors': 0,
+                       'validated_gets': 0, 'conditional_gets': 0, 'not_modified': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    @staticmethod
+    def scope(user_id, database=None):
+        """Version namespace of a user in a database (default: the request's or CLI job's database)"""
+        return f"{database or current_database_key()}|{user_id}"
+
+    def key(self, scope, endpoint, params, version):
+        """Cache key; params are hashed so arbitrary query strings give short keys"""
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        return f"{scope}:{version}:{endpoint}:{digest}"
+
+    @staticmethod
+    def make_entry(body, mimetype='application/json'):
+        """Entry for an encoded body: {body, mimetype[, gzip]}, all bytes"""
+        entry = {'body': body, 'mimetype': mimetype.encode()}
+        if len(body) >= ReportCache.GZIP_MIN_BYTES:
+            entry['gzip'] = gzip.compress(body, compresslevel=6, mtime=0)
+        return entry
+
+    def resolve(self, user_id, endpoint, params, database=None):
+        """(key, etag) from the user's current data version, or (None, None) if versions are unavailable"""
+        if self.backend is None:
+            return None, None
+        try:
+            scope = self.scope(user_id, database)
+            key = self.key(scope, endpoint, params, self.backend.version(scope))
+        except Exception as e:
+            # A cache outage only costs the recomputation
+            print(f"Report cache version lookup failed: {e}")
+            self._count('errors')
+            return None, None
+        return key, hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def record_validation(self, conditional, not_modified):
+        """Count a GET that went through ETag validation, whether it sent If-None-Match and whether it got a 304"""
+        with self._lock:
+            self._stats['validated_gets'] += 1
+            if conditional:
+                self._stats['conditional_gets'] += 1
+            if not_modified:
+                self._stats['not_modified'] += 1
+
+    def get(self, key):
+        """Cached entry for a key from resolve(), or None"""
+        if self.backend is None or key is None:
+            return None
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            print(f"Report cache lookup failed: {e}")
+            self._count('errors')
+            return None
+        self._count('hits' if value is not None else 'misses')
+        return value
+
+    def store(self, key, value):
+        if self.backend is None or key is None:
+            return
+        try:
+            self.backend.set(key, value)
+            self._count('stores')
+        except Exception as e:
+            print(f"Report cache store failed: {e}")
+            self._count('errors')
+
+    def bump(self, user_id, database=None):
+        """Invalidate everything cached for a user; call after their write is committed"""
+        if self.backend is None:
+            return
+        try:
+            self.backend.bump(self.scope(user_id, database))
+            self._count('invalidations')
+        except Exception as e:
+            print(f"Report cache invalidation failed: {e}")
+            self._count('errors')
+
+    def stats(self):
+        """Snapshot of cache statistics"""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        validated = stats['validated_gets']
+        stats['not_modified_rate'] = round(stats['not_modified'] / validated, 4) if validated else 0.0
+        stats['backend'] = type(self.backend).__name__ if self.backend else None
+        if self.backend is not None:
+            try:
+                stats.update(self.backend.stats())
+            except Exception as e:
+                stats['backend_error'] = str(e)
+        return stats
+
+def _backend_from_env():
+    # gunicorn takes its worker count from WEB_CONCURRENCY; separate processes need a shared backend
+    workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+    kind = os.environ.get('REPORT_CACHE_BACKEND', 'redis' if workers > 1 else 'memory').lower()
+    ttl = int(os.environ.get('REPORT_CACHE_TTL', 300))
+    if kind == 'memory' and workers > 1:
+        # Each worker would keep confirming its own stale copies; serve uncached instead
+        print(f"Warning: REPORT_CACHE_BACKEND=memory cannot serve WEB_CONCURRENCY={workers} workers; "
+              "report cache disabled (set REPORT_CACHE_BACKEND=redis)")
+        return None
+    if kind == 'redis':
+        try:
+            return RedisCacheBackend(os.environ.get('REPORT_CACHE_URL', 'redis://localhost:6379/0'), ttl=ttl)
+        except RuntimeError as e:
+            print(f"Warning: {e}; report cache disabled")
+            return None
+    if kind == 'memory':
+        return MemoryCacheBackend(max_entries=int(os.environ.get('REPORT_CACHE_MAX_ENTRIES', 1024)), ttl=ttl)
+    return None  # 'none' disables caching
+
+# Global report cache
+report_cache = ReportCache(_backend_from_env())
@@ -516,11 +516,11 @@ BEGIN
     
     SET v_transaction_id = LAST_INSERT_ID();
     
-    -- Update account balance
+    -- Update account balance (the amount's sign is ignored; the type gives the direction)
     IF p_transaction_type = 'income' THEN
-        UPDATE Accounts SET balance = balance + p_amount WHERE account_id = p_account_id;
+        UPDATE Accounts SET balance = balance + ABS(p_amount) WHERE account_id = p_account_id;
     ELSEIF p_transaction_type = 'expense' THEN
-        UPDATE Accounts SET balance = balance + p_amount WHERE account_id = p_account_id;
+        UPDATE Accounts SET balance = balance - ABS(p_amount) WHERE account_id = p_account_id;
     END IF;
     
     SELECT 'Transaction added successfully' as message, 